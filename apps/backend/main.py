@@ -1,36 +1,81 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import os
 from dotenv import load_dotenv
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import json
 import uuid
 from datetime import datetime
 import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
 
 from models import (
     StartApplicationRequest, StartApplicationResponse,
-    DraftRequest, DraftResponse,
+    DraftRequest, DraftResponse, BatchDraftRequest,
     CompleteApplicationRequest, CompleteApplicationResponse,
     ConfirmAttestationRequest, ConfirmAttestationResponse,
+    BatchVerifyRequest, BatchVerifyResponse,
     SubmitToRvoRequest, SubmitToRvoResponse,
     DashboardData, ApiError
 )
-# from services.agent_service import AgentService
-# from services.attestation_service import AttestationService
-# from services.rvo_service import RvoService
-# from services.wallet_service import WalletService
+from services.agent_service import AgentService
+from services.attestation_service import AttestationService
+from services.rvo_service import RvoService
+from services.wallet_service import WalletService
+from services.application_store import create_application_store
+from services.status_events import create_status_broker, status_event
+from services.submission_outbox import create_submission_outbox
+from services.submission_worker import create_submission_worker_pool
+from services.cpu_executor import CPU_EXECUTOR
+from services.metrics import APPLICATIONS, REGISTRY, SUBMISSION_QUEUE_DEPTH, MetricsMiddleware
+from services.tracing import TRACER, InMemorySpanExporter, TracingMiddleware, install_log_trace_ids
 
 # Load environment variables
 load_dotenv()
 
+# Log lines carry the trace id of the request they belong to
+install_log_trace_ids()
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "WARNING").upper(),
+    format="%(asctime)s %(levelname)s %(name)s [trace_id=%(trace_id)s] %(message)s"
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load wallet credentials once and keep them fresh in the background,
+    # so requests are always served from memory
+    await wallet_service.refresh()
+    wallet_service.start_watcher()
+    # Data files are created here rather than at import
+    await application_store.open()
+    await submission_outbox.open()
+    await agent_service.draft_cache.open()
+    await asyncio.get_running_loop().run_in_executor(None, attestation_service.key_set.ensure_loaded)
+    # tiktoken may download its encoding, so load it off the event loop
+    await asyncio.get_running_loop().run_in_executor(None, agent_service.prompt_compactor.load_encoding)
+    # Drain queued RVO submissions, including any left from before a restart
+    submission_workers.start()
+    yield
+    await submission_workers.stop()
+    await wallet_service.stop_watcher()
+    await agent_service.draft_cache.close()
+    await submission_outbox.close()
+    await application_store.close()
+    await rvo_service.aclose()
+    attestation_service.shutdown()
+    CPU_EXECUTOR.shutdown()
+    TRACER.flush()
+
 app = FastAPI(
     title="Entrepreneur AI Agent API",
     description="AI Agent for DHI subsidy applications",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -42,21 +87,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services (commented out for demo)
-# agent_service = AgentService()
-# attestation_service = AttestationService()
-# rvo_service = RvoService()
-# wallet_service = WalletService()
+# Request latency per route, exposed on /metrics
+app.add_middleware(MetricsMiddleware)
+# A span per request, continuing the caller's traceparent; added last so
+# it is the outermost middleware and covers everything else
+app.add_middleware(TracingMiddleware)
+
+# Initialize services; LLM_PROVIDER=fake runs the agent without OpenAI
+agent_service = AgentService()
+attestation_service = AttestationService()
+rvo_service = RvoService()
+wallet_service = WalletService()
+
+# Application storage, configured with APPLICATION_STORE (memory or sqlite)
+application_store = create_application_store()
+
+# Applications per status on /metrics are recounted at most every
+# APPLICATION_COUNTS_TTL seconds, not on every scrape
+APPLICATION_COUNTS_TTL = float(os.getenv("APPLICATION_COUNTS_TTL", "30"))
 
-# In-memory storage for demo purposes
-applications: Dict[str, Any] = {}
+# Status changes written to the store are pushed to subscribed clients
+status_broker = create_status_broker()
+application_store.status_listeners.append(status_broker.publish)
+
+# RVO submissions are queued in an outbox (SUBMISSION_OUTBOX) and delivered
+# by a pool of background workers, so requests do not wait for RVO
+submission_outbox = create_submission_outbox()
+submission_workers = create_submission_worker_pool(submission_outbox, rvo_service, application_store)
 
 @app.get("/")
 async def root():
     return {"message": "Entrepreneur AI Agent API", "version": "1.0.0"}
 
 @app.get("/api/dashboard", response_model=DashboardData)
-async def get_dashboard():
+async def get_dashboard(
+    entrepreneurId: Optional[str] = None,
+    limit: int = Query(5, ge=1, le=application_store.recent.capacity)
+):
     """Get dashboard data showing available credentials and recent applications"""
     try:
         # Demo data for testing
@@ -76,7 +143,8 @@ async def get_dashboard():
             }
         ]
         missing_credentials = []
-        recent_applications = list(applications.values())[-5:]  # Last 5 applications
+        # Served from the recency index, scoped to the entrepreneur when given
+        recent_applications = await application_store.list_recent(limit, entrepreneurId)
         
         return DashboardData(
             availableCredentials=available_credentials,
@@ -93,15 +161,18 @@ async def start_application(request: StartApplicationRequest):
     try:
         application_id = str(uuid.uuid4())
         
-        # Step 2: Send request to RVO AI Agent
-        rvo_response = await rvo_service.get_requirements()
+        # Step 2: Send request to RVO AI Agent, loading the wallet meanwhile
+        rvo_response, _ = await asyncio.gather(
+            rvo_service.get_requirements(),
+            wallet_service.warm_up(request.entrepreneurId)
+        )
         
-        # Step 3: Check available credentials
-        available_credentials = await wallet_service.get_available_credentials(rvo_response["requirements"]["requestedCredentials"])
-        missing_credentials = await wallet_service.get_missing_credentials_for_requirements(rvo_response["requirements"]["requestedCredentials"])
+        # Step 3: Check available credentials in the entrepreneur's wallet
+        requested_credentials = rvo_response["requirements"]["requestedCredentials"]
+        available_credentials, missing_credentials = await wallet_service.resolve(requested_credentials, request.entrepreneurId)
         
         # Store application
-        applications[application_id] = {
+        await application_store.create({
             "id": application_id,
             "entrepreneurId": request.entrepreneurId,
             "status": "started",
@@ -109,7 +180,7 @@ async def start_application(request: StartApplicationRequest):
             "availableCredentials": available_credentials,
             "missingCredentials": missing_credentials,
             "createdAt": datetime.now().isoformat()
-        }
+        })
         
         return StartApplicationResponse(
             applicationId=application_id,
@@ -124,24 +195,30 @@ async def start_application(request: StartApplicationRequest):
 async def create_draft(request: DraftRequest):
     """Step 4-7: Create AI-generated draft with available data"""
     try:
-        if request.applicationId not in applications:
+        application = await application_store.get(request.applicationId)
+        if application is None:
             raise HTTPException(status_code=404, detail="Application not found")
         
-        application = applications[request.applicationId]
-        
-        # Step 4-5: Check credentials and inform RVO
+        # Step 4-5: Check credentials in the entrepreneur's wallet and inform RVO
+        available_credentials = await wallet_service.get_available_credentials(
+            application["requirements"]["requestedCredentials"],
+            application["entrepreneurId"]
+        )
         rvo_additional_info = await rvo_service.get_additional_requirements(application["requirements"])
         
         # Step 6-7: Create draft with available data
         draft = await agent_service.create_draft(
             application_id=request.applicationId,
-            available_credentials=request.availableCredentials,
-            additional_requirements=rvo_additional_info["additionalInformation"]
+            available_credentials=available_credentials,
+            additional_requirements=rvo_additional_info["additionalInformation"],
+            requested_fields=application["requirements"]["requestedCredentials"]
         )
         
         # Update application
-        applications[request.applicationId]["draft"] = draft
-        applications[request.applicationId]["status"] = "draft_created"
+        await application_store.update(request.applicationId, {
+            "draft": draft,
+            "status": "draft_created"
+        })
         
         return DraftResponse(
             draft=draft,
@@ -150,15 +227,116 @@ async def create_draft(request: DraftRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/agent/draft/stream")
+async def stream_draft(request: DraftRequest):
+    """Step 4-7: Create the draft, streaming tokens and fields as Server-Sent Events"""
+    application = await application_store.get(request.applicationId)
+    if application is None:
+        raise HTTPException(status_code=404, detail="Application not found")
+    
+    async def events():
+        try:
+            # Step 4-5: Check credentials in the entrepreneur's wallet and inform RVO
+            available_credentials = await wallet_service.get_available_credentials(
+                application["requirements"]["requestedCredentials"],
+                application["entrepreneurId"]
+            )
+            rvo_additional_info = await rvo_service.get_additional_requirements(application["requirements"])
+            
+            # Step 6-7: Stream the draft as it is generated
+            async for event, data in agent_service.stream_draft(
+                application_id=request.applicationId,
+                available_credentials=available_credentials,
+                additional_requirements=rvo_additional_info["additionalInformation"],
+                requested_fields=application["requirements"]["requestedCredentials"]
+            ):
+                if event != "draft":
+                    yield _sse_event(event, data)
+                    continue
+                
+                # Update application
+                await application_store.update(request.applicationId, {
+                    "draft": data,
+                    "status": "draft_created"
+                })
+                yield _sse_event("draft", DraftResponse(draft=data, missingFields=data["missingFields"]).dict())
+        except Exception as e:
+            yield _sse_event("error", {"message": str(e)})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/agent/draft/batch")
+async def create_draft_batch(request: BatchDraftRequest):
+    """Step 4-7 for many applications, streaming each draft as NDJSON as it completes"""
+    async def results():
+        started = time.perf_counter()
+        items = []
+        drafts = 0
+        errors = 0
+        
+        for application_id in dict.fromkeys(request.applicationIds):
+            application = await application_store.get(application_id)
+            if application is None:
+                errors += 1
+                yield _ndjson_line({"applicationId": application_id, "error": "Application not found"})
+                continue
+            
+            # Step 4-5: Check credentials in the entrepreneur's wallet and inform RVO
+            available_credentials = await wallet_service.get_available_credentials(
+                application["requirements"]["requestedCredentials"],
+                application["entrepreneurId"]
+            )
+            rvo_additional_info = await rvo_service.get_additional_requirements(application["requirements"])
+            items.append({
+                "applicationId": application_id,
+                "availableCredentials": available_credentials,
+                "additionalRequirements": rvo_additional_info["additionalInformation"],
+                "requestedCredentials": application["requirements"]["requestedCredentials"]
+            })
+        
+        try:
+            # Step 6-7: Identical inputs share one LLM call
+            async for application_id, draft in agent_service.create_drafts_batch(items, request.maxConcurrency):
+                await application_store.update(application_id, {
+                    "draft": draft,
+                    "status": "draft_created"
+                })
+                drafts += 1
+                yield _ndjson_line({"applicationId": application_id, **DraftResponse(draft=draft, missingFields=draft["missingFields"]).dict()})
+        except Exception as e:
+            errors += 1
+            yield _ndjson_line({"error": str(e)})
+        
+        elapsed = time.perf_counter() - started
+        yield _ndjson_line({"summary": {
+            "drafts": drafts,
+            "errors": errors,
+            "elapsedSeconds": round(elapsed, 3),
+            "draftsPerSecond": round(drafts / elapsed, 2) if elapsed > 0 else 0.0
+        }})
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+def _ndjson_line(data: Dict[str, Any]) -> str:
+    """Format one newline-delimited JSON record"""
+    return json.dumps(data) + "\n"
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 @app.post("/api/entrepreneur/complete", response_model=CompleteApplicationResponse)
 async def complete_application(request: CompleteApplicationRequest):
     """Step 8-10: Complete application with entrepreneur input"""
     try:
-        if request.applicationId not in applications:
+        application = await application_store.get(request.applicationId)
+        if application is None:
             raise HTTPException(status_code=404, detail="Application not found")
         
-        application = applications[request.applicationId]
-        
         # Update draft with entrepreneur input
         updated_draft = await agent_service.update_draft(
             application_id=request.applicationId,
@@ -173,9 +351,11 @@ async def complete_application(request: CompleteApplicationRequest):
         )
         
         # Update application
-        applications[request.applicationId]["draft"] = updated_draft
-        applications[request.applicationId]["attestation"] = attestation
-        applications[request.applicationId]["status"] = "ready_for_confirmation"
+        await application_store.update(request.applicationId, {
+            "draft": updated_draft,
+            "attestation": attestation,
+            "status": "ready_for_confirmation"
+        })
         
         return CompleteApplicationResponse(
             draft=updated_draft,
@@ -188,18 +368,19 @@ async def complete_application(request: CompleteApplicationRequest):
 async def confirm_attestation(request: ConfirmAttestationRequest):
     """Step 11: Confirm attestation with PIN/fingerprint simulation"""
     try:
-        if request.applicationId not in applications:
+        application = await application_store.get(request.applicationId)
+        if application is None:
             raise HTTPException(status_code=404, detail="Application not found")
         
-        application = applications[request.applicationId]
-        
         # Simulate PIN verification (in production, this would be real biometric verification)
         if request.pin != "1234":  # Demo PIN
             raise HTTPException(status_code=401, detail="Invalid PIN")
         
         # Update application status
-        applications[request.applicationId]["status"] = "confirmed"
-        applications[request.applicationId]["confirmedAt"] = datetime.now().isoformat()
+        await application_store.update(request.applicationId, {
+            "status": "confirmed",
+            "confirmedAt": datetime.now().isoformat()
+        })
         
         return ConfirmAttestationResponse(
             success=True,
@@ -208,29 +389,58 @@ async def confirm_attestation(request: ConfirmAttestationRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/attestation/verify/batch", response_model=BatchVerifyResponse)
+async def verify_attestations(request: BatchVerifyRequest):
+    """Verify the proofs of many attestations at once"""
+    try:
+        started = time.perf_counter()
+        results = await attestation_service.verify_attestations(request.attestations)
+        valid = sum(1 for result in results if result["valid"])
+        
+        return BatchVerifyResponse(
+            results=results,
+            valid=valid,
+            invalid=len(results) - valid,
+            elapsedSeconds=time.perf_counter() - started
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/rvo/submit", response_model=SubmitToRvoResponse)
 async def submit_to_rvo(request: SubmitToRvoRequest):
-    """Step 12-13: Submit to RVO and get confirmation"""
+    """Step 12-13: Queue the submission to RVO; its status moves on to submitted and under_review"""
     try:
-        if request.applicationId not in applications:
+        application = await application_store.get(request.applicationId)
+        if application is None:
             raise HTTPException(status_code=404, detail="Application not found")
         
-        application = applications[request.applicationId]
-        
-        # Step 12: Submit to RVO
-        submission = await rvo_service.submit_application(
-            application_id=request.applicationId,
-            attestation=request.attestation
-        )
-        
-        # Step 13: Update application status
-        applications[request.applicationId]["submission"] = submission
-        applications[request.applicationId]["status"] = "submitted"
-        applications[request.applicationId]["submittedAt"] = datetime.now().isoformat()
+        # Step 13: Mark the application queued before a worker can pick it up,
+        # so the worker's "submitted" is never overwritten
+        queued_at = datetime.now().isoformat()
+        await application_store.update(request.applicationId, {
+            "status": "queued",
+            "queuedAt": queued_at
+        })
         
+        # Step 12: The outbox workers submit to RVO in the background
+        try:
+            await submission_workers.enqueue(request.applicationId, request.attestation)
+        except Exception:
+            # Nothing was queued, so the application must not stay queued
+            await application_store.update(request.applicationId, {
+                "status": application["status"],
+                "queuedAt": application.get("queuedAt")
+            })
+            raise
+
         return SubmitToRvoResponse(
             success=True,
-            submission=submission
+            submission={
+                "applicationId": request.applicationId,
+                "status": "queued",
+                "queuedAt": queued_at,
+                "message": "Your application is queued for submission to RVO."
+            }
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -238,10 +448,77 @@ async def submit_to_rvo(request: SubmitToRvoRequest):
 @app.get("/api/application/{application_id}")
 async def get_application(application_id: str):
     """Get application status and details"""
-    if application_id not in applications:
+    application = await application_store.get(application_id)
+    if application is None:
         raise HTTPException(status_code=404, detail="Application not found")
     
-    return applications[application_id]
+    return application
+
+@app.get("/api/application/{application_id}/events")
+async def application_events(application_id: str):
+    """Stream status changes of one application as Server-Sent Events, starting with its current status"""
+    if await application_store.get(application_id) is None:
+        raise HTTPException(status_code=404, detail="Application not found")
+    
+    async def current() -> List[Dict[str, Any]]:
+        application = await application_store.get(application_id)
+        return [application] if application is not None else []
+    
+    return _status_stream({"application_id": application_id}, current)
+
+@app.get("/api/entrepreneur/{entrepreneur_id}/events")
+async def entrepreneur_events(
+    entrepreneur_id: str,
+    limit: int = Query(5, ge=0, le=application_store.recent.capacity)
+):
+    """Stream status changes of an entrepreneur's applications as Server-Sent Events, starting with the latest `limit`"""
+    async def current() -> List[Dict[str, Any]]:
+        return list(reversed(await application_store.list_recent(limit, entrepreneur_id))) if limit else []
+    
+    return _status_stream({"entrepreneur_id": entrepreneur_id}, current)
+
+def _status_stream(keys: Dict[str, str], current) -> StreamingResponse:
+    """Server-Sent Events of status changes, preceded by the current status of the applications"""
+    async def events():
+        # Subscribed before the current status is read, so no change is missed
+        # in between; the subscription is dropped when the client disconnects
+        subscription = status_broker.subscribe(**keys)
+        try:
+            for application in await current():
+                yield _sse_event("status", status_event(application))
+            while True:
+                pending = await subscription.get(status_broker.heartbeat_interval)
+                if not pending:
+                    yield ": keepalive\n\n"
+                    continue
+                yield "".join(f"id: {event_id}\nevent: status\ndata: {data}\n\n" for event_id, data in pending)
+        finally:
+            status_broker.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: latency histograms per route and service, application counts"""
+    counts = await application_store.count_by_status_cached(APPLICATION_COUNTS_TTL)
+    APPLICATIONS.replace({(status,): count for status, count in counts.items()})
+    outbox_counts = await submission_outbox.count_by_state()
+    SUBMISSION_QUEUE_DEPTH.replace({(state,): outbox_counts.get(state, 0) for state in ("pending", "failed")})
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Get the spans of a recent trace (TRACE_EXPORTER=memory)"""
+    if not isinstance(TRACER.exporter, InMemorySpanExporter):
+        raise HTTPException(status_code=404, detail="Traces are not kept in memory")
+    spans = TRACER.exporter.get_trace(trace_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return {"traceId": trace_id, "spans": spans}
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
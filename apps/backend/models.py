@@ -14,7 +14,12 @@ class StartApplicationResponse(BaseModel):
 
 class DraftRequest(BaseModel):
     applicationId: str
-    availableCredentials: List[Dict[str, Any]]
+    # Deprecated: drafts use the credentials in the entrepreneur's wallet
+    availableCredentials: List[Dict[str, Any]] = []
+
+class BatchDraftRequest(BaseModel):
+    applicationIds: List[str] = Field(min_length=1, max_length=1000)
+    maxConcurrency: int = Field(default=8, ge=1, le=64)
 
 class DraftResponse(BaseModel):
     draft: Dict[str, Any]
@@ -36,6 +41,15 @@ class ConfirmAttestationResponse(BaseModel):
     success: bool
     attestation: Dict[str, Any]
 
+class BatchVerifyRequest(BaseModel):
+    attestations: List[Dict[str, Any]] = Field(min_length=1, max_length=10000)
+
+class BatchVerifyResponse(BaseModel):
+    results: List[Dict[str, Any]]
+    valid: int
+    invalid: int
+    elapsedSeconds: float
+
 class SubmitToRvoRequest(BaseModel):
     applicationId: str
     attestation: Dict[str, Any]
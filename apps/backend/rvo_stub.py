@@ -0,0 +1,179 @@
+"""
+Local stand-in for the RVO API, for development and offline benchmarks.
+
+Run it next to the backend and point RVO_API_URL at it:
+
+    python -m uvicorn rvo_stub:app --app-dir apps/backend --port 8001
+    RVO_API_URL=http://localhost:8001
+
+Latency and failures are simulated from the RVO_STUB_* settings, so the
+client's connection pooling, retries and circuit breaker can be exercised.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Any, Optional
+
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+
+from services.tracing import TracingMiddleware
+
+# Edit this file to publish new requirements; it is reloaded when it changes
+REQUIREMENTS_PATH = os.getenv("RVO_STUB_REQUIREMENTS", "data/rvo/examples/requirements.json")
+
+# Simulated behaviour: log-normal latency around the median, and the share
+# of requests answered with 503, with 429 or not answered within 60 seconds
+MEDIAN_LATENCY = float(os.getenv("RVO_STUB_LATENCY", "0.05"))
+LATENCY_SIGMA = float(os.getenv("RVO_STUB_LATENCY_SIGMA", "0.5"))
+ERROR_RATE = float(os.getenv("RVO_STUB_ERROR_RATE", "0"))
+RATE_LIMIT_RATE = float(os.getenv("RVO_STUB_RATE_LIMIT_RATE", "0"))
+HANG_RATE = float(os.getenv("RVO_STUB_HANG_RATE", "0"))
+# Seconds after submission until an application is under review
+REVIEW_DELAY = float(os.getenv("RVO_STUB_REVIEW_DELAY", "5"))
+
+rng = random.Random(int(os.getenv("RVO_STUB_SEED")) if os.getenv("RVO_STUB_SEED") else None)
+
+app = FastAPI(title="RVO API stub")
+app.add_middleware(TracingMiddleware)
+
+# Submissions by idempotency key and by application id, and what the stub has seen
+submissions: Dict[str, Dict[str, Any]] = {}
+applications: Dict[str, Dict[str, Any]] = {}
+stats = {"requests": 0, "errors": 0, "rateLimited": 0, "hung": 0, "duplicateSubmissions": 0, "notModified": 0}
+connections = set()
+requirements_file: Dict[str, Any] = {"mtime": None, "requirements": {}}
+
+
+def load_requirements() -> Dict[str, Any]:
+    """The requirements file, read again only after it has been modified"""
+    mtime = os.path.getmtime(REQUIREMENTS_PATH)
+    if mtime != requirements_file["mtime"]:
+        with open(REQUIREMENTS_PATH) as f:
+            requirements_file["requirements"] = json.load(f)
+        requirements_file["mtime"] = mtime
+    return requirements_file["requirements"]
+
+
+def catalog_response(request: Request, catalog: Dict[str, Any]) -> Response:
+    """Answer with the catalog and its validators, or 304 if the client's copy is current"""
+    body = json.dumps(catalog).encode()
+    etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+    last_modified = formatdate(int(requirements_file["mtime"]), usegmt=True)
+    headers = {"ETag": etag, "Last-Modified": last_modified, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("If-None-Match")
+    if_modified_since = request.headers.get("If-Modified-Since")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since
+        not_modified = etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+    elif if_modified_since is not None:
+        try:
+            not_modified = parsedate_to_datetime(if_modified_since).timestamp() >= int(requirements_file["mtime"])
+        except (TypeError, ValueError):
+            not_modified = False
+    else:
+        not_modified = False
+
+    if not_modified:
+        stats["notModified"] += 1
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@app.middleware("http")
+async def simulate(request: Request, call_next):
+    """Delay every API call and fail some of them"""
+    if not request.url.path.startswith("/dhi/"):
+        return await call_next(request)
+
+    stats["requests"] += 1
+    if request.client is not None:
+        connections.add((request.client.host, request.client.port))
+
+    roll = rng.random()
+    if roll < HANG_RATE:
+        stats["hung"] += 1
+        await asyncio.sleep(60)
+    elif roll < HANG_RATE + RATE_LIMIT_RATE:
+        stats["rateLimited"] += 1
+        return JSONResponse({"error": "Too many requests"}, status_code=429, headers={"Retry-After": "1"})
+    elif roll < HANG_RATE + RATE_LIMIT_RATE + ERROR_RATE:
+        stats["errors"] += 1
+        return JSONResponse({"error": "Service temporarily unavailable"}, status_code=503)
+
+    if MEDIAN_LATENCY > 0:
+        await asyncio.sleep(rng.lognormvariate(0, LATENCY_SIGMA) * MEDIAN_LATENCY)
+    return await call_next(request)
+
+
+@app.get("/dhi/requirements")
+async def get_requirements(request: Request):
+    requirements = load_requirements()
+    return catalog_response(request, {
+        "requirements": {
+            "requestedCredentials": requirements["requestedCredentials"],
+            "additionalInformation": []
+        },
+        "message": "Please provide the requested credentials to proceed with your DHI subsidy application."
+    })
+
+
+@app.get("/dhi/requirements/additional")
+async def get_additional_requirements(request: Request, requestedCredentials: str = ""):
+    requirements = load_requirements()
+    return catalog_response(request, {
+        "additionalInformation": requirements["additionalInformation"],
+        "message": "Additional information required to complete your DHI subsidy application."
+    })
+
+
+@app.post("/dhi/applications")
+async def submit_application(body: Dict[str, Any], idempotency_key: Optional[str] = Header(default=None)):
+    application_id = body.get("applicationId")
+    if not application_id or "attestation" not in body:
+        raise HTTPException(status_code=422, detail="applicationId and attestation are required")
+
+    # A retried submission with the same key gets the original answer
+    key = idempotency_key or application_id
+    if key in submissions:
+        stats["duplicateSubmissions"] += 1
+        return submissions[key]["response"]
+
+    response = {
+        "id": f"rvo_submission_{application_id}",
+        "documents": body.get("documents", []),
+        "submittedAt": datetime.now().isoformat(),
+        "status": "submitted",
+        "rvoReference": f"RVO-{application_id[:8].upper()}",
+        "message": "Application successfully submitted to RVO. You will receive confirmation within 5 business days."
+    }
+    submissions[key] = applications[application_id] = {"submittedAt": datetime.now(), "response": response}
+    return response
+
+
+@app.get("/dhi/applications/{application_id}/status")
+async def check_application_status(application_id: str):
+    submission = applications.get(application_id)
+    if submission is None:
+        raise HTTPException(status_code=404, detail="Application not found")
+
+    under_review = (datetime.now() - submission["submittedAt"]).total_seconds() >= REVIEW_DELAY
+    return {
+        "applicationId": application_id,
+        "status": "under_review" if under_review else "submitted",
+        "lastUpdated": datetime.now().isoformat(),
+        "message": "Your application is currently under review by RVO." if under_review
+        else "Your application has been received by RVO."
+    }
+
+
+@app.get("/stub/stats")
+async def get_stats():
+    """Requests and distinct client connections seen, to check pooling"""
+    return {**stats, "connections": len(connections), "submissions": len(submissions)}
@@ -1,13 +1,31 @@
 import os
 import json
-from typing import Dict, List, Any, Optional
-from langchain_openai import ChatOpenAI
+import copy
+import time
+from typing import Dict, List, Any, AsyncIterator, Optional, Tuple
 from langchain.schema import HumanMessage, SystemMessage
 from langchain.prompts import ChatPromptTemplate
 from langchain.chains import LLMChain
 from langchain.output_parsers import PydanticOutputParser
-from langchain.callbacks import StreamingStdOutCallbackHandler
 from pydantic import BaseModel, Field
+from services.cpu_executor import CPU_EXECUTOR
+from services.draft_cache import create_draft_cache, draft_cache_key, prompt_cache_key
+from services.draft_rules import FREE_TEXT_FIELDS, build_rule_draft
+from services.llm_provider import create_chat_model
+from services.metrics import AGENT_COMPLETION_TOKENS, AGENT_FALLBACKS, AGENT_LLM_SECONDS, AGENT_PROMPT_TOKENS, AGENT_SECONDS, timed
+from services.tracing import TRACER, traced
+from services.prompt_compaction import create_prompt_compactor
+from services.single_flight import SingleFlight
+
+# Bump whenever draft_prompt or ApplicationDraft changes, so cached drafts
+# generated with the old prompt are no longer used
+DRAFT_PROMPT_VERSION = "draft-v1"
+GUIDANCE_PROMPT_VERSION = "guidance-v1"
+UPDATE_PROMPT_VERSION = "update-v1"
+
+# rules: deterministic drafts only, hybrid: rules plus LLM guidance for
+# free-text fields, llm: the whole draft comes from the LLM
+DRAFT_MODES = ("rules", "hybrid", "llm")
 
 class ApplicationDraft(BaseModel):
     """Pydantic model for structured draft output"""
@@ -19,17 +37,23 @@ class ApplicationDraft(BaseModel):
 
 class AgentService:
     def __init__(self):
-        # Initialize LLM with streaming and better configuration
-        self.llm = ChatOpenAI(
-            model="gpt-4-1106-preview",  # GPT-4.1-mini equivalent
-            api_key=os.getenv("OPENAI_API_KEY"),
-            temperature=0.1,
-            streaming=True,
-            callbacks=[StreamingStdOutCallbackHandler()]
-        )
+        self.model_name = "gpt-4-1106-preview"  # GPT-4.1-mini equivalent
+        self.draft_mode = os.getenv("DRAFT_MODE", "hybrid").lower()
+        if self.draft_mode not in DRAFT_MODES:
+            raise ValueError(f"Unknown DRAFT_MODE: {self.draft_mode}")
+        
+        # Cache of LLM drafts keyed by a hash of the prompt inputs
+        self.draft_cache = create_draft_cache()
+        # Identical LLM calls in flight at the same time share one request
+        self.single_flight = SingleFlight()
+        # Credential summaries are limited to the requested fields and a
+        # token budget; prompt token counts are recorded per LLM call
+        self.prompt_compactor = create_prompt_compactor()
         
-        # Initialize output parser for structured responses
+        # Initialize output parser for structured responses; its format
+        # instructions never change, so render them once
         self.output_parser = PydanticOutputParser(pydantic_object=ApplicationDraft)
+        self.format_instructions = self.output_parser.get_format_instructions()
         
         self.draft_prompt = ChatPromptTemplate.from_messages([
             ("system", """You are an AI agent helping entrepreneurs apply for DHI subsidies. 
@@ -47,6 +71,18 @@ class AgentService:
             
             {format_instructions}"""),
             ("human", "Create a draft application using the provided data.")
+        ]).partial(format_instructions=self.format_instructions)
+        
+        self.guidance_prompt = ChatPromptTemplate.from_messages([
+            ("system", """You are an AI agent helping entrepreneurs apply for DHI subsidies.
+            Write short, concrete guidance that helps the entrepreneur fill in each of the
+            free-text fields below, tailored to their company.
+            
+            Company credentials: {available_credentials}
+            Fields: {fields}
+            
+            Return only a JSON object mapping each field name to its guidance."""),
+            ("human", "Write guidance for the listed fields.")
         ])
         
         self.update_prompt = ChatPromptTemplate.from_messages([
@@ -64,54 +100,359 @@ class AgentService:
             Return the updated draft as JSON."""),
             ("human", "Update the application draft with the new information.")
         ])
+        
+        # The LLM of the configured provider (openai or the offline fake) is
+        # created on first use, so the backend starts without an OpenAI key
+        # and rules mode never creates one
+        self._llm = None
+        self._chains: Dict[str, LLMChain] = {}
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            self.llm = create_chat_model(self.model_name)
+        return self._llm
+
+    @llm.setter
+    def llm(self, llm):
+        self._llm = llm
+        self._build_chains()
 
-    async def create_draft(self, application_id: str, available_credentials: List[Dict], additional_requirements: List[str]) -> Dict[str, Any]:
+    def _build_chains(self) -> None:
+        """Build the chains once; requests only pass their own variables"""
+        self._chains = {
+            "draft": LLMChain(llm=self._llm, prompt=self.draft_prompt, output_parser=self.output_parser),
+            "guidance": LLMChain(llm=self._llm, prompt=self.guidance_prompt),
+            "update": LLMChain(llm=self._llm, prompt=self.update_prompt)
+        }
+
+    def _chain(self, name: str) -> LLMChain:
+        if self._llm is None:
+            self.llm = create_chat_model(self.model_name)
+        return self._chains[name]
+
+    @property
+    def draft_chain(self) -> LLMChain:
+        return self._chain("draft")
+
+    @property
+    def guidance_chain(self) -> LLMChain:
+        return self._chain("guidance")
+
+    @property
+    def update_chain(self) -> LLMChain:
+        return self._chain("update")
+
+    @traced("AgentService.create_draft")
+    @timed(AGENT_SECONDS, "create_draft")
+    async def create_draft(self, application_id: str, available_credentials: List[Dict], additional_requirements: List[str], requested_fields: Optional[List[str]] = None) -> Dict[str, Any]:
         """Create AI-generated draft using available credentials and requirements"""
+        if self.draft_mode == "llm":
+            return await self._create_llm_draft(application_id, available_credentials, additional_requirements, requested_fields)
+        
+        # Fields, missing fields and template guidance are computed locally
+        generated = build_rule_draft(available_credentials, additional_requirements)
+        if self.draft_mode == "hybrid":
+            free_text_fields = [field for field in FREE_TEXT_FIELDS if field in generated["missingFields"]]
+            if free_text_fields:
+                generated["guidance"].update(await self._generate_guidance(available_credentials, free_text_fields, requested_fields))
+        
+        return self._build_draft(application_id, available_credentials, generated)
+
+    async def _generate_guidance(self, available_credentials: List[Dict], fields: List[str], requested_fields: Optional[List[str]] = None) -> Dict[str, str]:
+        """Ask the LLM for tailored guidance on free-text fields"""
+        try:
+            credentials_summary = self._summarize_credentials(available_credentials, requested_fields)
+            cache_key = draft_cache_key(credentials_summary, fields, GUIDANCE_PROMPT_VERSION, self.model_name)
+            cached = await self.draft_cache.get(cache_key)
+            if cached is not None:
+                return dict(cached)
+            
+            async def generate() -> Dict[str, str]:
+                response = await self._run_chain(
+                    "guidance",
+                    self.guidance_chain,
+                    available_credentials=credentials_summary,
+                    fields=fields
+                )
+                guidance = self._parse_guidance(response, fields)
+                await self.draft_cache.set(cache_key, guidance)
+                return guidance
+            
+            return dict(await self.single_flight.do(cache_key, generate))
+            
+        except Exception as e:
+            # Keep the template guidance
+            print(f"Error in _generate_guidance: {e}")
+            AGENT_FALLBACKS.inc("guidance")
+            return {}
+
+    async def _create_llm_draft(self, application_id: str, available_credentials: List[Dict], additional_requirements: List[str], requested_fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Create the whole draft with the LLM"""
         try:
             # Prepare data for LLM
-            credentials_summary = self._summarize_credentials(available_credentials)
-            
-            # Create chain with output parser
-            chain = LLMChain(
-                llm=self.llm, 
-                prompt=self.draft_prompt,
-                output_parser=self.output_parser
-            )
-            
-            # Generate draft with structured output
-            response = await chain.arun(
-                available_credentials=credentials_summary,
-                additional_requirements=additional_requirements,
-                format_instructions=self.output_parser.get_format_instructions()
-            )
-            
-            # Parse structured response
-            if isinstance(response, ApplicationDraft):
-                draft_data = response.dict()
-            else:
-                # Fallback to JSON parsing
-                draft_data = json.loads(str(response))
-            
-            # Add metadata
-            draft = {
-                "id": f"draft_{application_id}",
-                "applicationId": application_id,
-                "walletCredentials": available_credentials,
-                "additionalInformation": draft_data.get("additionalInformation", {}),
-                "missingFields": draft_data.get("missingFields", []),
-                "guidance": draft_data.get("guidance", {}),
-                "status": "draft",
-                "createdAt": "2024-01-01T00:00:00Z",
-                "updatedAt": "2024-01-01T00:00:00Z"
-            }
+            credentials_summary = self._summarize_credentials(available_credentials, requested_fields)
+            
+            # Identical inputs produce the same draft, so reuse an earlier one
+            cache_key = draft_cache_key(credentials_summary, additional_requirements, DRAFT_PROMPT_VERSION, self.model_name)
+            cached = await self.draft_cache.get(cache_key)
+            if cached is not None:
+                return self._build_draft(application_id, available_credentials, copy.deepcopy(cached))
             
-            return draft
+            async def generate() -> Dict[str, Any]:
+                # Generate draft with structured output
+                response = await self._run_chain(
+                    "draft",
+                    self.draft_chain,
+                    available_credentials=credentials_summary,
+                    additional_requirements=additional_requirements
+                )
+                generated = self._parse_draft_response(response)
+                await self.draft_cache.set(cache_key, generated)
+                return generated
+            
+            generated = await self.single_flight.do(cache_key, generate)
+            return self._build_draft(application_id, available_credentials, copy.deepcopy(generated))
             
         except Exception as e:
             print(f"Error in create_draft: {e}")
+            AGENT_FALLBACKS.inc("draft")
             # Fallback draft creation
             return self._create_fallback_draft(application_id, available_credentials, additional_requirements)
 
+    async def stream_draft(self, application_id: str, available_credentials: List[Dict], additional_requirements: List[str], requested_fields: Optional[List[str]] = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Create a draft like create_draft, yielding (event, data) pairs as it is generated.
+
+        Events are "token" for LLM output, "field" once a field's value or
+        guidance is known and finally "draft" with the complete draft.
+        """
+        credentials_summary = self._summarize_credentials(available_credentials, requested_fields)
+        
+        if self.draft_mode == "llm":
+            try:
+                cache_key = draft_cache_key(credentials_summary, additional_requirements, DRAFT_PROMPT_VERSION, self.model_name)
+                cached = await self.draft_cache.get(cache_key)
+                if cached is not None:
+                    generated = copy.deepcopy(cached)
+                else:
+                    messages = self.draft_prompt.format_messages(
+                        available_credentials=credentials_summary,
+                        additional_requirements=additional_requirements
+                    )
+                    # Not made active: the generator is suspended at every yield
+                    span = TRACER.begin("llm.draft.stream", "CLIENT", {"llm.model": self.model_name})
+                    span.set_attribute("llm.prompt_tokens", self._record_prompt_tokens("draft", messages))
+                    started = time.perf_counter()
+                    chunks = []
+                    try:
+                        async for chunk in self.llm.astream(messages):
+                            chunks.append(chunk.content)
+                            yield "token", {"text": chunk.content}
+                        AGENT_LLM_SECONDS.observe(time.perf_counter() - started, "draft")
+                        span.set_attribute("llm.completion_tokens", self._record_completion_tokens("draft", "".join(chunks)))
+                    except Exception as e:
+                        span.record_exception(e)
+                        raise
+                    finally:
+                        TRACER.end(span)
+                    
+                    generated = self._parse_draft_response(self.output_parser.parse("".join(chunks)))
+                    await self.draft_cache.set(cache_key, generated)
+                    generated = copy.deepcopy(generated)
+            except Exception as e:
+                print(f"Error in stream_draft: {e}")
+                AGENT_FALLBACKS.inc("draft")
+                fallback = self._create_fallback_draft(application_id, available_credentials, additional_requirements)
+                generated = {key: fallback[key] for key in ("additionalInformation", "missingFields", "guidance")}
+            
+            for event in self._field_events(generated, generated["missingFields"]):
+                yield event
+        else:
+            # Rule-based fields are sent before any LLM call
+            generated = build_rule_draft(available_credentials, additional_requirements)
+            for event in self._field_events(generated, additional_requirements):
+                yield event
+            
+            free_text_fields = [field for field in FREE_TEXT_FIELDS if field in generated["missingFields"]]
+            if self.draft_mode == "hybrid" and free_text_fields:
+                guidance = {}
+                try:
+                    cache_key = draft_cache_key(credentials_summary, free_text_fields, GUIDANCE_PROMPT_VERSION, self.model_name)
+                    cached = await self.draft_cache.get(cache_key)
+                    if cached is not None:
+                        guidance = dict(cached)
+                    else:
+                        messages = self.guidance_prompt.format_messages(
+                            available_credentials=credentials_summary,
+                            fields=free_text_fields
+                        )
+                        span = TRACER.begin("llm.guidance.stream", "CLIENT", {"llm.model": self.model_name})
+                        span.set_attribute("llm.prompt_tokens", self._record_prompt_tokens("guidance", messages))
+                        started = time.perf_counter()
+                        chunks = []
+                        try:
+                            async for chunk in self.llm.astream(messages):
+                                chunks.append(chunk.content)
+                                yield "token", {"text": chunk.content}
+                            AGENT_LLM_SECONDS.observe(time.perf_counter() - started, "guidance")
+                            span.set_attribute("llm.completion_tokens", self._record_completion_tokens("guidance", "".join(chunks)))
+                        except Exception as e:
+                            span.record_exception(e)
+                            raise
+                        finally:
+                            TRACER.end(span)
+                        
+                        guidance = self._parse_guidance("".join(chunks), free_text_fields)
+                        await self.draft_cache.set(cache_key, guidance)
+                except Exception as e:
+                    # Keep the template guidance
+                    print(f"Error in stream_draft: {e}")
+                    AGENT_FALLBACKS.inc("guidance")
+                
+                generated["guidance"].update(guidance)
+                for event in self._field_events(generated, list(guidance)):
+                    yield event
+        
+        yield "draft", self._build_draft(application_id, available_credentials, generated)
+
+    async def create_drafts_batch(self, items: List[Dict[str, Any]], max_concurrency: int = 8) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Create drafts for many applications, yielding (application_id, draft) as each completes.
+
+        Each item has applicationId, availableCredentials,
+        additionalRequirements and optionally requestedCredentials. Items
+        with identical prompt inputs share one LLM call, and the remaining
+        calls go through the chain's batch path with at most max_concurrency
+        requests in flight.
+        """
+        groups: Dict[str, List[Tuple[str, List[Dict], List[str], Optional[Dict[str, Any]]]]] = {}
+        chain_inputs: Dict[str, Dict[str, Any]] = {}
+
+        for item in items:
+            application_id = item["applicationId"]
+            available_credentials = item["availableCredentials"]
+            additional_requirements = item["additionalRequirements"]
+
+            if self.draft_mode == "llm":
+                generated = None
+                prompt_version, fields = DRAFT_PROMPT_VERSION, additional_requirements
+            else:
+                generated = build_rule_draft(available_credentials, additional_requirements)
+                prompt_version = GUIDANCE_PROMPT_VERSION
+                fields = [field for field in FREE_TEXT_FIELDS if field in generated["missingFields"]]
+                if self.draft_mode == "rules" or not fields:
+                    yield application_id, self._build_draft(application_id, available_credentials, generated)
+                    continue
+
+            credentials_summary = self._summarize_credentials(available_credentials, item.get("requestedCredentials"))
+            cache_key = draft_cache_key(credentials_summary, fields, prompt_version, self.model_name)
+            entry = (application_id, available_credentials, additional_requirements, generated)
+            if cache_key in groups:
+                groups[cache_key].append(entry)
+                continue
+
+            cached = await self.draft_cache.get(cache_key)
+            if cached is not None:
+                yield application_id, self._complete_batch_draft(entry, cached)
+                continue
+
+            groups[cache_key] = [entry]
+            if self.draft_mode == "llm":
+                chain_inputs[cache_key] = {"available_credentials": credentials_summary, "additional_requirements": fields}
+            else:
+                chain_inputs[cache_key] = {"available_credentials": credentials_summary, "fields": fields}
+
+        if not chain_inputs:
+            return
+
+        name = "draft" if self.draft_mode == "llm" else "guidance"
+        keys = list(chain_inputs)
+        try:
+            chain = self.draft_chain if self.draft_mode == "llm" else self.guidance_chain
+        except Exception as e:
+            # No LLM, e.g. no OpenAI key: every remaining draft falls back
+            print(f"Error in create_drafts_batch: {e}")
+            for key in keys:
+                AGENT_FALLBACKS.inc(name, amount=len(groups[key]))
+                for entry in groups[key]:
+                    yield entry[0], self._complete_batch_draft(entry, None)
+            return
+        for key in keys:
+            self._record_prompt_tokens(name, chain.prompt, **chain_inputs[key])
+        # Batched calls are timed from the start of the batch, so the
+        # duration includes waiting for a max_concurrency slot
+        started = time.perf_counter()
+        span = TRACER.begin(f"llm.{name}.batch", "CLIENT", {"llm.model": self.model_name, "llm.calls": len(keys)})
+        try:
+            async for index, output in chain.abatch_as_completed(
+                [chain_inputs[key] for key in keys],
+                config={"max_concurrency": max_concurrency},
+                return_exceptions=True
+            ):
+                cache_key = keys[index]
+                result = None
+                try:
+                    if isinstance(output, Exception):
+                        raise output
+                    AGENT_LLM_SECONDS.observe(time.perf_counter() - started, f"{name}_batch")
+                    self._record_completion_tokens(name, output["text"])
+                    if self.draft_mode == "llm":
+                        result = self._parse_draft_response(output["text"])
+                    else:
+                        result = self._parse_guidance(output["text"], chain_inputs[cache_key]["fields"])
+                    await self.draft_cache.set(cache_key, result)
+                except Exception as e:
+                    print(f"Error in create_drafts_batch: {e}")
+                    AGENT_FALLBACKS.inc(name, amount=len(groups[cache_key]))
+                    span.set_attribute("llm.failed_calls", span.attributes.get("llm.failed_calls", 0) + 1)
+
+                for entry in groups[cache_key]:
+                    yield entry[0], self._complete_batch_draft(entry, result)
+        finally:
+            TRACER.end(span)
+
+    def _complete_batch_draft(self, entry: Tuple[str, List[Dict], List[str], Optional[Dict[str, Any]]], result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build one batch draft from a shared LLM result, or None if the call failed"""
+        application_id, available_credentials, additional_requirements, generated = entry
+        if self.draft_mode == "llm":
+            if result is None:
+                return self._create_fallback_draft(application_id, available_credentials, additional_requirements)
+            return self._build_draft(application_id, available_credentials, copy.deepcopy(result))
+
+        # Hybrid: keep the template guidance when the call failed
+        generated["guidance"].update(result or {})
+        return self._build_draft(application_id, available_credentials, generated)
+
+    def _field_events(self, generated: Dict[str, Any], fields: List[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Build "field" events for the given fields of generated draft content"""
+        events = []
+        for field in fields:
+            if field in generated["additionalInformation"]:
+                events.append(("field", {"field": field, "value": generated["additionalInformation"][field]}))
+            else:
+                events.append(("field", {"field": field, "missing": True, "guidance": generated["guidance"].get(field, "")}))
+        return events
+
+    def _parse_draft_response(self, response: Any) -> Dict[str, Any]:
+        """Extract draft content from the LLM response"""
+        # Parse structured response
+        if isinstance(response, ApplicationDraft):
+            draft_data = response.dict()
+        else:
+            # Fallback to JSON parsing
+            draft_data = json.loads(str(response))
+        
+        return {
+            "additionalInformation": draft_data.get("additionalInformation", {}),
+            "missingFields": draft_data.get("missingFields", []),
+            "guidance": draft_data.get("guidance", {})
+        }
+
+    def _parse_guidance(self, response: str, fields: List[str]) -> Dict[str, str]:
+        """Extract guidance for the requested fields from the LLM response"""
+        return {field: str(text) for field, text in json.loads(response).items() if field in fields}
+
+    @traced("AgentService.update_draft")
+    @timed(AGENT_SECONDS, "update_draft")
     async def update_draft(self, application_id: str, additional_information: Dict[str, Any]) -> Dict[str, Any]:
         """Update draft with entrepreneur-provided information"""
         try:
@@ -122,17 +463,20 @@ class AgentService:
                 "missingFields": []
             }
             
-            # Create chain
-            chain = LLMChain(llm=self.llm, prompt=self.update_prompt)
+            variables = {
+                "current_draft": json.dumps(current_draft),
+                "new_information": await CPU_EXECUTOR.dumps(additional_information)
+            }
             
-            # Update draft
-            response = await chain.arun(
-                current_draft=json.dumps(current_draft),
-                new_information=json.dumps(additional_information)
-            )
+            async def generate() -> Dict[str, Any]:
+                # Update draft
+                response = await self._run_chain("update", self.update_chain, **variables)
+                return json.loads(response)
             
-            # Parse and return updated draft
-            updated_draft = json.loads(response)
+            # Parse and return updated draft; coalesced callers share the
+            # parsed response, so each one gets its own copy
+            flight_key = prompt_cache_key(UPDATE_PROMPT_VERSION, self.model_name, **variables)
+            updated_draft = copy.deepcopy(await self.single_flight.do(flight_key, generate))
             updated_draft["id"] = f"draft_{application_id}"
             updated_draft["applicationId"] = application_id
             updated_draft["status"] = "complete"
@@ -142,16 +486,50 @@ class AgentService:
             
         except Exception as e:
             # Fallback update
+            AGENT_FALLBACKS.inc("update")
             return self._create_fallback_update(application_id, additional_information)
 
-    def _summarize_credentials(self, credentials: List[Dict]) -> str:
-        """Summarize credentials for LLM processing"""
-        summary = []
-        for cred in credentials:
-            cred_type = cred.get("type", "Unknown")
-            subject = cred.get("credentialSubject", {})
-            summary.append(f"{cred_type}: {json.dumps(subject, indent=2)}")
-        return "\n".join(summary)
+    def _build_draft(self, application_id: str, available_credentials: List[Dict], generated: Dict[str, Any]) -> Dict[str, Any]:
+        """Add application metadata to generated draft content"""
+        return {
+            "id": f"draft_{application_id}",
+            "applicationId": application_id,
+            "walletCredentials": available_credentials,
+            "additionalInformation": generated["additionalInformation"],
+            "missingFields": generated["missingFields"],
+            "guidance": generated["guidance"],
+            "status": "draft",
+            "createdAt": "2024-01-01T00:00:00Z",
+            "updatedAt": "2024-01-01T00:00:00Z"
+        }
+
+    def _summarize_credentials(self, credentials: List[Dict], requested_fields: Optional[List[str]] = None) -> str:
+        """Summarize credentials for LLM processing, keeping only the requested fields"""
+        return self.prompt_compactor.summarize(credentials, requested_fields)
+
+    async def _run_chain(self, name: str, chain: LLMChain, **variables: Any) -> Any:
+        """Run a chain in an LLM span, recording its prompt tokens, LLM time and completion tokens"""
+        with TRACER.start_span(f"llm.{name}", "CLIENT", {"llm.model": self.model_name}) as span:
+            span.set_attribute("llm.prompt_tokens", self._record_prompt_tokens(name, chain.prompt, **variables))
+            started = time.perf_counter()
+            response = await chain.arun(**variables)
+            AGENT_LLM_SECONDS.observe(time.perf_counter() - started, name)
+            span.set_attribute("llm.completion_tokens", self._record_completion_tokens(name, response))
+            return response
+
+    def _record_prompt_tokens(self, name: str, prompt: Any, **variables: Any) -> int:
+        """Count the tokens of a prompt (template and variables, or formatted messages) about to be sent"""
+        messages = prompt.format_messages(**variables) if variables else prompt
+        prompt_tokens = self.prompt_compactor.count_tokens("\n".join(str(message.content) for message in messages))
+        AGENT_PROMPT_TOKENS.observe(prompt_tokens, name)
+        return prompt_tokens
+
+    def _record_completion_tokens(self, name: str, response: Any) -> int:
+        """Count the tokens of an LLM response, parsed or not"""
+        text = json.dumps(response.dict()) if isinstance(response, BaseModel) else str(response)
+        completion_tokens = self.prompt_compactor.count_tokens(text)
+        AGENT_COMPLETION_TOKENS.observe(completion_tokens, name)
+        return completion_tokens
 
     def _create_fallback_draft(self, application_id: str, available_credentials: List[Dict], additional_requirements: List[str]) -> Dict[str, Any]:
         """Create a fallback draft when LLM fails"""
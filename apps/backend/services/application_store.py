@@ -0,0 +1,389 @@
+import bisect
+import itertools
+import json
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Any, Callable, Optional
+
+from services.sqlite_db import SqliteDatabase
+
+
+class RecentApplicationsIndex:
+    """Bounded recency index of application ids, globally and per entrepreneur.
+
+    Each buffer holds at most `capacity` ids ordered by their last write. A
+    write moves the id to the front and the oldest id drops off the end, so
+    both updates and reads of the latest `limit` ids are O(1) in the number
+    of stored applications.
+    """
+
+    def __init__(self, capacity: int = 50):
+        self.capacity = capacity
+        self._global: OrderedDict = OrderedDict()
+        self._by_entrepreneur: Dict[str, OrderedDict] = {}
+
+    def touch(self, application_id: str, entrepreneur_id: str, create: bool = True) -> None:
+        """Mark an application as the most recently written one.
+
+        With create=False the entrepreneur buffer is only updated if it
+        already exists, so a partial buffer never hides older applications
+        that have not been loaded yet.
+        """
+        self._push(self._global, application_id)
+        if create or entrepreneur_id in self._by_entrepreneur:
+            self._push(self._by_entrepreneur.setdefault(entrepreneur_id, OrderedDict()), application_id)
+
+    def seed(self, entrepreneur_id: str, application_ids: List[str]) -> None:
+        """Fill an entrepreneur buffer with stored ids, oldest first, leaving the global buffer alone.
+
+        Ids already in the buffer were written since, so they stay newest.
+        """
+        ids = OrderedDict.fromkeys(application_ids)
+        for application_id in self._by_entrepreneur.get(entrepreneur_id, ()):
+            self._push(ids, application_id)
+        while len(ids) > self.capacity:
+            ids.popitem(last=False)
+        self._by_entrepreneur[entrepreneur_id] = ids
+
+    def latest(self, limit: int, entrepreneur_id: Optional[str] = None) -> List[str]:
+        """Get up to `limit` application ids, most recently written first"""
+        ids = self._global if entrepreneur_id is None else self._by_entrepreneur.get(entrepreneur_id)
+        if not ids:
+            return []
+        return list(itertools.islice(reversed(ids), limit))
+
+    def knows(self, entrepreneur_id: str) -> bool:
+        """Check whether a buffer exists for the entrepreneur"""
+        return entrepreneur_id in self._by_entrepreneur
+
+    def _push(self, ids: OrderedDict, application_id: str) -> None:
+        ids[application_id] = None
+        ids.move_to_end(application_id)
+        if len(ids) > self.capacity:
+            ids.popitem(last=False)
+
+
+class ApplicationStore(ABC):
+    """Base class for application storage backends.
+
+    Records are plain dicts as built by the API endpoints. Every backend keeps
+    secondary indexes on entrepreneurId, status and createdAt, applies
+    updates to a single record atomically and records every write in a
+    RecentApplicationsIndex. Writes that change a status are passed to the
+    status listeners, with the previous status (None for a new record).
+    """
+
+    def __init__(self, recent_capacity: int = 50):
+        self.recent = RecentApplicationsIndex(recent_capacity)
+        self.status_listeners: List[Callable[[Dict[str, Any], Optional[str]], None]] = []
+        self._status_counts: Optional[Dict[str, int]] = None
+        self._status_counts_at = 0.0
+
+    @abstractmethod
+    async def create(self, application: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a new application record"""
+
+    @abstractmethod
+    async def get(self, application_id: str) -> Optional[Dict[str, Any]]:
+        """Get an application by id, or None if it does not exist"""
+
+    @abstractmethod
+    async def update(self, application_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Atomically merge changes into an application and return the new record"""
+
+    @abstractmethod
+    async def list_by_entrepreneur(self, entrepreneur_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get applications of one entrepreneur, newest first"""
+
+    @abstractmethod
+    async def list_by_status(self, status: str, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """Get applications with the given status, newest first, skipping the first `offset`"""
+
+    @abstractmethod
+    async def list_created_between(self, start: str, end: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get applications with start <= createdAt < end, oldest first"""
+
+    async def list_recent(self, limit: int, entrepreneur_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get the most recently written applications, newest first"""
+        if entrepreneur_id is not None and not self.recent.knows(entrepreneur_id):
+            # First request for this entrepreneur in this process: warm the
+            # buffer once from the entrepreneur index
+            applications = await self.list_by_entrepreneur(entrepreneur_id, self.recent.capacity)
+            self.recent.seed(entrepreneur_id, [application["id"] for application in reversed(applications)])
+
+        applications = []
+        for application_id in self.recent.latest(limit, entrepreneur_id):
+            application = await self.get(application_id)
+            if application is not None:
+                applications.append(application)
+        return applications
+
+    @abstractmethod
+    async def count_by_status(self) -> Dict[str, int]:
+        """Get the number of applications per status"""
+
+    async def count_by_status_cached(self, max_age: float) -> Dict[str, int]:
+        """Like count_by_status, but reuse counts up to max_age seconds old"""
+        now = time.monotonic()
+        if self._status_counts is None or now - self._status_counts_at >= max_age:
+            self._status_counts = await self.count_by_status()
+            self._status_counts_at = now
+        return self._status_counts
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Get the total number of applications"""
+
+    async def open(self) -> None:
+        """Open backend resources; called from the application lifespan"""
+        return None
+
+    async def close(self) -> None:
+        """Release backend resources"""
+        return None
+
+    def _status_written(self, record: Dict[str, Any], previous_status: Optional[str]) -> None:
+        if record["status"] == previous_status:
+            return
+        for listener in self.status_listeners:
+            try:
+                listener(record, previous_status)
+            except Exception as e:
+                print(f"Error in application status listener: {e}")
+
+    def _check_changes(self, changes: Dict[str, Any]) -> None:
+        for field in ("id", "entrepreneurId", "createdAt"):
+            if field in changes:
+                raise ValueError(f"Application field '{field}' cannot be updated")
+
+
+class InMemoryApplicationStore(ApplicationStore):
+    """Process-local store, used for demos and tests"""
+
+    def __init__(self, recent_capacity: int = 50):
+        super().__init__(recent_capacity)
+        self._records: Dict[str, Dict[str, Any]] = {}
+        # Index values are insertion-ordered dicts used as ordered sets
+        self._by_entrepreneur: Dict[str, Dict[str, None]] = {}
+        self._by_status: Dict[str, Dict[str, None]] = {}
+        self._by_created: List[tuple] = []
+
+    async def create(self, application: Dict[str, Any]) -> Dict[str, Any]:
+        application_id = application["id"]
+        if application_id in self._records:
+            raise ValueError(f"Application {application_id} already exists")
+
+        record = dict(application)
+        self._records[application_id] = record
+        self._by_entrepreneur.setdefault(record["entrepreneurId"], {})[application_id] = None
+        self._by_status.setdefault(record["status"], {})[application_id] = None
+
+        # createdAt is almost always increasing, so this is normally an append
+        key = (record["createdAt"], application_id)
+        if not self._by_created or self._by_created[-1] <= key:
+            self._by_created.append(key)
+        else:
+            bisect.insort(self._by_created, key)
+
+        self.recent.touch(application_id, record["entrepreneurId"])
+        self._status_written(record, None)
+        return dict(record)
+
+    async def get(self, application_id: str) -> Optional[Dict[str, Any]]:
+        record = self._records.get(application_id)
+        return dict(record) if record is not None else None
+
+    async def update(self, application_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        self._check_changes(changes)
+        record = self._records.get(application_id)
+        if record is None:
+            return None
+
+        # No awaits below, so the update cannot interleave with another coroutine
+        old_status = record["status"]
+        updated = {**record, **changes}
+        self._records[application_id] = updated
+
+        if updated["status"] != old_status:
+            old_ids = self._by_status.get(old_status)
+            if old_ids is not None:
+                old_ids.pop(application_id, None)
+                if not old_ids:
+                    del self._by_status[old_status]
+            self._by_status.setdefault(updated["status"], {})[application_id] = None
+
+        self.recent.touch(application_id, updated["entrepreneurId"])
+        self._status_written(updated, old_status)
+        return dict(updated)
+
+    async def list_by_entrepreneur(self, entrepreneur_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return self._newest(self._by_entrepreneur.get(entrepreneur_id, {}), limit)
+
+    async def list_by_status(self, status: str, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        return self._newest(self._by_status.get(status, {}), limit, offset)
+
+    async def list_created_between(self, start: str, end: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        lo = bisect.bisect_left(self._by_created, (start,))
+        hi = bisect.bisect_left(self._by_created, (end,))
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return [dict(self._records[application_id]) for _, application_id in self._by_created[lo:hi]]
+
+    async def count_by_status(self) -> Dict[str, int]:
+        return {status: len(ids) for status, ids in self._by_status.items()}
+
+    async def count(self) -> int:
+        return len(self._records)
+
+    def _newest(self, ids: Dict[str, None], limit: Optional[int], offset: int = 0) -> List[Dict[str, Any]]:
+        result = []
+        for application_id in itertools.islice(reversed(ids), offset, None):
+            if limit is not None and len(result) >= limit:
+                break
+            result.append(dict(self._records[application_id]))
+        return result
+
+
+class SqliteApplicationStore(ApplicationStore):
+    """SQLite store in WAL mode, shared by all uvicorn workers on one host.
+
+    The database is opened by open(), from the application lifespan, and
+    queried on its own thread (see SqliteDatabase). The recency index is
+    per process: it is seeded from the newest rows when the store opens and
+    per entrepreneur on first use, then follows this worker's writes.
+    """
+
+    def __init__(self, db_path: str = "data/applications.db", recent_capacity: int = 50):
+        super().__init__(recent_capacity)
+        self.db_path = db_path
+        self._db = SqliteDatabase(db_path, "application-store")
+
+    async def open(self) -> None:
+        """Open the database, creating it if needed, and seed the recency index"""
+        if self._db.is_open:
+            return
+        rows = await self._db.open(self._setup)
+        for application_id, entrepreneur_id in reversed(rows):
+            self.recent.touch(application_id, entrepreneur_id, create=False)
+
+    def _setup(self, conn: sqlite3.Connection) -> List[tuple]:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS applications (
+                id TEXT PRIMARY KEY,
+                entrepreneur_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                data TEXT NOT NULL
+            )
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_applications_entrepreneur ON applications (entrepreneur_id, created_at)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_applications_status ON applications (status, created_at)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_applications_created ON applications (created_at)"
+        )
+        return conn.execute(
+            "SELECT id, entrepreneur_id FROM applications ORDER BY created_at DESC LIMIT ?",
+            (self.recent.capacity,)
+        ).fetchall()
+
+    async def create(self, application: Dict[str, Any]) -> Dict[str, Any]:
+        record = dict(application)
+        await self._db.run(self._insert, record)
+        self.recent.touch(record["id"], record["entrepreneurId"], create=False)
+        self._status_written(record, None)
+        return record
+
+    def _insert(self, record: Dict[str, Any]) -> None:
+        try:
+            self._db.execute(
+                "INSERT INTO applications (id, entrepreneur_id, status, created_at, data) VALUES (?, ?, ?, ?, ?)",
+                (record["id"], record["entrepreneurId"], record["status"], record["createdAt"], json.dumps(record))
+            )
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Application {record['id']} already exists")
+
+    async def get(self, application_id: str) -> Optional[Dict[str, Any]]:
+        rows = await self._db.run(self._query, "SELECT data FROM applications WHERE id = ?", (application_id,))
+        return rows[0] if rows else None
+
+    async def update(self, application_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        self._check_changes(changes)
+        # One transaction, so the read-modify-write is atomic across worker processes
+        result = await self._db.run(self._db.transaction, lambda conn: self._update(conn, application_id, changes))
+        if result is None:
+            return None
+
+        current, updated = result
+        self.recent.touch(application_id, updated["entrepreneurId"], create=False)
+        self._status_written(updated, current["status"])
+        return updated
+
+    def _update(self, conn: sqlite3.Connection, application_id: str, changes: Dict[str, Any]) -> Optional[tuple]:
+        row = conn.execute("SELECT data FROM applications WHERE id = ?", (application_id,)).fetchone()
+        if row is None:
+            return None
+
+        current = json.loads(row[0])
+        updated = {**current, **changes}
+        conn.execute(
+            "UPDATE applications SET status = ?, data = ? WHERE id = ?",
+            (updated["status"], json.dumps(updated), application_id)
+        )
+        return current, updated
+
+    async def list_by_entrepreneur(self, entrepreneur_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return await self._db.run(
+            self._query,
+            "SELECT data FROM applications WHERE entrepreneur_id = ? ORDER BY created_at DESC LIMIT ?",
+            (entrepreneur_id, self._limit(limit))
+        )
+
+    async def list_by_status(self, status: str, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        return await self._db.run(
+            self._query,
+            "SELECT data FROM applications WHERE status = ? ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            (status, self._limit(limit), offset)
+        )
+
+    async def list_created_between(self, start: str, end: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return await self._db.run(
+            self._query,
+            "SELECT data FROM applications WHERE created_at >= ? AND created_at < ? ORDER BY created_at LIMIT ?",
+            (start, end, self._limit(limit))
+        )
+
+    async def count_by_status(self) -> Dict[str, int]:
+        rows = await self._db.run(self._db.fetch, "SELECT status, COUNT(*) FROM applications GROUP BY status")
+        return {status: count for status, count in rows}
+
+    async def count(self) -> int:
+        rows = await self._db.run(self._db.fetch, "SELECT COUNT(*) FROM applications")
+        return rows[0][0]
+
+    async def close(self) -> None:
+        await self._db.close()
+
+    def _query(self, sql: str, params: tuple) -> List[Dict[str, Any]]:
+        return [json.loads(row[0]) for row in self._db.fetch(sql, params)]
+
+    def _limit(self, limit: Optional[int]) -> int:
+        # SQLite treats a negative LIMIT as "no limit"
+        return -1 if limit is None else limit
+
+
+def create_application_store() -> ApplicationStore:
+    """Create the application store configured by APPLICATION_STORE"""
+    backend = os.getenv("APPLICATION_STORE", "memory").lower()
+    recent_capacity = int(os.getenv("RECENT_APPLICATIONS_CAPACITY", "50"))
+    if backend == "memory":
+        return InMemoryApplicationStore(recent_capacity)
+    if backend == "sqlite":
+        return SqliteApplicationStore(os.getenv("APPLICATION_DB_PATH", "data/applications.db"), recent_capacity)
+    raise ValueError(f"Unknown APPLICATION_STORE backend: {backend}")
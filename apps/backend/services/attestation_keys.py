@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from services.paths import backend_path
+
+# JWS algorithm of the keys in the key set
+SIGNING_ALGORITHM = "EdDSA"
+
+
+def key_id(public_key: Any) -> str:
+    """Stable key id: the start of the SHA-256 of the raw public key"""
+    raw = public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+class KeySet:
+    """Ed25519 attestation keys in a local directory, one `<kid>.pem` per key.
+
+    Keys are loaded once and kept in memory, by the application lifespan or
+    else on first use. A relative `key_dir` is taken from the backend
+    directory. The signing key is the one named by `signing_kid`, else the
+    newest file; a key is generated when the directory is empty. An unknown
+    kid reloads the directory off the event loop, at most once per
+    `reload_interval` seconds, so rotated keys are picked up.
+    """
+
+    def __init__(self, key_dir: str = "data/keys", signing_kid: Optional[str] = None, reload_interval: float = 30):
+        self.key_dir = backend_path(key_dir)
+        self.signing_kid = signing_kid
+        self.reload_interval = reload_interval
+        self._private_pems: Dict[str, bytes] = {}
+        self._public_pems: Dict[str, bytes] = {}
+        self._active_kid: Optional[str] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        private_keys, private_pems, public_pems, modified = {}, {}, {}, {}
+        if self.key_dir.exists():
+            for path in self.key_dir.glob("*.pem"):
+                try:
+                    pem = path.read_bytes()
+                    private_key = serialization.load_pem_private_key(pem, password=None)
+                except (ValueError, TypeError) as e:
+                    print(f"Error loading attestation key {path}: {e}")
+                    continue
+                kid = path.stem
+                private_keys[kid] = private_key
+                private_pems[kid] = pem
+                public_pems[kid] = private_key.public_key().public_bytes(
+                    serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+                )
+                modified[kid] = path.stat().st_mtime
+
+        if not private_keys:
+            kid, private_key, pem = self._generate()
+            private_keys[kid] = private_key
+            private_pems[kid] = pem
+            public_pems[kid] = private_key.public_key().public_bytes(
+                serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+            )
+            modified[kid] = time.time()
+
+        if self.signing_kid and self.signing_kid not in private_keys:
+            raise ValueError(f"Unknown ATTESTATION_KEY_ID: {self.signing_kid}")
+
+        self._private_pems = private_pems
+        self._public_pems = public_pems
+        self._active_kid = self.signing_kid or max(modified, key=modified.get)
+        self._loaded_at = time.monotonic()
+
+    def _generate(self) -> Tuple[str, Any, bytes]:
+        private_key = Ed25519PrivateKey.generate()
+        kid = key_id(private_key.public_key())
+        self.key_dir.mkdir(parents=True, exist_ok=True)
+        pem = private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+        # Created owner-only, so the key is never readable by others, not even briefly
+        fd = os.open(self.key_dir / f"{kid}.pem", os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(pem)
+        return kid, private_key, pem
+
+    def ensure_loaded(self) -> None:
+        """Load the keys, generating the first one if there is none"""
+        if self._active_kid is None:
+            with self._lock:
+                if self._active_kid is None:
+                    self._load()
+
+    def signing_pem(self) -> Tuple[str, bytes]:
+        """The kid and PEM private key new proofs are signed with; PEM so it can be passed to worker processes"""
+        self.ensure_loaded()
+        return self._active_kid, self._private_pems[self._active_kid]
+
+    async def public_pems(self, required_kids: Tuple[str, ...] = ()) -> Dict[str, bytes]:
+        """Public keys by kid in PEM; reloads the directory if a required kid is missing"""
+        loop = asyncio.get_running_loop()
+        if self._active_kid is None:
+            await loop.run_in_executor(None, self.ensure_loaded)
+        if any(kid not in self._public_pems for kid in required_kids):
+            if time.monotonic() - self._loaded_at >= self.reload_interval:
+                # Claimed before the reload, so requests with unknown kids
+                # arriving meanwhile do not start reloads of their own
+                self._loaded_at = time.monotonic()
+                await loop.run_in_executor(None, self._reload)
+        return self._public_pems
+
+    def _reload(self) -> None:
+        with self._lock:
+            self._load()
+
+
+def create_key_set() -> KeySet:
+    """Create the attestation key set configured by ATTESTATION_KEY_DIR and ATTESTATION_KEY_ID"""
+    return KeySet(
+        key_dir=os.getenv("ATTESTATION_KEY_DIR", "data/keys"),
+        signing_kid=os.getenv("ATTESTATION_KEY_ID") or None,
+        reload_interval=float(os.getenv("ATTESTATION_KEY_RELOAD_INTERVAL", "30"))
+    )
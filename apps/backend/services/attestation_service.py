@@ -1,23 +1,189 @@
+import asyncio
 import json
+import math
+import multiprocessing
+import os
+import threading
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import jwt
 from jose import jws
 import hashlib
 import base64
+import time
+from cryptography.hazmat.primitives import serialization
+from services.attestation_keys import SIGNING_ALGORITHM, create_key_set
+from services.cpu_executor import CPU_EXECUTOR
+from services.metrics import ATTESTATION_SECONDS, ATTESTATION_SIGNING_SECONDS, ATTESTATION_VERIFY_CACHE, timed
+from services.tracing import TRACER, traced
+
+# embedded puts the credential subject in the JWT payload; detached signs a
+# digest of its canonical JSON and leaves the payload out of the proof
+PROOF_MODES = ("embedded", "detached")
+
+# How long an attestation, and the proof over it, stays valid
+ATTESTATION_VALIDITY = timedelta(days=365)
+
+
+def canonical_json(value: Any) -> bytes:
+    """Serialise to one stable byte string: sorted keys, no whitespace, UTF-8"""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def subject_digest(credential_subject: Dict[str, Any]) -> str:
+    """Base64url SHA-256 digest of the canonical JSON of a credential subject"""
+    digest = hashlib.sha256(canonical_json(credential_subject)).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def verification_key(token: str, digest: str, subject: str) -> str:
+    """Cache key of a verification: the proof token together with the attestation it must match"""
+    return hashlib.sha256(f"{token}.{subject}.{digest}".encode("utf-8")).hexdigest()
+
+
+# Keys deserialised once per process, by PEM
+_private_keys: Dict[bytes, Any] = {}
+_public_keys: Dict[bytes, Any] = {}
+
+
+def _load_private_key(pem: bytes) -> Any:
+    key = _private_keys.get(pem)
+    if key is None:
+        key = _private_keys[pem] = serialization.load_pem_private_key(pem, password=None)
+    return key
+
+
+def _load_public_key(pem: bytes) -> Any:
+    key = _public_keys.get(pem)
+    if key is None:
+        key = _public_keys[pem] = serialization.load_pem_public_key(pem)
+    return key
+
+
+def sign_embedded(payload: Dict[str, Any], private_pem: bytes, kid: str) -> str:
+    """Sign claims, credential subject included, as a JWT"""
+    return jwt.encode(payload, _load_private_key(private_pem), algorithm=SIGNING_ALGORITHM, headers={"kid": kid})
+
+
+def sign_detached(credential_subject: Dict[str, Any], private_pem: bytes, headers: Dict[str, Any]) -> str:
+    """Sign the subject digest as a detached, unencoded JWS payload"""
+    payload = subject_digest(credential_subject).encode("ascii")
+    return jwt.api_jws.encode(payload, _load_private_key(private_pem), algorithm=SIGNING_ALGORITHM, headers=headers, is_payload_detached=True)
+
+
+def _subject_digests(credential_subjects: List[Dict[str, Any]]) -> List[str]:
+    return [subject_digest(credential_subject) for credential_subject in credential_subjects]
+
+
+def _token_kid(token: str) -> Optional[str]:
+    try:
+        return jwt.get_unverified_header(token).get("kid")
+    except jwt.InvalidTokenError:
+        return None
+
+
+def verify_proof(token: str, digest: str, subject: str, issuer: str, public_pems: Dict[str, bytes]) -> Tuple[bool, Optional[int], str]:
+    """Verify a proof token against the credential subject digest, attestation id and issuer.
+
+    Returns (valid, expiry as a unix timestamp, error). Embedded proofs must
+    carry a credential subject with the same digest; detached proofs are
+    checked with the digest as their payload. Either way `sub` must name
+    the attestation and `iss` the issuer.
+    """
+    try:
+        header = jwt.get_unverified_header(token)
+    except jwt.InvalidTokenError as e:
+        return False, None, f"Malformed proof: {e}"
+
+    pem = public_pems.get(header.get("kid"))
+    if pem is None:
+        return False, None, f"Unknown key id: {header.get('kid')}"
+
+    try:
+        key = _load_public_key(pem)
+        if header.get("b64") is False:
+            jwt.api_jws.decode_complete(token, key, algorithms=[SIGNING_ALGORITHM], detached_payload=digest.encode("ascii"))
+            claims = header
+            if not isinstance(claims.get("exp"), int) or claims["exp"] <= time.time():
+                return False, None, "Proof has expired"
+            if claims.get("iss") != issuer:
+                return False, None, "Proof was issued by another issuer"
+        else:
+            claims = jwt.decode(token, key, algorithms=[SIGNING_ALGORITHM], issuer=issuer, options={"require": ["exp", "sub", "iss"]})
+            if subject_digest(claims.get("credential_subject", {})) != digest:
+                return False, None, "Credential subject does not match the proof"
+        if claims.get("sub") != subject:
+            return False, None, "Proof was issued for another attestation"
+    except jwt.ExpiredSignatureError:
+        return False, None, "Proof has expired"
+    except jwt.InvalidIssuerError:
+        return False, None, "Proof was issued by another issuer"
+    except (jwt.InvalidTokenError, ValueError) as e:
+        return False, None, f"Invalid proof: {e}"
+    return True, claims["exp"], ""
+
+
+def _verify_chunk(items: List[Tuple[str, str, str]], issuer: str, public_pems: Dict[str, bytes]) -> List[Tuple[bool, Optional[int], str]]:
+    """Verify (token, digest, subject) triples in a pool worker"""
+    return [verify_proof(token, digest, subject, issuer, public_pems) for token, digest, subject in items]
+
+
+class VerifiedTokenCache:
+    """LRU of successful verifications, each kept until its token expires"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bool:
+        """Whether the verification is cached and its token has not expired"""
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is None:
+                ATTESTATION_VERIFY_CACHE.inc("miss")
+                return False
+            if expires_at <= time.time():
+                del self._entries[key]
+                ATTESTATION_VERIFY_CACHE.inc("expired")
+                return False
+            self._entries.move_to_end(key)
+            ATTESTATION_VERIFY_CACHE.inc("hit")
+            return True
+
+    def put(self, key: str, expires_at: float) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = expires_at
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
 
 class AttestationService:
     def __init__(self):
         self.issuer = "EntrepreneurAI"
-        self.private_key = "demo-private-key"  # In production, use proper key management
+        self.key_set = create_key_set()
+        self.proof_mode = os.getenv("ATTESTATION_PROOF_MODE", "embedded").lower()
+        if self.proof_mode not in PROOF_MODES:
+            raise ValueError(f"Unknown ATTESTATION_PROOF_MODE: {self.proof_mode}")
+        self.verify_cache = VerifiedTokenCache(int(os.getenv("ATTESTATION_VERIFY_CACHE_SIZE", "10000")))
+        self.verify_workers = int(os.getenv("ATTESTATION_VERIFY_WORKERS", "0")) or os.cpu_count() or 1
+        self._verify_pool: Optional[ProcessPoolExecutor] = None
 
+    @traced("AttestationService.create_attestation")
+    @timed(ATTESTATION_SECONDS, "create_attestation")
     async def create_attestation(self, application_id: str, wallet_credentials: List[Dict], additional_information: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new attestation combining wallet credentials and additional information"""
         try:
             attestation_id = str(uuid.uuid4())
-            issued_at = datetime.now().isoformat()
-            expires_at = (datetime.now() + timedelta(days=365)).isoformat()
+            now = datetime.now()
+            issued_at = now.isoformat()
+            expires_at = now + ATTESTATION_VALIDITY
             
             # Combine all credential subjects
             combined_credential_subject = {}
@@ -32,6 +198,18 @@ class AttestationService:
                 if key not in combined_credential_subject or not self._is_valid_wallet_value(combined_credential_subject[key]):
                     combined_credential_subject[key] = value
             
+            kid, _ = self.key_set.signing_pem()
+
+            # The proof covers the whole credential subject, not just combinedData
+            credential_subject = {
+                "id": f"did:example:entrepreneur:{application_id}",
+                "type": "DhiSubsidyApplication",
+                "walletCredentials": wallet_credentials,
+                "additionalInformation": additional_information,
+                "applicationId": application_id,
+                "combinedData": combined_credential_subject
+            }
+            
             # Create OpenID 4 VCI compliant attestation
             attestation = {
                 "@context": [
@@ -45,21 +223,14 @@ class AttestationService:
                     "name": "Entrepreneur AI Agent"
                 },
                 "issuanceDate": issued_at,
-                "expirationDate": expires_at,
-                "credentialSubject": {
-                    "id": f"did:example:entrepreneur:{application_id}",
-                    "type": "DhiSubsidyApplication",
-                    "walletCredentials": wallet_credentials,
-                    "additionalInformation": additional_information,
-                    "applicationId": application_id,
-                    "combinedData": combined_credential_subject
-                },
+                "expirationDate": expires_at.isoformat(),
+                "credentialSubject": credential_subject,
                 "proof": {
                     "type": "JsonWebSignature2020",
                     "created": issued_at,
-                    "verificationMethod": f"https://entrepreneur-ai.example.com/issuer/{self.issuer}#key-1",
+                    "verificationMethod": f"https://entrepreneur-ai.example.com/issuer/{self.issuer}#{kid}",
                     "proofPurpose": "assertionMethod",
-                    "jws": await self._create_jwt_proof(attestation_id, combined_credential_subject)
+                    "jws": await self._create_jwt_proof(attestation_id, credential_subject, int(expires_at.timestamp()))
                 }
             }
             
@@ -68,25 +239,57 @@ class AttestationService:
         except Exception as e:
             raise Exception(f"Failed to create attestation: {str(e)}")
 
-    async def _create_jwt_proof(self, attestation_id: str, credential_subject: Dict[str, Any]) -> str:
-        """Create JWT proof for the attestation"""
+    async def _create_jwt_proof(self, attestation_id: str, credential_subject: Dict[str, Any], expires_at: int) -> str:
+        """Create JWT proof for the attestation, valid as long as the attestation itself"""
+        if self.proof_mode == "detached":
+            return await self._create_detached_proof(attestation_id, credential_subject, expires_at)
         try:
-            # In production, use proper JWT signing
+            kid, private_pem = self.key_set.signing_pem()
             payload = {
                 "iss": self.issuer,
                 "sub": attestation_id,
                 "iat": int(datetime.now().timestamp()),
-                "exp": int(datetime.now().timestamp()) + 3600,  # 1 hour expiry
+                "exp": expires_at,
                 "credential_subject": credential_subject
             }
             
-            # For demo purposes, create a simple JWT (in production, use proper signing)
-            return jwt.encode(payload, self.private_key, algorithm="HS256")
+            with TRACER.start_span("AttestationService.sign", attributes={"jws.alg": SIGNING_ALGORITHM, "executor": CPU_EXECUTOR.kind}):
+                started = time.perf_counter()
+                token = await CPU_EXECUTOR.run("sign", sign_embedded, payload, private_pem, kid)
+                ATTESTATION_SIGNING_SECONDS.observe(time.perf_counter() - started)
+            return token
             
         except Exception as e:
             # Fallback to simple string
             return f"demo-jwt-{attestation_id}"
 
+    async def _create_detached_proof(self, attestation_id: str, credential_subject: Dict[str, Any], expires_at: int) -> str:
+        """Create a compact JWS over the subject digest with the payload detached (RFC 7797).
+
+        The token is `header..signature`: the signed payload is the digest of
+        the canonical JSON of the credential subject, which a verifier recomputes from
+        the attestation. The JWT claims travel as header parameters.
+        """
+        try:
+            kid, private_pem = self.key_set.signing_pem()
+            issued_at = int(datetime.now().timestamp())
+            headers = {
+                "typ": None,
+                "kid": kid,
+                "iss": self.issuer,
+                "sub": attestation_id,
+                "iat": issued_at,
+                "exp": expires_at
+            }
+            with TRACER.start_span("AttestationService.sign", attributes={"jws.alg": SIGNING_ALGORITHM, "jws.detached": True, "executor": CPU_EXECUTOR.kind}):
+                started = time.perf_counter()
+                token = await CPU_EXECUTOR.run("sign", sign_detached, credential_subject, private_pem, headers)
+                ATTESTATION_SIGNING_SECONDS.observe(time.perf_counter() - started)
+            return token
+
+        except Exception as e:
+            return f"demo-jwt-{attestation_id}"
+
     def _is_valid_wallet_value(self, value: Any) -> bool:
         """Check if a wallet value is valid and should be preferred over manual input"""
         if value is None:
@@ -97,21 +300,99 @@ class AttestationService:
             return False
         return True
 
+    def _proof_inputs(self, attestation: Dict[str, Any]) -> Tuple[str, Dict[str, Any], str]:
+        """The proof token of an attestation, the credential subject it must match and the expected sub"""
+        token = attestation.get("proof", {}).get("jws", "")
+        credential_subject = attestation.get("credentialSubject", {})
+        subject = str(attestation.get("id", "")).removeprefix("urn:uuid:")
+        return token, credential_subject, subject
+
+    @traced("AttestationService.verify_attestation")
+    @timed(ATTESTATION_SECONDS, "verify_attestation")
     async def verify_attestation(self, attestation: Dict[str, Any]) -> bool:
         """Verify the integrity of an attestation"""
         try:
-            # Verify JWT proof
-            jwt_token = attestation.get("proof", {}).get("jwt", "")
-            if not jwt_token:
+            token, credential_subject, subject = self._proof_inputs(attestation)
+            if not token:
                 return False
             
-            # In production, verify JWT signature
-            # For demo, just check if it's a valid format
-            return jwt_token.startswith("demo-jwt-") or "eyJ" in jwt_token
+            digest = await CPU_EXECUTOR.run("canonicalize", subject_digest, credential_subject)
+            cache_key = verification_key(token, digest, subject)
+            if self.verify_cache.get(cache_key):
+                return True
+            
+            public_pems = await self.key_set.public_pems((_token_kid(token),))
+            valid, expires_at, _ = await CPU_EXECUTOR.run("verify", verify_proof, token, digest, subject, self.issuer, public_pems)
+            if valid:
+                self.verify_cache.put(cache_key, expires_at)
+            return valid
             
         except Exception:
             return False
 
+    def _get_verify_pool(self) -> ProcessPoolExecutor:
+        if self._verify_pool is None:
+            # Spawn rather than fork, so workers do not inherit the server's threads and locks
+            self._verify_pool = ProcessPoolExecutor(max_workers=self.verify_workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._verify_pool
+
+    @traced("AttestationService.verify_attestations")
+    @timed(ATTESTATION_SECONDS, "verify_attestations")
+    async def verify_attestations(self, attestations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Verify many attestations; proofs not in the cache are verified in parallel on the process pool"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(attestations)
+        proof_inputs = []
+        for index, attestation in enumerate(attestations):
+            try:
+                token, credential_subject, subject = self._proof_inputs(attestation)
+            except (AttributeError, TypeError, ValueError) as e:
+                results[index] = {"id": attestation.get("id"), "valid": False, "error": f"Malformed attestation: {e}"}
+                continue
+            if not token:
+                results[index] = {"id": attestation.get("id"), "valid": False, "error": "Attestation has no proof"}
+                continue
+            proof_inputs.append((index, token, credential_subject, subject))
+        digests = await CPU_EXECUTOR.run("canonicalize", _subject_digests, [credential_subject for _, _, credential_subject, _ in proof_inputs])
+
+        # Proofs to verify by cache key, with the indexes of the attestations carrying them
+        pending: Dict[str, List[int]] = {}
+        proofs: Dict[str, Tuple[str, str, str]] = {}
+        for (index, token, _, subject), digest in zip(proof_inputs, digests):
+            cache_key = verification_key(token, digest, subject)
+            if cache_key in pending:
+                pending[cache_key].append(index)
+            elif self.verify_cache.get(cache_key):
+                results[index] = {"id": attestations[index].get("id"), "valid": True, "error": None}
+            else:
+                pending[cache_key] = [index]
+                proofs[cache_key] = (token, digest, subject)
+
+        if pending:
+            public_pems = await self.key_set.public_pems(tuple({_token_kid(token) for token, _, _ in proofs.values()}))
+            keys = list(pending)
+            # A few chunks per worker: enough to balance the load, few enough to keep pickling cheap
+            chunk_size = max(1, math.ceil(len(keys) / (self.verify_workers * 4)))
+            chunks = [keys[i:i + chunk_size] for i in range(0, len(keys), chunk_size)]
+            loop = asyncio.get_running_loop()
+            pool = self._get_verify_pool()
+            outcomes = await asyncio.gather(*[
+                loop.run_in_executor(pool, _verify_chunk, [proofs[cache_key] for cache_key in chunk], self.issuer, public_pems)
+                for chunk in chunks
+            ])
+            for chunk, chunk_outcomes in zip(chunks, outcomes):
+                for cache_key, (valid, expires_at, error) in zip(chunk, chunk_outcomes):
+                    if valid:
+                        self.verify_cache.put(cache_key, expires_at)
+                    for index in pending[cache_key]:
+                        results[index] = {"id": attestations[index].get("id"), "valid": valid, "error": error or None}
+        return results
+
+    def shutdown(self) -> None:
+        """Stop the verification worker processes"""
+        if self._verify_pool is not None:
+            self._verify_pool.shutdown(wait=False, cancel_futures=True)
+            self._verify_pool = None
+
     async def extract_credential_data(self, attestation: Dict[str, Any]) -> Dict[str, Any]:
         """Extract and return the combined credential data from an attestation"""
         try:
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+from services.metrics import CPU_EXECUTOR_QUEUE_DEPTH, CPU_EXECUTOR_RUN_SECONDS, CPU_EXECUTOR_WAIT_SECONDS
+
+CPU_EXECUTOR_KINDS = ("thread", "process", "inline")
+
+
+def _timed_call(func: Callable[..., Any], args: Tuple[Any, ...]) -> Tuple[float, float, Any]:
+    """Run func in a worker, returning when it started and finished (wall clock, comparable across processes)"""
+    started_at = time.time()
+    result = func(*args)
+    return started_at, time.time(), result
+
+
+def estimated_size(value: Any, limit: int) -> int:
+    """Rough JSON size of value in bytes; stops counting once it passes `limit`"""
+    size = 0
+    stack = [value]
+    while stack and size < limit:
+        item = stack.pop()
+        if isinstance(item, str):
+            size += len(item) + 2
+        elif isinstance(item, dict):
+            size += 2
+            for key, nested in item.items():
+                size += len(str(key)) + 4
+                stack.append(nested)
+        elif isinstance(item, (list, tuple)):
+            size += 2 + len(item)
+            stack.extend(item)
+        else:
+            size += 8
+    return size
+
+
+class CpuExecutor:
+    """Runs CPU-bound work (signing, canonical JSON, large serialisations) off the event loop.
+
+    kind is thread, process or inline (run on the event loop, as before).
+    Functions given to a process executor must be importable module-level
+    functions with picklable arguments. Tasks in flight are exposed as a
+    queue depth gauge; the wait for a worker and the run time are observed
+    per operation.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: Optional[int] = None, offload_min_bytes: int = 65536):
+        if kind not in CPU_EXECUTOR_KINDS:
+            raise ValueError(f"Unknown CPU_EXECUTOR: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.offload_min_bytes = offload_min_bytes
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # Spawn rather than fork, so workers do not inherit the server's threads and locks
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cpu")
+        return self._executor
+
+    async def run(self, operation: str, func: Callable[..., Any], *args: Any) -> Any:
+        """Run func(*args) on the executor and return its result"""
+        if self.kind == "inline":
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                CPU_EXECUTOR_RUN_SECONDS.observe(time.perf_counter() - started, operation)
+
+        submitted_at = time.time()
+        self._in_flight += 1
+        CPU_EXECUTOR_QUEUE_DEPTH.set(self._in_flight)
+        try:
+            loop = asyncio.get_running_loop()
+            started_at, finished_at, result = await loop.run_in_executor(self._get_executor(), _timed_call, func, args)
+        finally:
+            self._in_flight -= 1
+            CPU_EXECUTOR_QUEUE_DEPTH.set(self._in_flight)
+        CPU_EXECUTOR_WAIT_SECONDS.observe(max(0.0, started_at - submitted_at), operation)
+        CPU_EXECUTOR_RUN_SECONDS.observe(finished_at - started_at, operation)
+        return result
+
+    async def dumps(self, value: Any) -> str:
+        """json.dumps, on the executor when the value is large"""
+        if self.kind == "inline" or estimated_size(value, self.offload_min_bytes) < self.offload_min_bytes:
+            return json.dumps(value)
+        return await self.run("serialize", json.dumps, value)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def create_cpu_executor() -> CpuExecutor:
+    """Create the executor configured by CPU_EXECUTOR, CPU_EXECUTOR_WORKERS and CPU_OFFLOAD_MIN_BYTES"""
+    return CpuExecutor(
+        kind=os.getenv("CPU_EXECUTOR", "thread").lower(),
+        max_workers=int(os.getenv("CPU_EXECUTOR_WORKERS", "0")) or None,
+        offload_min_bytes=int(os.getenv("CPU_OFFLOAD_MIN_BYTES", "65536"))
+    )
+
+
+CPU_EXECUTOR = create_cpu_executor()
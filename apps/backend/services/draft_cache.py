@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Callable, Optional
+
+from services.metrics import DRAFT_CACHE_LOOKUPS
+from services.paths import backend_path
+
+
+def draft_cache_key(credentials_summary: str, requirements: List[str], prompt_version: str, model: str) -> str:
+    """Content hash of everything that determines an LLM draft"""
+    canonical = json.dumps(
+        {
+            "credentials": credentials_summary,
+            "requirements": list(requirements),
+            "promptVersion": prompt_version,
+            "model": model
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def prompt_cache_key(prompt_version: str, model: str, **variables: Any) -> str:
+    """Content hash of a prompt version, model and prompt variables"""
+    canonical = json.dumps(
+        {"promptVersion": prompt_version, "model": model, "variables": variables},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class DraftCache:
+    """Two-tier cache of generated drafts: an in-memory LRU in front of SQLite.
+
+    Entries expire `ttl` seconds after they were written. A disk hit is
+    promoted to the memory tier with its original expiry. The SQLite tier
+    is opened by open(), from the application lifespan, and queried on a
+    dedicated thread; until then only the memory tier is used.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 86400, db_path: Optional[str] = "data/draft_cache.db"):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def open(self) -> None:
+        """Open the SQLite tier, creating the database if needed"""
+        if not self.db_path or self._conn is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="draft-cache")
+        self._conn = await self._run(self._connect)
+
+    async def close(self) -> None:
+        """Close the SQLite tier; the memory tier stays usable"""
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        await asyncio.get_running_loop().run_in_executor(self._executor, conn.close)
+        self._executor.shutdown(wait=False)
+        self._executor = None
+
+    def _connect(self) -> sqlite3.Connection:
+        db_path = self.db_path
+        if db_path != ":memory:":
+            db_path = backend_path(db_path)
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS draft_cache (
+                key TEXT PRIMARY KEY,
+                expires_at REAL NOT NULL,
+                data TEXT NOT NULL
+            )
+        """)
+        return conn
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached draft, or None on a miss"""
+        now = time.time()
+        expired = False
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                DRAFT_CACHE_LOOKUPS.inc("memory_hit")
+                return value
+            del self._memory[key]
+            expired = True
+
+        if self._conn is not None:
+            row = await self._run(self._read, key, now)
+            if row is not None:
+                if row[0] > now:
+                    value = json.loads(row[1])
+                    self._remember(key, row[0], value)
+                    DRAFT_CACHE_LOOKUPS.inc("disk_hit")
+                    return value
+                expired = True
+
+        DRAFT_CACHE_LOOKUPS.inc("expired" if expired else "miss")
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a draft in both tiers"""
+        expires_at = time.time() + self.ttl
+        self._remember(key, expires_at, value)
+        if self._conn is not None:
+            await self._run(self._write, key, expires_at, json.dumps(value))
+
+    async def purge_expired(self) -> int:
+        """Delete expired entries from both tiers"""
+        now = time.time()
+        expired = [key for key, (expires_at, _) in self._memory.items() if expires_at <= now]
+        for key in expired:
+            del self._memory[key]
+        removed = len(expired)
+        if self._conn is not None:
+            removed += await self._run(self._purge, now)
+        return removed
+
+    def _read(self, key: str, now: float) -> Optional[tuple]:
+        with self._lock:
+            row = self._conn.execute("SELECT expires_at, data FROM draft_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[0] <= now:
+                self._conn.execute("DELETE FROM draft_cache WHERE key = ?", (key,))
+        return row
+
+    def _write(self, key: str, expires_at: float, data: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO draft_cache (key, expires_at, data) VALUES (?, ?, ?)",
+                (key, expires_at, data)
+            )
+
+    def _purge(self, now: float) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM draft_cache WHERE expires_at <= ?", (now,)).rowcount
+
+    def _remember(self, key: str, expires_at: float, value: Dict[str, Any]) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+def create_draft_cache() -> DraftCache:
+    """Create the draft cache configured by DRAFT_CACHE_* variables"""
+    return DraftCache(
+        max_entries=int(os.getenv("DRAFT_CACHE_SIZE", "256")),
+        ttl=float(os.getenv("DRAFT_CACHE_TTL", "86400")),
+        db_path=os.getenv("DRAFT_CACHE_PATH", "data/draft_cache.db")
+    )
@@ -0,0 +1,64 @@
+from typing import Dict, List, Any, Callable, Optional
+
+# Template guidance for the DHI additional information fields
+FIELD_GUIDANCE = {
+    "projectLocationDHI": "Name the country and city where the DHI project will take place.",
+    "applicantRole": "State whether you apply as a single entrepreneur or as the lead applicant of a consortium.",
+    "applicationTypeOrConsortium": "Choose the DHI component (demonstration, feasibility or investment preparation) and list any consortium partners.",
+    "demonstration": "Describe the capital goods, services or technology you will demonstrate and to whom.",
+    "feasibility": "Describe the feasibility study: the question it answers, the approach and the expected outcome.",
+    "investmentPreparation": "Describe the investment you are preparing and the studies needed before the investment decision.",
+    "projectDetails": "Summarise the project goal, planned activities, budget and expected results.",
+    "targetSector": "Name the sector the project targets in the host country.",
+    "greeningCheck": "Explain how the project contributes to greening or sustainability in the host country.",
+    "startDate": "Enter the planned start date of the project (YYYY-MM-DD).",
+    "endDate": "Enter the planned end date of the project (YYYY-MM-DD).",
+    "financialTurnoverMin100kLast3Years": "Confirm that your annual turnover was at least EUR 100,000 in each of the last 3 years.",
+    "exportMultiplierStatement": "Explain how the project will lead to additional exports from the Netherlands.",
+    "onHostLocation": "Confirm whether the project activities take place on location in the host country.",
+    "exportedBefore": "State whether your company has exported goods or services before.",
+    "performedQuickScan": "Confirm whether you completed the DHI quick scan before applying."
+}
+
+# Fields whose guidance depends on the project itself; hybrid mode asks the
+# LLM to write these, everything else comes from the templates above
+FREE_TEXT_FIELDS = ["demonstration", "feasibility", "exportMultiplierStatement"]
+
+# Additional information that can be derived from wallet credential data
+DERIVED_FIELDS: Dict[str, Callable[[Dict[str, Any]], Optional[Any]]] = {
+    "exportedBefore": lambda subject: True if subject.get("previousExporterApplications") else None
+}
+
+
+def combine_credential_subjects(credentials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge the credential subjects of all credentials"""
+    combined = {}
+    for cred in credentials:
+        combined.update(cred.get("credentialSubject", {}))
+    return combined
+
+
+def build_rule_draft(available_credentials: List[Dict[str, Any]], additional_requirements: List[str]) -> Dict[str, Any]:
+    """Build the draft content deterministically from wallet data and templates"""
+    subject = combine_credential_subjects(available_credentials)
+
+    additional_information = {}
+    missing_fields = []
+    for field in additional_requirements:
+        derive = DERIVED_FIELDS.get(field)
+        value = derive(subject) if derive is not None else None
+        if value is not None:
+            additional_information[field] = value
+        else:
+            missing_fields.append(field)
+
+    guidance = {
+        field: FIELD_GUIDANCE.get(field, f"Please provide information for: {field}")
+        for field in missing_fields
+    }
+
+    return {
+        "additionalInformation": additional_information,
+        "missingFields": missing_fields,
+        "guidance": guidance
+    }
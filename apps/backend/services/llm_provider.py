@@ -0,0 +1,161 @@
+import ast
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from typing import Dict, List, Any, AsyncIterator, Iterator, Optional
+import httpx
+import openai
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_openai import ChatOpenAI
+from services.draft_rules import FIELD_GUIDANCE
+
+LLM_PROVIDERS = ("openai", "fake")
+
+# Fake responses are split into chunks of roughly one token
+CHARS_PER_TOKEN = 4
+
+
+class FakeChatModel(BaseChatModel):
+    """Offline chat model that answers the AgentService prompts.
+
+    Responses are deterministic for a given prompt: schema-valid
+    ApplicationDraft JSON for draft prompts, a field to guidance map for
+    guidance prompts and the merged draft for update prompts. Latency is
+    log-normal around `median_latency` plus output tokens at
+    `tokens_per_second`, and calls fail with a 500 at `error_rate` or a 429
+    at `rate_limit_rate`, like the OpenAI API would.
+    """
+
+    median_latency: float = 0.5
+    latency_sigma: float = 0.5
+    tokens_per_second: float = 50.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    seed: Optional[int] = None
+    rng: Any = None
+    stats: Dict[str, int] = {}
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.rng = random.Random(self.seed)
+        self.stats = {"calls": 0, "errors": 0, "rateLimited": 0, "completionTokens": 0}
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        content = self._respond(messages)
+        first_token = self._start_call()
+        time.sleep(first_token + self._generation_time(content))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        content = self._respond(messages)
+        first_token = self._start_call()
+        await asyncio.sleep(first_token + self._generation_time(content))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        content = self._respond(messages)
+        time.sleep(self._start_call())
+        for piece in self._pieces(content):
+            time.sleep(self._generation_time(piece))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        content = self._respond(messages)
+        await asyncio.sleep(self._start_call())
+        for piece in self._pieces(content):
+            await asyncio.sleep(self._generation_time(piece))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+    def _start_call(self) -> float:
+        """Inject failures and return the time to the first token"""
+        self.stats["calls"] += 1
+        outcome = self.rng.random()
+        if outcome < self.rate_limit_rate:
+            self.stats["rateLimited"] += 1
+            raise openai.RateLimitError("Rate limit reached (fake)", response=self._error_response(429), body=None)
+        if outcome < self.rate_limit_rate + self.error_rate:
+            self.stats["errors"] += 1
+            raise openai.InternalServerError("The server had an error (fake)", response=self._error_response(500), body=None)
+        return self.median_latency * self.rng.lognormvariate(0, self.latency_sigma)
+
+    def _generation_time(self, text: str) -> float:
+        tokens = max(1, len(text) // CHARS_PER_TOKEN)
+        self.stats["completionTokens"] += tokens
+        return tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _pieces(self, content: str) -> List[str]:
+        return [content[i:i + CHARS_PER_TOKEN] for i in range(0, len(content), CHARS_PER_TOKEN)]
+
+    def _error_response(self, status_code: int) -> httpx.Response:
+        return httpx.Response(status_code, request=httpx.Request("POST", "http://fake-llm/v1/chat/completions"))
+
+    def _respond(self, messages: List[BaseMessage]) -> str:
+        """Answer the draft, guidance or update prompt in the messages"""
+        prompt = "\n".join(str(message.content) for message in messages)
+
+        if "Current draft:" in prompt:
+            return json.dumps({
+                "walletCredentials": [],
+                "additionalInformation": self._prompt_value(prompt, "New information", {}),
+                "missingFields": [],
+                "status": "complete"
+            })
+
+        if "Additional requirements:" in prompt:
+            requirements = self._prompt_value(prompt, "Additional requirements", [])
+            return json.dumps({
+                "walletCredentials": [],
+                "additionalInformation": {},
+                "missingFields": requirements,
+                "guidance": {field: FIELD_GUIDANCE.get(field, f"Please provide information for: {field}") for field in requirements},
+                "status": "draft"
+            })
+
+        fields = self._prompt_value(prompt, "Fields", [])
+        return json.dumps({field: FIELD_GUIDANCE.get(field, f"Please provide information for: {field}") for field in fields})
+
+    def _prompt_value(self, prompt: str, label: str, default: Any) -> Any:
+        """Read a list or object rendered on the `label: value` line of a prompt"""
+        match = re.search(rf"{label}: (.*)", prompt)
+        if match is None:
+            return default
+        try:
+            return json.loads(match.group(1))
+        except ValueError:
+            pass
+        try:
+            return ast.literal_eval(match.group(1))
+        except (ValueError, SyntaxError):
+            return default
+
+
+def create_chat_model(model_name: str) -> BaseChatModel:
+    """Create the chat model of the provider configured by LLM_PROVIDER"""
+    provider = os.getenv("LLM_PROVIDER", "openai").lower()
+    if provider == "openai":
+        return ChatOpenAI(
+            model=model_name,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            temperature=0.1,
+            streaming=True
+        )
+    if provider == "fake":
+        seed = os.getenv("FAKE_LLM_SEED")
+        return FakeChatModel(
+            median_latency=float(os.getenv("FAKE_LLM_LATENCY", "0.5")),
+            latency_sigma=float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0.5")),
+            tokens_per_second=float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "50")),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            rate_limit_rate=float(os.getenv("FAKE_LLM_RATE_LIMIT_RATE", "0")),
+            seed=int(seed) if seed else None
+        )
+    raise ValueError(f"Unknown LLM_PROVIDER: {provider}")
@@ -0,0 +1,294 @@
+import functools
+import time
+from bisect import bisect_left
+from typing import Dict, List, Any, Awaitable, Callable, Tuple
+
+# Latency buckets in seconds, from in-memory lookups up to slow LLM calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+# Age buckets in seconds, for cached data that lives minutes to hours
+AGE_BUCKETS = (1, 10, 60, 300, 900, 1800, 3600, 7200, 14400, 43200, 86400)
+
+
+def _format_labels(labelnames: Tuple[str, ...], labels: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labels)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonically increasing count per label combination"""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """Current value per label combination"""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def replace(self, values: Dict[Tuple[str, ...], float]) -> None:
+        """Set all values at once, dropping label combinations that are gone"""
+        self._values = dict(values)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Bucketed observations per label combination.
+
+    observe() only does a bisect and three additions; buckets are made
+    cumulative when the histogram is rendered.
+    """
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # labels -> [counts per bucket plus +Inf, sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series is not None else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                bucket_labels = _format_labels(self.labelnames, labels, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """The metrics exposed on /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def register(self, metric: Any) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency per route", ("method", "route", "status")
+))
+RVO_SECONDS = REGISTRY.register(Histogram(
+    "rvo_service_duration_seconds", "RvoService call latency", ("operation",)
+))
+RVO_CLIENT_REQUESTS = REGISTRY.register(Counter(
+    "rvo_client_requests_total", "RVO API attempts by operation and outcome", ("operation", "outcome")
+))
+RVO_RETRIES = REGISTRY.register(Counter(
+    "rvo_client_retries_total", "RVO API attempts retried after a failure", ("operation",)
+))
+RVO_CIRCUIT_OPEN = REGISTRY.register(Gauge(
+    "rvo_circuit_open", "1 while the RVO circuit breaker is open"
+))
+RVO_REQUIREMENTS_CACHE = REGISTRY.register(Counter(
+    "rvo_requirements_cache_total", "Requirement catalog lookups by result (hit, stale, expired or miss)", ("catalog", "result")
+))
+RVO_REQUIREMENTS_REVALIDATIONS = REGISTRY.register(Counter(
+    "rvo_requirements_revalidations_total", "Requirement catalog revalidations by outcome (not_modified, modified or error)", ("catalog", "outcome")
+))
+RVO_REQUIREMENTS_STALENESS = REGISTRY.register(Histogram(
+    "rvo_requirements_staleness_seconds", "Age of served requirement catalogs since RVO last confirmed them", ("catalog",), AGE_BUCKETS
+))
+SUBMISSION_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "submission_outbox_messages", "RVO submissions in the outbox per state (pending or failed)", ("state",)
+))
+SUBMISSIONS_PROCESSED = REGISTRY.register(Counter(
+    "submission_outbox_processed_total", "RVO submission attempts by outcome (delivered, retried or failed)", ("outcome",)
+))
+SUBMISSION_QUEUE_SECONDS = REGISTRY.register(Histogram(
+    "submission_outbox_delivery_seconds", "Time from queueing an RVO submission until RVO accepted it"
+))
+SUBMISSION_STATUS_CHECKS = REGISTRY.register(Counter(
+    "submission_status_checks_total", "RVO status checks of submitted applications by result (changed or unchanged)", ("result",)
+))
+STATUS_SUBSCRIBERS = REGISTRY.register(Gauge(
+    "status_event_subscribers", "Open application status subscriptions"
+))
+STATUS_EVENTS = REGISTRY.register(Counter(
+    "status_events_total", "Application status events published, delivered to subscribers and dropped for lagging subscribers", ("result",)
+))
+WALLET_SECONDS = REGISTRY.register(Histogram(
+    "wallet_service_duration_seconds", "WalletService call latency", ("operation",)
+))
+WALLET_RELOAD_SECONDS = REGISTRY.register(Histogram(
+    "wallet_reload_duration_seconds", "Wallet directory reload time, including the load pool"
+))
+WALLET_RELOAD_BLOCKED_SECONDS = REGISTRY.register(Histogram(
+    "wallet_reload_loop_blocked_seconds", "Time a wallet directory reload ran on the event loop"
+))
+WALLET_RELOAD_FILES = REGISTRY.register(Counter(
+    "wallet_reload_files_parsed_total", "Wallet credential files parsed by reloads"
+))
+WALLET_PARTITION_LOOKUPS = REGISTRY.register(Counter(
+    "wallet_partition_lookups_total", "Entrepreneur wallet lookups by result (hit, miss, shared for entrepreneurs without their own wallet, or eviction)", ("result",)
+))
+WALLET_PARTITIONS = REGISTRY.register(Gauge(
+    "wallet_partitions_cached", "Entrepreneur wallets held in the LRU cache"
+))
+AGENT_SECONDS = REGISTRY.register(Histogram(
+    "agent_service_duration_seconds", "AgentService call latency", ("operation",)
+))
+AGENT_LLM_SECONDS = REGISTRY.register(Histogram(
+    "agent_llm_duration_seconds", "LLM call latency per prompt", ("prompt",)
+))
+AGENT_PROMPT_TOKENS = REGISTRY.register(Histogram(
+    "agent_llm_prompt_tokens", "Prompt tokens per LLM call", ("prompt",), TOKEN_BUCKETS
+))
+AGENT_COMPLETION_TOKENS = REGISTRY.register(Histogram(
+    "agent_llm_completion_tokens", "Completion tokens per LLM call", ("prompt",), TOKEN_BUCKETS
+))
+DRAFT_CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "draft_cache_lookups_total", "Draft cache lookups by result (memory_hit, disk_hit, expired or miss)", ("result",)
+))
+PROMPT_TRUNCATIONS = REGISTRY.register(Counter(
+    "agent_prompt_truncations_total", "Credential summaries cut to fit the prompt token budget"
+))
+PROMPT_DROPPED_FIELDS = REGISTRY.register(Counter(
+    "agent_prompt_dropped_fields_total", "Credential fields left out of prompts by the token budget"
+))
+SINGLE_FLIGHT_CALLS = REGISTRY.register(Counter(
+    "single_flight_calls_total", "Identical concurrent LLM calls by result (executed, or coalesced into one in flight)", ("result",)
+))
+AGENT_FALLBACKS = REGISTRY.register(Counter(
+    "agent_fallbacks_total", "Drafts and guidance that fell back after an LLM error", ("operation",)
+))
+ATTESTATION_SECONDS = REGISTRY.register(Histogram(
+    "attestation_service_duration_seconds", "AttestationService call latency", ("operation",)
+))
+ATTESTATION_SIGNING_SECONDS = REGISTRY.register(Histogram(
+    "attestation_signing_duration_seconds", "Attestation proof signing time, including the wait for a CPU executor worker"
+))
+ATTESTATION_VERIFY_CACHE = REGISTRY.register(Counter(
+    "attestation_verify_cache_total", "Verified-token cache lookups by result (hit, miss or expired)", ("result",)
+))
+CPU_EXECUTOR_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "cpu_executor_queue_depth", "Tasks submitted to the CPU executor and not finished"
+))
+CPU_EXECUTOR_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "cpu_executor_wait_seconds", "Time a task waited for a CPU executor worker", ("operation",)
+))
+CPU_EXECUTOR_RUN_SECONDS = REGISTRY.register(Histogram(
+    "cpu_executor_run_seconds", "Time a task ran on the CPU executor", ("operation",)
+))
+APPLICATIONS = REGISTRY.register(Gauge(
+    "applications", "Applications per status", ("status",)
+))
+
+
+def timed(histogram: Histogram, *labels: str) -> Callable:
+    """Decorate an async function to observe its duration in histogram"""
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, *labels)
+        return wrapper
+    return decorator
+
+
+class MetricsMiddleware:
+    """ASGI middleware observing request latency per route template.
+
+    The route is read from the scope after the app has handled the request,
+    so /api/application/{application_id} is one series however many ids are
+    requested. Streaming responses are timed until their last chunk.
+    """
+
+    def __init__(self, app: Any, histogram: Histogram = HTTP_REQUEST_SECONDS):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = ["500"]
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            self.histogram.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status[0]
+            )
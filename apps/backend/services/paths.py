@@ -0,0 +1,9 @@
+from pathlib import Path
+
+# apps/backend locally and /app in the Docker image, where data/ is mounted
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def backend_path(path: str) -> Path:
+    """Resolve a configured path; relative paths are taken from the backend directory, not the working directory"""
+    return BACKEND_DIR / path
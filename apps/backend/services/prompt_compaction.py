@@ -0,0 +1,93 @@
+import logging
+import os
+from typing import Dict, List, Any, Optional, Tuple
+
+from services.metrics import PROMPT_DROPPED_FIELDS, PROMPT_TRUNCATIONS
+
+logger = logging.getLogger(__name__)
+
+
+class PromptCompactor:
+    """Compact wallet credentials into a token-budgeted prompt section.
+
+    Only the requested credential fields are kept, nested values are
+    flattened to dotted keys and each credential becomes one line of
+    `key=value` pairs. Fields are added in requested order and those that
+    no longer fit in `token_budget` are dropped.
+    """
+
+    def __init__(self, token_budget: int = 1000, encoding: str = "cl100k_base"):
+        self.token_budget = token_budget
+        self.encoding_name = encoding
+        self._encoding = None
+        self._encoding_loaded = False
+
+    def load_encoding(self) -> bool:
+        """Load the tiktoken encoding once; returns whether tokens are counted exactly.
+
+        tiktoken downloads encodings on first use, so this is not done at
+        import; the application lifespan calls it off the event loop.
+        Without network access tokens are estimated instead.
+        """
+        if not self._encoding_loaded:
+            self._encoding_loaded = True
+            try:
+                import tiktoken
+                self._encoding = tiktoken.get_encoding(self.encoding_name)
+            except Exception as e:
+                logger.warning("Token counting falls back to an estimate: %s", e)
+        return self._encoding is not None
+
+    def count_tokens(self, text: str) -> int:
+        """Count tokens locally, or estimate them at 4 characters per token"""
+        if self.load_encoding():
+            return len(self._encoding.encode(text))
+        return (len(text) + 3) // 4
+
+    def summarize(self, credentials: List[Dict[str, Any]], fields: Optional[List[str]] = None) -> str:
+        """Summarize credentials for a prompt within the token budget"""
+        entries = self._project(credentials, fields)
+
+        lines: Dict[str, List[str]] = {}
+        used = 0
+        dropped = 0
+        for cred_type, pair in entries:
+            # Each pair costs its own tokens plus a separator, or the type
+            # prefix for the first pair of a credential
+            cost = self.count_tokens(pair) + (1 if cred_type in lines else self.count_tokens(f"{cred_type}: ") + 1)
+            if used + cost > self.token_budget:
+                dropped += 1
+                continue
+            lines.setdefault(cred_type, []).append(pair)
+            used += cost
+
+        if dropped:
+            PROMPT_TRUNCATIONS.inc()
+            PROMPT_DROPPED_FIELDS.inc(amount=dropped)
+        return "\n".join(f"{cred_type}: {'; '.join(pairs)}" for cred_type, pairs in lines.items())
+
+    def _project(self, credentials: List[Dict[str, Any]], fields: Optional[List[str]]) -> List[Tuple[str, str]]:
+        """Flatten the requested subject fields to (credential type, key=value) pairs in field order"""
+        rank = {field: i for i, field in enumerate(fields)} if fields is not None else None
+        entries = []
+        for cred in credentials:
+            cred_type = cred.get("type", "Unknown")
+            for key, value in cred.get("credentialSubject", {}).items():
+                if rank is not None and key not in rank:
+                    continue
+                for flat_key, flat_value in self._flatten(key, value):
+                    entries.append((rank[key] if rank is not None else 0, cred_type, f"{flat_key}={flat_value}"))
+        entries.sort(key=lambda entry: entry[0])
+        return [(cred_type, pair) for _, cred_type, pair in entries]
+
+    def _flatten(self, key: str, value: Any) -> List[Tuple[str, str]]:
+        if isinstance(value, dict):
+            return [pair for sub_key, sub_value in value.items() for pair in self._flatten(f"{key}.{sub_key}", sub_value)]
+        if isinstance(value, list):
+            return [(key, ",".join(str(item) for item in value))]
+        return [(key, str(value))]
+
+
+def create_prompt_compactor() -> PromptCompactor:
+    """Create the prompt compactor configured by PROMPT_TOKEN_BUDGET"""
+    return PromptCompactor(token_budget=int(os.getenv("PROMPT_TOKEN_BUDGET", "1000")))
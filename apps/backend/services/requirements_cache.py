@@ -0,0 +1,101 @@
+import asyncio
+import copy
+import os
+import time
+from typing import Dict, Any, Awaitable, Callable, Optional, Tuple
+
+from services.metrics import RVO_REQUIREMENTS_CACHE, RVO_REQUIREMENTS_REVALIDATIONS, RVO_REQUIREMENTS_STALENESS
+
+# Fetch a catalog given the validators of the cached copy ({"etag", "lastModified"});
+# returns the new catalog, or None when RVO answered 304, and the new validators
+Fetch = Callable[[Dict[str, str]], Awaitable[Tuple[Optional[Dict[str, Any]], Dict[str, str]]]]
+
+
+class RequirementsCache:
+    """In-memory cache of RVO requirement catalogs.
+
+    A catalog younger than `ttl` seconds is served as is. Up to
+    `stale_while_revalidate` seconds after that it is still served, while
+    one background task revalidates it; older catalogs are revalidated
+    before they are served. Revalidation is conditional (If-None-Match,
+    If-Modified-Since), so an unchanged catalog costs a 304. If RVO cannot
+    be reached the cached catalog is served anyway.
+    """
+
+    def __init__(self, ttl: float = 300, stale_while_revalidate: float = 3600):
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        # (catalog, variant) -> {"value", "validators", "validatedAt"}
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._refreshing: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    async def get(self, catalog: str, fetch: Fetch, variant: str = "") -> Dict[str, Any]:
+        """Get a catalog; `variant` tells apart catalogs fetched with different inputs"""
+        key = (catalog, variant)
+        entry = self._entries.get(key)
+        if entry is None:
+            RVO_REQUIREMENTS_CACHE.inc(catalog, "miss")
+            entry = await self._revalidate(key, fetch)
+        else:
+            age = time.monotonic() - entry["validatedAt"]
+            if age < self.ttl:
+                RVO_REQUIREMENTS_CACHE.inc(catalog, "hit")
+            elif age < self.ttl + self.stale_while_revalidate:
+                RVO_REQUIREMENTS_CACHE.inc(catalog, "stale")
+                self._start_revalidation(key, fetch)
+            else:
+                RVO_REQUIREMENTS_CACHE.inc(catalog, "expired")
+                try:
+                    entry = await self._revalidate(key, fetch)
+                except Exception as e:
+                    print(f"Serving cached {catalog} catalog, RVO revalidation failed: {e}")
+        RVO_REQUIREMENTS_STALENESS.observe(time.monotonic() - entry["validatedAt"], catalog)
+        # Callers store and change the catalog, so each gets its own copy
+        return copy.deepcopy(entry["value"])
+
+    def _start_revalidation(self, key: Tuple[str, str], fetch: Fetch) -> asyncio.Task:
+        """Revalidate in the background, one task per catalog at a time"""
+        task = self._refreshing.get(key)
+        if task is None:
+            task = self._refreshing[key] = asyncio.create_task(self._refresh(key, fetch))
+            task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+        return task
+
+    async def _revalidate(self, key: Tuple[str, str], fetch: Fetch) -> Dict[str, Any]:
+        # Concurrent callers wait for the same request to RVO
+        await asyncio.shield(self._start_revalidation(key, fetch))
+        entry = self._entries.get(key)
+        if entry is None:
+            raise Exception(f"RVO {key[0]} catalog is not available")
+        return entry
+
+    async def _refresh(self, key: Tuple[str, str], fetch: Fetch) -> None:
+        catalog = key[0]
+        entry = self._entries.get(key)
+        try:
+            value, validators = await fetch(entry["validators"] if entry else {})
+        except Exception as e:
+            RVO_REQUIREMENTS_REVALIDATIONS.inc(catalog, "error")
+            if entry is None:
+                raise
+            print(f"Error revalidating RVO {catalog} catalog: {e}")
+            return
+
+        if value is None and entry is not None:
+            RVO_REQUIREMENTS_REVALIDATIONS.inc(catalog, "not_modified")
+            value = entry["value"]
+        else:
+            RVO_REQUIREMENTS_REVALIDATIONS.inc(catalog, "modified")
+        self._entries[key] = {"value": value, "validators": validators, "validatedAt": time.monotonic()}
+
+    def invalidate(self) -> None:
+        """Forget all catalogs, e.g. when a new subsidy round opens"""
+        self._entries.clear()
+
+
+def create_requirements_cache() -> RequirementsCache:
+    """Create the requirements cache configured by RVO_REQUIREMENTS_TTL and RVO_REQUIREMENTS_STALE"""
+    return RequirementsCache(
+        ttl=float(os.getenv("RVO_REQUIREMENTS_TTL", "300")),
+        stale_while_revalidate=float(os.getenv("RVO_REQUIREMENTS_STALE", "3600"))
+    )
@@ -0,0 +1,215 @@
+import asyncio
+import os
+import random
+import time
+from typing import Dict, Any, Optional
+
+import httpx
+
+from services.metrics import RVO_CIRCUIT_OPEN, RVO_CLIENT_REQUESTS, RVO_RETRIES
+from services.tracing import TRACER
+
+# Responses worth another attempt: rate limiting and server side trouble
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class RvoError(Exception):
+    """An RVO API call failed"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RvoUnavailableError(RvoError):
+    """The circuit breaker is open; RVO is not called until it has had time to recover"""
+
+
+class CircuitBreaker:
+    """Stops calling RVO after `threshold` consecutive failures.
+
+    The circuit stays open for `reset_timeout` seconds, then lets one trial
+    call through (half open): success closes it, failure opens it again.
+    A trial that ends without either, for instance because it was cancelled,
+    is released so the next call can try.
+    """
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        RVO_CIRCUIT_OPEN.set(0)
+
+    def release_trial(self) -> None:
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_running or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+            RVO_CIRCUIT_OPEN.set(1)
+        self._trial_running = False
+
+
+class RvoClient:
+    """Shared HTTP client for the RVO API.
+
+    One httpx.AsyncClient keeps a pool of keep-alive connections for all
+    requests. Each call has its own timeout, failed attempts are retried
+    with full-jitter exponential backoff (honouring Retry-After), and a
+    circuit breaker fails fast while RVO is down. Every attempt runs in a
+    CLIENT span whose traceparent is sent along.
+    """
+
+    def __init__(self, base_url: str, api_key: str = "", timeout: float = 10.0, connect_timeout: float = 2.0,
+                 max_retries: int = 3, backoff_base: float = 0.2, backoff_max: float = 5.0,
+                 breaker: Optional[CircuitBreaker] = None, max_connections: int = 100, max_keepalive: int = 20):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created on first use, inside the event loop that will use it
+        if self._client is None:
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                limits=self.limits,
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout)
+            )
+        return self._client
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def request(self, method: str, path: str, operation: str, json: Any = None,
+                      headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Call the RVO API and return the JSON body"""
+        response = await self.send(method, path, operation, json=json, headers=headers, timeout=timeout)
+        return response.json()
+
+    async def send(self, method: str, path: str, operation: str, json: Any = None,
+                   headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> httpx.Response:
+        """Call the RVO API and return the first response below 400.
+
+        Only use this for idempotent calls, or pass an Idempotency-Key
+        header, since any attempt may be retried.
+        """
+        client = self._get_client()
+        request_timeout = httpx.Timeout(timeout or self.timeout, connect=self.connect_timeout)
+        last_error: Optional[RvoError] = None
+
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                RVO_CLIENT_REQUESTS.inc(operation, "circuit_open")
+                raise RvoUnavailableError(f"RVO circuit breaker is open after {self.breaker.failures} failures")
+
+            # Only the half-open trial is let through while the circuit is not closed
+            trial = self.breaker.state != "closed"
+            recorded = False
+            retry_after = None
+            try:
+                with TRACER.start_span(f"RVO {method} {operation}", "CLIENT", {
+                    "http.method": method,
+                    "http.url": f"{self.base_url}{path}",
+                    "rvo.attempt": attempt
+                }) as span:
+                    request_headers = {**(headers or {}), "traceparent": span.traceparent()}
+                    try:
+                        response = await client.request(method, path, json=json, headers=request_headers, timeout=request_timeout)
+                    except httpx.TimeoutException as e:
+                        outcome, last_error = "timeout", RvoError(f"RVO {operation} timed out: {e!r}")
+                    except httpx.TransportError as e:
+                        outcome, last_error = "transport_error", RvoError(f"RVO {operation} failed: {e!r}")
+                    else:
+                        span.set_attribute("http.status_code", response.status_code)
+                        if response.status_code < 400:
+                            self.breaker.record_success()
+                            recorded = True
+                            RVO_CLIENT_REQUESTS.inc(operation, "ok")
+                            return response
+                        outcome = f"http_{response.status_code}"
+                        last_error = RvoError(f"RVO {operation} returned {response.status_code}: {response.text[:200]}", response.status_code)
+                        if response.status_code not in RETRYABLE_STATUS_CODES:
+                            # The request itself is wrong; retrying will not help, but RVO answered so it is up
+                            self.breaker.record_success()
+                            recorded = True
+                            RVO_CLIENT_REQUESTS.inc(operation, outcome)
+                            raise last_error
+                        retry_after = response.headers.get("Retry-After")
+                    span.status = "ERROR"
+                    span.status_message = str(last_error)
+
+                RVO_CLIENT_REQUESTS.inc(operation, outcome)
+                self.breaker.record_failure()
+                recorded = True
+            finally:
+                if trial and not recorded:
+                    self.breaker.release_trial()
+
+            if attempt < self.max_retries:
+                RVO_RETRIES.inc(operation)
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+
+        raise last_error
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def create_rvo_client(base_url: str, api_key: str = "") -> RvoClient:
+    """Create the RVO client with the timeouts, retries and pool size from the RVO_* settings"""
+    return RvoClient(
+        base_url=base_url,
+        api_key=api_key,
+        timeout=float(os.getenv("RVO_TIMEOUT", "10")),
+        connect_timeout=float(os.getenv("RVO_CONNECT_TIMEOUT", "2")),
+        max_retries=int(os.getenv("RVO_MAX_RETRIES", "3")),
+        backoff_base=float(os.getenv("RVO_BACKOFF_BASE", "0.2")),
+        backoff_max=float(os.getenv("RVO_BACKOFF_MAX", "5")),
+        breaker=CircuitBreaker(
+            threshold=int(os.getenv("RVO_BREAKER_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("RVO_BREAKER_RESET", "30"))
+        ),
+        max_connections=int(os.getenv("RVO_MAX_CONNECTIONS", "100")),
+        max_keepalive=int(os.getenv("RVO_MAX_KEEPALIVE", "20"))
+    )
@@ -1,19 +1,56 @@
 import json
 import os
-from typing import Dict, List, Any
-import httpx
+from typing import Dict, List, Any, Optional, Tuple
+from urllib.parse import urlencode
+from services.metrics import RVO_SECONDS, timed
+from services.requirements_cache import create_requirements_cache
+from services.rvo_client import RvoError, create_rvo_client
+from services.tracing import traced
 
 class RvoService:
     def __init__(self):
-        # In production, this would be the actual RVO API endpoint
-        self.rvo_base_url = os.getenv("RVO_API_URL", "https://api.rvo.nl")
+        # The RVO API endpoint, or the local stand-in (rvo_stub.py); when
+        # empty, the simulated responses below are returned
+        self.rvo_base_url = os.getenv("RVO_API_URL", "")
         self.api_key = os.getenv("RVO_API_KEY", "demo-rvo-key")
+        self.client = create_rvo_client(self.rvo_base_url, self.api_key) if self.rvo_base_url else None
+        # Requirement catalogs change once per subsidy round, so they are
+        # served from memory and revalidated with conditional requests
+        self.requirements_cache = create_requirements_cache()
 
+    async def _fetch_catalog(self, path: str, operation: str,
+                             validators: Dict[str, str]) -> Tuple[Optional[Dict[str, Any]], Dict[str, str]]:
+        """Fetch a requirement catalog unless it still matches the validators (304)"""
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("lastModified"):
+            headers["If-Modified-Since"] = validators["lastModified"]
+        response = await self.client.send("GET", path, operation, headers=headers, timeout=5)
+        if response.status_code == 304:
+            return None, validators
+        return response.json(), {
+            "etag": response.headers.get("ETag", ""),
+            "lastModified": response.headers.get("Last-Modified", "")
+        }
+
+    async def aclose(self) -> None:
+        """Close the pooled connections to RVO"""
+        if self.client is not None:
+            await self.client.aclose()
+
+    @traced("RvoService.get_requirements")
+    @timed(RVO_SECONDS, "get_requirements")
     async def get_requirements(self) -> Dict[str, Any]:
         """Step 2-3: Get initial requirements from RVO AI Agent"""
         try:
+            if self.client is not None:
+                return await self.requirements_cache.get(
+                    "requirements",
+                    lambda validators: self._fetch_catalog("/dhi/requirements", "get_requirements", validators)
+                )
+            
             # Simulate RVO AI Agent response
-            # In production, this would be an actual API call
             requirements = {
                 "requirements": {
                     "requestedCredentials": [
@@ -51,9 +88,22 @@ class RvoService:
                 "message": "Basic requirements for DHI application"
             }
 
+    @traced("RvoService.get_additional_requirements")
+    @timed(RVO_SECONDS, "get_additional_requirements")
     async def get_additional_requirements(self, initial_requirements: Dict[str, Any]) -> Dict[str, Any]:
         """Step 6: Get additional information requirements from RVO"""
         try:
+            if self.client is not None:
+                # The requested credentials go in the query string, so the
+                # catalog can be fetched with a conditional GET
+                requested = ",".join(initial_requirements.get("requestedCredentials", []))
+                path = f"/dhi/requirements/additional?{urlencode({'requestedCredentials': requested})}"
+                return await self.requirements_cache.get(
+                    "additional",
+                    lambda validators: self._fetch_catalog(path, "get_additional_requirements", validators),
+                    variant=requested
+                )
+            
             # Simulate RVO requesting additional information
             additional_info = {
                 "additionalInformation": [
@@ -92,12 +142,23 @@ class RvoService:
                 "message": "Please provide additional project information."
             }
 
-    async def submit_application(self, application_id: str, attestation: Dict[str, Any]) -> Dict[str, Any]:
-        """Step 12: Submit application to RVO"""
+    @traced("RvoService.submit_application")
+    @timed(RVO_SECONDS, "submit_application")
+    async def submit_application(self, application_id: str, attestation: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Step 12: Submit application to RVO; `idempotency_key` identifies this submission (default: the application id)"""
         try:
-            # In production, this would make an actual API call to RVO
-            # For demo purposes, simulate successful submission
+            if self.client is not None:
+                # The idempotency key makes retried submissions safe; a
+                # resubmission has a key of its own, so RVO does not dedupe it
+                submission = await self.client.request(
+                    "POST", "/dhi/applications", "submit_application",
+                    json={"applicationId": application_id, "attestation": attestation, "documents": []},
+                    headers={"Idempotency-Key": idempotency_key or application_id},
+                    timeout=30
+                )
+                return {**submission, "attestation": attestation}
             
+            # For demo purposes, simulate successful submission
             submission = {
                 "id": f"rvo_submission_{application_id}",
                 "attestation": attestation,
@@ -110,12 +171,22 @@ class RvoService:
             
             return submission
             
+        except RvoError:
+            # Keep the status code, so callers can tell rejections from outages
+            raise
         except Exception as e:
             raise Exception(f"Failed to submit to RVO: {str(e)}")
 
+    @traced("RvoService.check_application_status")
+    @timed(RVO_SECONDS, "check_application_status")
     async def check_application_status(self, application_id: str) -> Dict[str, Any]:
         """Check the status of a submitted application"""
         try:
+            if self.client is not None:
+                return await self.client.request(
+                    "GET", f"/dhi/applications/{application_id}/status", "check_application_status", timeout=5
+                )
+            
             # Simulate status check
             return {
                 "applicationId": application_id,
@@ -0,0 +1,39 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from services.metrics import SINGLE_FLIGHT_CALLS
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution.
+
+    The first caller for a key (the leader) starts the call; callers that
+    arrive while it is in flight (followers) await the same task and get the
+    leader's result or exception. The call runs as its own task, so a
+    cancelled caller does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run call() unless a call with the same key is already in flight"""
+        task = self._in_flight.get(key)
+        if task is not None:
+            SINGLE_FLIGHT_CALLS.inc("coalesced")
+        else:
+            SINGLE_FLIGHT_CALLS.inc("executed")
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._in_flight)
@@ -0,0 +1,83 @@
+import asyncio
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Any, Callable, Optional
+
+from services.paths import backend_path
+
+
+class SqliteDatabase:
+    """One SQLite connection in WAL mode, used from a dedicated thread.
+
+    The database, relative to the backend directory, is created by open(),
+    which runs from the application lifespan rather than at import. The
+    connection is in autocommit mode; write transactions are opened with
+    transaction(). Calls run through run(), so a statement waiting up to
+    busy_timeout for another process's write lock never blocks the event
+    loop. Shared by the SQLite application store and submission outbox.
+    """
+
+    def __init__(self, db_path: str, thread_name: str):
+        self.db_path = db_path
+        self.conn: Optional[sqlite3.Connection] = None
+        self.lock = threading.Lock()
+        # One thread: the connection serves one statement at a time anyway
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=thread_name)
+
+    @property
+    def is_open(self) -> bool:
+        return self.conn is not None
+
+    async def open(self, setup: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Connect, creating the database if needed, and return setup(conn), which creates the schema"""
+        return await self.run(self._open, setup)
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run func(*args) on the database thread"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def close(self) -> None:
+        if self.conn is not None:
+            await self.run(self._close)
+        self._executor.shutdown(wait=False)
+
+    def execute(self, sql: str, params: tuple = ()) -> int:
+        """Run one statement and return the number of rows it changed"""
+        with self.lock:
+            return self.conn.execute(sql, params).rowcount
+
+    def fetch(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def transaction(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Return func(conn), run in a write transaction that is rolled back if it raises"""
+        with self.lock:
+            # BEGIN IMMEDIATE takes the database write lock up front, so the
+            # transaction is atomic across threads and worker processes
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(self.conn)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return result
+
+    def _open(self, setup: Callable[[sqlite3.Connection], Any]) -> Any:
+        db_path = self.db_path
+        if db_path != ":memory:":
+            db_path = backend_path(db_path)
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            self.conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("PRAGMA busy_timeout=5000")
+            return setup(self.conn)
+
+    def _close(self) -> None:
+        with self.lock:
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import os
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+from services.metrics import STATUS_EVENTS, STATUS_SUBSCRIBERS
+
+
+class StatusSubscription:
+    """Status events for one subscriber, waiting to be sent.
+
+    At most `max_events` are kept; a subscriber that falls behind loses the
+    oldest ones, since a later status supersedes an earlier one.
+    """
+
+    __slots__ = ("keys", "events", "dropped", "_waiter")
+
+    def __init__(self, keys: List[Tuple[str, str]], max_events: int = 64):
+        self.keys = keys
+        # (event id, JSON data) pairs
+        self.events: deque = deque(maxlen=max_events)
+        self.dropped = 0
+        self._waiter: Optional[asyncio.Future] = None
+
+    def push(self, event: Tuple[int, str]) -> None:
+        if len(self.events) == self.events.maxlen:
+            self.dropped += 1
+            STATUS_EVENTS.inc("dropped")
+        self.events.append(event)
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def get(self, timeout: float) -> List[Tuple[int, str]]:
+        """Take all waiting events, waiting up to `timeout` seconds for one; empty on timeout"""
+        if not self.events:
+            # A plain future rather than asyncio.wait_for, which in Python 3.11
+            # can swallow the cancellation that ends the stream on disconnect
+            loop = asyncio.get_running_loop()
+            self._waiter = loop.create_future()
+            timer = loop.call_later(timeout, lambda waiter: waiter.done() or waiter.set_result(None), self._waiter)
+            try:
+                await self._waiter
+            finally:
+                timer.cancel()
+                self._waiter = None
+        events = list(self.events)
+        self.events.clear()
+        return events
+
+
+class StatusBroker:
+    """In-process pub/sub of application status changes.
+
+    The application store publishes every write that changes a status; each
+    event is serialised once and handed to the subscribers of that
+    application and of its entrepreneur. Only writes made by this process
+    are seen, so with several uvicorn workers a subscriber only hears about
+    the applications its own worker updates.
+    """
+
+    def __init__(self, max_events: int = 64, heartbeat_interval: float = 15.0):
+        self.max_events = max_events
+        # Seconds between keep-alive comments on idle streams, so proxies keep them open
+        self.heartbeat_interval = heartbeat_interval
+        self.sequence = 0
+        self._subscribers: Dict[Tuple[str, str], Set[StatusSubscription]] = {}
+        self._count = 0
+
+    def subscribe(self, application_id: Optional[str] = None, entrepreneur_id: Optional[str] = None) -> StatusSubscription:
+        """Subscribe to one application, one entrepreneur's applications, or both"""
+        keys = []
+        if application_id is not None:
+            keys.append(("application", application_id))
+        if entrepreneur_id is not None:
+            keys.append(("entrepreneur", entrepreneur_id))
+        subscription = StatusSubscription(keys, self.max_events)
+        for key in keys:
+            self._subscribers.setdefault(key, set()).add(subscription)
+        self._count += 1
+        STATUS_SUBSCRIBERS.set(self._count)
+        return subscription
+
+    def unsubscribe(self, subscription: StatusSubscription) -> None:
+        for key in subscription.keys:
+            subscribers = self._subscribers.get(key)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[key]
+        self._count -= 1
+        STATUS_SUBSCRIBERS.set(self._count)
+
+    def publish(self, application: Dict[str, Any], previous_status: Optional[str]) -> None:
+        """Send a status change to its subscribers; an application store status listener"""
+        self.sequence += 1
+        STATUS_EVENTS.inc("published")
+        subscribers = (
+            self._subscribers.get(("application", application["id"]), set())
+            | self._subscribers.get(("entrepreneur", application["entrepreneurId"]), set())
+        )
+        if not subscribers:
+            return
+
+        event = (self.sequence, json.dumps(status_event(application, previous_status)))
+        for subscription in subscribers:
+            subscription.push(event)
+        STATUS_EVENTS.inc("delivered", amount=len(subscribers))
+
+
+def status_event(application: Dict[str, Any], previous_status: Optional[str] = None) -> Dict[str, Any]:
+    """The compact status of an application, as sent to subscribers"""
+    return {
+        "applicationId": application["id"],
+        "entrepreneurId": application["entrepreneurId"],
+        "status": application["status"],
+        "previousStatus": previous_status,
+        "updatedAt": datetime.now().isoformat()
+    }
+
+
+def create_status_broker() -> StatusBroker:
+    """Create the status broker configured by STATUS_EVENTS_BUFFER and STATUS_HEARTBEAT_INTERVAL"""
+    return StatusBroker(
+        max_events=int(os.getenv("STATUS_EVENTS_BUFFER", "64")),
+        heartbeat_interval=float(os.getenv("STATUS_HEARTBEAT_INTERVAL", "15"))
+    )
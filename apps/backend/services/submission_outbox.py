@@ -0,0 +1,284 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional, Tuple
+
+from services.sqlite_db import SqliteDatabase
+
+
+class SubmissionOutbox(ABC):
+    """Base class for the outbox of RVO submissions.
+
+    A message is one application's submission: {"id" (the application id),
+    "messageId", "payload", "state", "attempts", "nextAttemptAt",
+    "enqueuedAt", "lastError", "traceparent"}. Messages are pending until a
+    worker delivers them, then removed; messages that cannot be delivered
+    become failed. A claimed message is leased: its next attempt is pushed
+    back by the lease, so a worker that dies mid-delivery only delays it.
+
+    Every submission gets its own messageId, and complete, retry and fail
+    only touch the message with that id. A resubmission that replaces a
+    message mid-delivery is left alone by the older delivery.
+    """
+
+    @abstractmethod
+    async def add(self, application_id: str, payload: Dict[str, Any], traceparent: str = "") -> Dict[str, Any]:
+        """Queue a submission; a submission already queued for the application is replaced"""
+
+    @abstractmethod
+    async def claim(self, lease: float) -> Optional[Dict[str, Any]]:
+        """Take the oldest due pending message and lease it for `lease` seconds"""
+
+    @abstractmethod
+    async def complete(self, application_id: str, message_id: str) -> bool:
+        """Remove a delivered message; returns False if it has been replaced"""
+
+    @abstractmethod
+    async def retry(self, application_id: str, message_id: str, next_attempt_at: float, error: str) -> bool:
+        """Schedule another attempt of a claimed message; returns False if it has been replaced"""
+
+    @abstractmethod
+    async def fail(self, application_id: str, message_id: str, error: str) -> bool:
+        """Give up on a message, which stays in the outbox as failed; returns False if it has been replaced"""
+
+    @abstractmethod
+    async def next_attempt_at(self) -> Optional[float]:
+        """Get when the next pending message is due, or None if there is none"""
+
+    @abstractmethod
+    async def count_by_state(self) -> Dict[str, int]:
+        """Get the number of messages per state"""
+
+    @abstractmethod
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Take or renew the named lease for `ttl` seconds; returns False while another owner holds it"""
+
+    async def open(self) -> None:
+        """Open backend resources; called from the application lifespan"""
+        return None
+
+    async def close(self) -> None:
+        """Release backend resources"""
+        return None
+
+    def _new_message(self, application_id: str, payload: Dict[str, Any], traceparent: str) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "id": application_id,
+            "messageId": uuid.uuid4().hex,
+            "payload": payload,
+            "state": "pending",
+            "attempts": 0,
+            "nextAttemptAt": now,
+            "enqueuedAt": now,
+            "lastError": None,
+            "traceparent": traceparent
+        }
+
+
+class InMemorySubmissionOutbox(SubmissionOutbox):
+    """Process-local outbox, used for demos and tests; lost on restart"""
+
+    def __init__(self):
+        self._messages: Dict[str, Dict[str, Any]] = {}
+        self._leases: Dict[str, Tuple[str, float]] = {}
+
+    async def add(self, application_id: str, payload: Dict[str, Any], traceparent: str = "") -> Dict[str, Any]:
+        message = self._new_message(application_id, payload, traceparent)
+        self._messages[application_id] = message
+        return dict(message)
+
+    async def claim(self, lease: float) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        due = [message for message in self._messages.values() if message["state"] == "pending" and message["nextAttemptAt"] <= now]
+        if not due:
+            return None
+        # No awaits here, so two workers cannot claim the same message
+        message = min(due, key=lambda message: message["nextAttemptAt"])
+        message["attempts"] += 1
+        message["nextAttemptAt"] = now + lease
+        return dict(message)
+
+    def _current(self, application_id: str, message_id: str) -> Optional[Dict[str, Any]]:
+        message = self._messages.get(application_id)
+        return message if message is not None and message["messageId"] == message_id else None
+
+    async def complete(self, application_id: str, message_id: str) -> bool:
+        if self._current(application_id, message_id) is None:
+            return False
+        del self._messages[application_id]
+        return True
+
+    async def retry(self, application_id: str, message_id: str, next_attempt_at: float, error: str) -> bool:
+        message = self._current(application_id, message_id)
+        if message is not None:
+            message.update(nextAttemptAt=next_attempt_at, lastError=error)
+        return message is not None
+
+    async def fail(self, application_id: str, message_id: str, error: str) -> bool:
+        message = self._current(application_id, message_id)
+        if message is not None:
+            message.update(state="failed", lastError=error)
+        return message is not None
+
+    async def next_attempt_at(self) -> Optional[float]:
+        due = [message["nextAttemptAt"] for message in self._messages.values() if message["state"] == "pending"]
+        return min(due) if due else None
+
+    async def count_by_state(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for message in self._messages.values():
+            counts[message["state"]] = counts.get(message["state"], 0) + 1
+        return counts
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        holder, expires_at = self._leases.get(name, (owner, now))
+        if holder != owner and expires_at > now:
+            return False
+        self._leases[name] = (owner, now + ttl)
+        return True
+
+
+class SqliteSubmissionOutbox(SubmissionOutbox):
+    """Outbox table in SQLite (WAL mode), durable across restarts and shared by all uvicorn workers on one host.
+
+    The database is opened by open(), from the application lifespan, and
+    queried on its own thread (see SqliteDatabase).
+    """
+
+    def __init__(self, db_path: str = "data/applications.db"):
+        self.db_path = db_path
+        self._db = SqliteDatabase(db_path, "submission-outbox")
+
+    async def open(self) -> None:
+        """Open the database, creating the outbox tables if needed"""
+        if not self._db.is_open:
+            await self._db.open(self._setup)
+
+    def _setup(self, conn: sqlite3.Connection) -> None:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS submission_outbox (
+                id TEXT PRIMARY KEY,
+                message_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                next_attempt_at REAL NOT NULL,
+                enqueued_at REAL NOT NULL,
+                last_error TEXT,
+                traceparent TEXT NOT NULL
+            )
+        """)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(submission_outbox)")]
+        if "message_id" not in columns:
+            # Outbox tables from before message ids
+            conn.execute("ALTER TABLE submission_outbox ADD COLUMN message_id TEXT NOT NULL DEFAULT ''")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_submission_outbox_due ON submission_outbox (state, next_attempt_at)"
+        )
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox_leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+
+    async def add(self, application_id: str, payload: Dict[str, Any], traceparent: str = "") -> Dict[str, Any]:
+        message = self._new_message(application_id, payload, traceparent)
+        await self._db.run(
+            self._db.execute,
+            "INSERT OR REPLACE INTO submission_outbox "
+            "(id, message_id, payload, state, attempts, next_attempt_at, enqueued_at, last_error, traceparent) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (message["id"], message["messageId"], json.dumps(payload), message["state"], message["attempts"],
+             message["nextAttemptAt"], message["enqueuedAt"], message["lastError"], message["traceparent"])
+        )
+        return message
+
+    async def claim(self, lease: float) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        # One transaction, so a message is claimed by one worker across threads and processes
+        row = await self._db.run(self._db.transaction, lambda conn: self._claim(conn, now, lease))
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "messageId": row[1],
+            "payload": json.loads(row[2]),
+            "state": row[3],
+            "attempts": row[4] + 1,
+            "nextAttemptAt": now + lease,
+            "enqueuedAt": row[6],
+            "lastError": row[7],
+            "traceparent": row[8]
+        }
+
+    async def complete(self, application_id: str, message_id: str) -> bool:
+        return await self._db.run(
+            self._db.execute, "DELETE FROM submission_outbox WHERE id = ? AND message_id = ?", (application_id, message_id)
+        ) > 0
+
+    async def retry(self, application_id: str, message_id: str, next_attempt_at: float, error: str) -> bool:
+        return await self._db.run(
+            self._db.execute,
+            "UPDATE submission_outbox SET next_attempt_at = ?, last_error = ? WHERE id = ? AND message_id = ?",
+            (next_attempt_at, error, application_id, message_id)
+        ) > 0
+
+    async def fail(self, application_id: str, message_id: str, error: str) -> bool:
+        return await self._db.run(
+            self._db.execute,
+            "UPDATE submission_outbox SET state = 'failed', last_error = ? WHERE id = ? AND message_id = ?",
+            (error, application_id, message_id)
+        ) > 0
+
+    async def next_attempt_at(self) -> Optional[float]:
+        rows = await self._db.run(self._db.fetch, "SELECT MIN(next_attempt_at) FROM submission_outbox WHERE state = 'pending'")
+        return rows[0][0]
+
+    async def count_by_state(self) -> Dict[str, int]:
+        rows = await self._db.run(self._db.fetch, "SELECT state, COUNT(*) FROM submission_outbox GROUP BY state")
+        return {state: count for state, count in rows}
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        # One statement: taken if free, expired or already ours, across processes
+        return await self._db.run(
+            self._db.execute,
+            "INSERT INTO outbox_leases (name, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+            "WHERE outbox_leases.owner = excluded.owner OR outbox_leases.expires_at <= ?",
+            (name, owner, now + ttl, now)
+        ) > 0
+
+    async def close(self) -> None:
+        await self._db.close()
+
+    def _claim(self, conn: sqlite3.Connection, now: float, lease: float) -> Optional[tuple]:
+        row = conn.execute(
+            "SELECT id, message_id, payload, state, attempts, next_attempt_at, enqueued_at, last_error, traceparent "
+            "FROM submission_outbox WHERE state = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT 1",
+            (now,)
+        ).fetchone()
+        if row is not None:
+            conn.execute(
+                "UPDATE submission_outbox SET attempts = attempts + 1, next_attempt_at = ? WHERE id = ?",
+                (now + lease, row[0])
+            )
+        return row
+
+
+def create_submission_outbox() -> SubmissionOutbox:
+    """Create the outbox configured by SUBMISSION_OUTBOX (memory or sqlite, default APPLICATION_STORE)"""
+    backend = os.getenv("SUBMISSION_OUTBOX", os.getenv("APPLICATION_STORE", "memory")).lower()
+    if backend == "memory":
+        return InMemorySubmissionOutbox()
+    if backend == "sqlite":
+        # Next to the applications table by default, so both survive a restart together
+        return SqliteSubmissionOutbox(os.getenv("SUBMISSION_OUTBOX_PATH", os.getenv("APPLICATION_DB_PATH", "data/applications.db")))
+    raise ValueError(f"Unknown SUBMISSION_OUTBOX backend: {backend}")
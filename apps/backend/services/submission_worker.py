@@ -0,0 +1,220 @@
+import asyncio
+import os
+import random
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Any, Set
+
+from services.application_store import ApplicationStore
+from services.metrics import SUBMISSION_QUEUE_SECONDS, SUBMISSION_STATUS_CHECKS, SUBMISSIONS_PROCESSED
+from services.rvo_client import RETRYABLE_STATUS_CODES, RvoError
+from services.rvo_service import RvoService
+from services.submission_outbox import SubmissionOutbox
+from services.tracing import TRACER, current_span, parse_traceparent
+
+# RVO statuses that mean nothing has happened since the submission
+UNCHANGED_STATUSES = ("submitted", "unknown")
+
+# Outbox lease held by the one worker pool that checks RVO statuses
+STATUS_CHECK_LEASE = "submission_status_checks"
+
+
+class SubmissionWorkerPool:
+    """Delivers queued RVO submissions and follows them until RVO reviews them.
+
+    `workers` tasks drain the outbox. A failed delivery is retried with
+    full-jitter exponential backoff until `max_attempts`; a rejection by
+    RVO (a 4xx other than 429) is not retried. Delivered applications are
+    `submitted`; every `status_interval` seconds their RVO status is
+    checked, `status_page_size` applications at a time, and copied to the
+    application once it changes. Only the pool holding the outbox's status
+    check lease does this, so uvicorn workers sharing an outbox do not all
+    check the same applications.
+    """
+
+    def __init__(self, outbox: SubmissionOutbox, rvo_service: RvoService, application_store: ApplicationStore,
+                 workers: int = 4, max_attempts: int = 8, backoff_base: float = 1.0, backoff_max: float = 300.0,
+                 lease: float = 300.0, poll_interval: float = 1.0, status_interval: float = 5.0,
+                 status_page_size: int = 100):
+        self.outbox = outbox
+        self.rvo_service = rvo_service
+        self.application_store = application_store
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Longer than a delivery can take, including the RVO client's own retries
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.status_interval = status_interval
+        self.status_page_size = status_page_size
+        self._owner = uuid.uuid4().hex
+        # Futures of idle workers, resolved when a submission is queued
+        self._idle: Set[asyncio.Future] = set()
+        self._enqueued = 0
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start the workers and the status tracker"""
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        if self.status_interval > 0:
+            self._tasks.append(asyncio.create_task(self._track_statuses()))
+
+    async def stop(self) -> None:
+        """Stop all tasks; a delivery cut short is retried once its lease expires"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, application_id: str, attestation: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a submission and wake an idle worker"""
+        span = current_span()
+        message = await self.outbox.add(application_id, attestation, span.traceparent() if span is not None else "")
+        self._enqueued += 1
+        for waiter in self._idle:
+            if not waiter.done():
+                waiter.set_result(None)
+        return message
+
+    async def _work(self) -> None:
+        while True:
+            # Noted before claiming, so a submission queued meanwhile is not missed
+            enqueued = self._enqueued
+            try:
+                message = await self.outbox.claim(self.lease)
+                if message is None:
+                    await self._wait(enqueued)
+                else:
+                    await self.deliver(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error draining the submission outbox: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _wait(self, enqueued: int) -> None:
+        """Sleep until a submission is queued, the next retry is due or the poll interval has passed"""
+        next_attempt_at = await self.outbox.next_attempt_at()
+        timeout = self.poll_interval
+        if next_attempt_at is not None:
+            timeout = min(timeout, max(0.0, next_attempt_at - time.time()))
+        if self._enqueued != enqueued:
+            return
+
+        # A plain future rather than asyncio.wait_for, which in Python 3.11
+        # can swallow the cancellation that stop() relies on
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        timer = loop.call_later(timeout, lambda: waiter.done() or waiter.set_result(None))
+        self._idle.add(waiter)
+        try:
+            await waiter
+        finally:
+            timer.cancel()
+            self._idle.discard(waiter)
+
+    async def deliver(self, message: Dict[str, Any]) -> bool:
+        """Submit one claimed message to RVO; returns whether RVO accepted it"""
+        application_id = message["id"]
+        # Continue the trace of the request that queued the submission
+        parent = parse_traceparent(message["traceparent"]) if message["traceparent"] else None
+        with TRACER.start_span("SubmissionWorkerPool.deliver", "INTERNAL", {
+            "application.id": application_id,
+            "submission.attempt": message["attempts"]
+        }, parent=parent) as span:
+            try:
+                submission = await self.rvo_service.submit_application(application_id, message["payload"], message["messageId"])
+            except Exception as e:
+                span.status = "ERROR"
+                span.status_message = str(e)
+                await self._handle_failure(message, e)
+                return False
+
+            # Completed first: if a resubmission replaced this message, the
+            # application belongs to that one and is left as it is
+            if not await self.outbox.complete(application_id, message["messageId"]):
+                return True
+            await self.application_store.update(application_id, {
+                "submission": submission,
+                "status": "submitted",
+                "submittedAt": datetime.now().isoformat()
+            })
+            SUBMISSIONS_PROCESSED.inc("delivered")
+            SUBMISSION_QUEUE_SECONDS.observe(time.time() - message["enqueuedAt"])
+            return True
+
+    async def _handle_failure(self, message: Dict[str, Any], error: Exception) -> None:
+        application_id = message["id"]
+        rejected = isinstance(error, RvoError) and error.status_code is not None and error.status_code not in RETRYABLE_STATUS_CODES
+        if rejected or message["attempts"] >= self.max_attempts:
+            if not await self.outbox.fail(application_id, message["messageId"], str(error)):
+                # A resubmission replaced this message; it has its own attempts
+                return
+            await self.application_store.update(application_id, {
+                "status": "submission_failed",
+                "submissionError": str(error)
+            })
+            SUBMISSIONS_PROCESSED.inc("failed")
+            print(f"Giving up on RVO submission of {application_id} after {message['attempts']} attempts: {error}")
+            return
+
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (message["attempts"] - 1)))
+        if await self.outbox.retry(application_id, message["messageId"], time.time() + delay, str(error)):
+            SUBMISSIONS_PROCESSED.inc("retried")
+
+    async def _track_statuses(self) -> None:
+        while True:
+            await asyncio.sleep(self.status_interval)
+            try:
+                # Held for a few intervals, so a slow round does not hand it over
+                if await self.outbox.acquire_lease(STATUS_CHECK_LEASE, self._owner, self.status_interval * 3):
+                    await self.check_statuses()
+            except Exception as e:
+                print(f"Error checking RVO application statuses: {e}")
+
+    async def check_statuses(self) -> int:
+        """Copy RVO's status to submitted applications it has moved on; returns how many changed"""
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def check(application: Dict[str, Any]) -> bool:
+            async with semaphore:
+                rvo_status = await self.rvo_service.check_application_status(application["id"])
+            if rvo_status.get("status") in UNCHANGED_STATUSES or not rvo_status.get("status"):
+                SUBMISSION_STATUS_CHECKS.inc("unchanged")
+                return False
+            await self.application_store.update(application["id"], {
+                "status": rvo_status["status"],
+                "rvoStatus": rvo_status
+            })
+            SUBMISSION_STATUS_CHECKS.inc("changed")
+            return True
+
+        changed, offset = 0, 0
+        while True:
+            applications = await self.application_store.list_by_status("submitted", self.status_page_size, offset)
+            page_changed = sum(await asyncio.gather(*[check(application) for application in applications]))
+            changed += page_changed
+            if len(applications) < self.status_page_size:
+                return changed
+            # Changed applications are no longer submitted and drop out of the next page
+            offset += len(applications) - page_changed
+
+
+def create_submission_worker_pool(outbox: SubmissionOutbox, rvo_service: RvoService,
+                                  application_store: ApplicationStore) -> SubmissionWorkerPool:
+    """Create the worker pool configured by the SUBMISSION_* settings"""
+    return SubmissionWorkerPool(
+        outbox, rvo_service, application_store,
+        workers=int(os.getenv("SUBMISSION_WORKERS", "4")),
+        max_attempts=int(os.getenv("SUBMISSION_MAX_ATTEMPTS", "8")),
+        backoff_base=float(os.getenv("SUBMISSION_BACKOFF_BASE", "1")),
+        backoff_max=float(os.getenv("SUBMISSION_BACKOFF_MAX", "300")),
+        lease=float(os.getenv("SUBMISSION_LEASE", "300")),
+        poll_interval=float(os.getenv("SUBMISSION_POLL_INTERVAL", "1")),
+        status_interval=float(os.getenv("SUBMISSION_STATUS_INTERVAL", "5")),
+        status_page_size=int(os.getenv("SUBMISSION_STATUS_PAGE_SIZE", "100"))
+    )
@@ -0,0 +1,264 @@
+import functools
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Any, Awaitable, Callable, Iterator, Optional, Tuple
+
+from services.paths import backend_path
+
+
+class Span:
+    """One timed operation in a trace, identified like an OpenTelemetry span.
+
+    kind is INTERNAL, SERVER (an incoming request) or CLIENT (a call to the
+    LLM or RVO).
+    """
+
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_span_id", "start_ns", "end_ns", "attributes", "status", "status_message")
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent_span_id: Optional[str], attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes) if attributes else {}
+        self.status = "UNSET"
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = "ERROR"
+        self.status_message = f"{type(exc).__name__}: {exc}"
+
+    def traceparent(self) -> str:
+        """W3C trace context header for this span"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Span in the field layout of OTLP/JSON"""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "status": {"code": self.status, "message": self.status_message}
+        }
+
+
+class InMemorySpanExporter:
+    """Keeps the most recent finished spans"""
+
+    def __init__(self, capacity: int = 10000):
+        self.spans: deque = deque(maxlen=capacity)
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span.to_dict())
+
+    def get_trace(self, trace_id: str) -> List[Dict[str, Any]]:
+        return [span for span in self.spans if span["traceId"] == trace_id]
+
+    def flush(self) -> None:
+        return None
+
+
+class FileSpanExporter:
+    """Appends finished spans to a JSON lines file, relative to the backend directory and opened with the first span"""
+
+    def __init__(self, path: str = "data/traces.jsonl"):
+        self.path = backend_path(path)
+        self._file = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Creates spans, keeps the active span per task and hands finished spans to the exporter"""
+
+    def __init__(self, exporter: Any = None):
+        self.exporter = exporter
+
+    def begin(self, name: str, kind: str = "INTERNAL", attributes: Optional[Dict[str, Any]] = None,
+              parent: Optional[Tuple[str, str]] = None) -> Span:
+        """Start a span without making it active; `parent` is a remote (trace id, span id)"""
+        if parent is not None:
+            trace_id, parent_span_id = parent
+        else:
+            current = _current_span.get()
+            if current is not None:
+                trace_id, parent_span_id = current.trace_id, current.span_id
+            else:
+                trace_id, parent_span_id = secrets.token_hex(16), None
+        return Span(name, kind, trace_id, parent_span_id, attributes)
+
+    def flush(self) -> None:
+        """Write out spans the exporter still buffers"""
+        if self.exporter is not None:
+            self.exporter.flush()
+
+    def end(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        if span.status == "UNSET":
+            span.status = "OK"
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+    @contextmanager
+    def start_span(self, name: str, kind: str = "INTERNAL", attributes: Optional[Dict[str, Any]] = None,
+                   parent: Optional[Tuple[str, str]] = None) -> Iterator[Span]:
+        """Run a block in a new active span, a child of the current span"""
+        span = self.begin(name, kind, attributes, parent)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end(span)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> str:
+    span = _current_span.get()
+    return span.trace_id if span is not None else "-"
+
+
+def parse_traceparent(header: str) -> Optional[Tuple[str, str]]:
+    """Get (trace id, parent span id) from a W3C traceparent header"""
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16)
+        int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2]
+
+
+def create_tracer() -> Tracer:
+    """Create the tracer configured by TRACE_EXPORTER (none, memory or file)"""
+    exporter_name = os.getenv("TRACE_EXPORTER", "memory").lower()
+    if exporter_name == "none":
+        return Tracer()
+    if exporter_name == "memory":
+        return Tracer(InMemorySpanExporter(int(os.getenv("TRACE_MEMORY_SPANS", "10000"))))
+    if exporter_name == "file":
+        return Tracer(FileSpanExporter(os.getenv("TRACE_FILE", "data/traces.jsonl")))
+    raise ValueError(f"Unknown TRACE_EXPORTER: {exporter_name}")
+
+
+TRACER = create_tracer()
+
+
+def traced(name: str, kind: str = "INTERNAL") -> Callable:
+    """Decorate an async function to run in a span"""
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with TRACER.start_span(name, kind):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def install_log_trace_ids() -> None:
+    """Add the current trace id to every log record as `trace_id`"""
+    factory = logging.getLogRecordFactory()
+    if getattr(factory, "adds_trace_id", False):
+        return
+
+    def record_factory(*args: Any, **kwargs: Any) -> logging.LogRecord:
+        record = factory(*args, **kwargs)
+        record.trace_id = current_trace_id()
+        return record
+
+    record_factory.adds_trace_id = True
+    logging.setLogRecordFactory(record_factory)
+
+
+class TracingMiddleware:
+    """ASGI middleware running each HTTP request in a server span.
+
+    An incoming W3C `traceparent` header continues the caller's trace. The
+    response carries `traceparent` and `X-Trace-Id` so clients and logs can
+    be matched with the spans.
+    """
+
+    def __init__(self, app: Any, tracer: Tracer = None):
+        self.app = app
+        self.tracer = tracer or TRACER
+        self.logger = logging.getLogger("tracing")
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        parent = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                parent = parse_traceparent(value.decode("latin-1"))
+                break
+
+        with self.tracer.start_span(f"{scope['method']} {scope['path']}", "SERVER", {"http.method": scope["method"]}, parent) as span:
+            async def send_with_trace(message: Dict[str, Any]) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.status = "ERROR"
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"traceparent", span.traceparent().encode()),
+                        (b"x-trace-id", span.trace_id.encode())
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                # Name the span after the route template once routing is done
+                route = getattr(scope.get("route"), "path", None)
+                if route is not None:
+                    span.name = f"{scope['method']} {route}"
+                    span.set_attribute("http.route", route)
+                self.logger.info(
+                    "%s %s %s %.1fms",
+                    scope["method"], scope["path"], span.attributes.get("http.status_code", "-"),
+                    (time.time_ns() - span.start_ns) / 1e6
+                )
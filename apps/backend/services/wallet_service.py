@@ -1,71 +1,374 @@
+import asyncio
+import itertools
 import json
 import os
-from typing import Dict, List, Any
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Callable, Optional, Set, Tuple
 from pathlib import Path
+from services.metrics import (
+    WALLET_PARTITION_LOOKUPS, WALLET_PARTITIONS, WALLET_RELOAD_BLOCKED_SECONDS, WALLET_RELOAD_FILES,
+    WALLET_RELOAD_SECONDS, WALLET_SECONDS, timed
+)
+from services.tracing import traced
 
-class WalletService:
-    def __init__(self):
-        self.data_dir = Path("data/wallet")
+# Files parsed per load pool task during a reload
+LOAD_CHUNK_SIZE = 64
+
+# Entrepreneur ids are used as directory names below data/wallet
+ENTREPRENEUR_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+class WalletPartition:
+    """Credential cache and field index for one wallet directory"""
+
+    def __init__(self, data_dir: Path, load_pool: ThreadPoolExecutor, demo_credentials: Optional[Callable[[], List[Dict[str, Any]]]] = None):
+        self.data_dir = data_dir
+        self.demo_credentials = demo_credentials
         self.credentials_cache = {}
+        # Inverted index: credential type or subject field name -> credential ids
+        self.field_index: Dict[str, Set[str]] = {}
+        self._cache_order: Dict[str, int] = {}
+        self._cache_sequence = 0
+        # Incremented whenever the cache changes, so dependent caches can invalidate
+        self.generation = 0
+        self._loaded = False
+        # Keyed by file path string; str hashing is much cheaper than Path
+        self._file_stats: Dict[str, Tuple[int, int]] = {}
+        self._file_credentials: Dict[str, str] = {}
+        self._demo_ids: List[str] = []
+        self._refresh_lock = asyncio.Lock()
+        self._load_pool = load_pool
+        # Time the last reload ran on the event loop; all reloads are
+        # observed in WALLET_RELOAD_BLOCKED_SECONDS
+        self.last_loop_blocked_seconds = 0.0
 
-    async def get_all_credentials(self) -> List[Dict[str, Any]]:
-        """Get all available wallet credentials"""
-        try:
-            if self.credentials_cache:
-                return list(self.credentials_cache.values())
+    async def load(self) -> None:
+        """Load the wallet from disk unless it is already cached"""
+        if not self._loaded:
+            await self.refresh()
+
+    async def refresh(self) -> bool:
+        """Re-parse wallet files whose mtime or size changed and evict deleted ones"""
+        async with self._refresh_lock:
+            loop = asyncio.get_running_loop()
+            started = time.perf_counter()
+            
+            # Directory scan and file parsing run on the load pool; only the
+            # cache updates below run on the event loop
+            entries = await loop.run_in_executor(self._load_pool, self._scan_data_dir)
             
-            credentials = []
+            segment = time.perf_counter()
+            seen = {file_path for file_path, _ in entries}
+            changed_files = [(file_path, stat_key) for file_path, stat_key in entries if self._file_stats.get(file_path) != stat_key]
+            blocked = time.perf_counter() - segment
             
-            # Load from mock data files
-            if self.data_dir.exists():
-                for file_path in self.data_dir.glob("*.json"):
-                    try:
-                        with open(file_path, 'r') as f:
-                            cred_data = json.load(f)
-                            credentials.append(cred_data)
-                            self.credentials_cache[cred_data.get("id", file_path.stem)] = cred_data
-                    except Exception as e:
-                        print(f"Error loading credential {file_path}: {e}")
+            # Load from mock data files, concurrently in chunks so a large
+            # reload does not flood the loop with completion callbacks
+            chunks = [changed_files[i:i + LOAD_CHUNK_SIZE] for i in range(0, len(changed_files), LOAD_CHUNK_SIZE)]
+            chunk_results = await asyncio.gather(*[
+                loop.run_in_executor(self._load_pool, self._read_credential_files, [file_path for file_path, _ in chunk])
+                for chunk in chunks
+            ])
             
-            # If no files exist, create demo credentials
-            if not credentials:
-                credentials = self._create_demo_credentials()
-                for cred in credentials:
-                    self.credentials_cache[cred["id"]] = cred
+            segment = time.perf_counter()
+            changed = False
+            for index, ((file_path, stat_key), cred_data) in enumerate(zip(changed_files, itertools.chain.from_iterable(chunk_results))):
+                if index and index % LOAD_CHUNK_SIZE == 0:
+                    # Let other requests run between chunks of cache updates
+                    blocked += time.perf_counter() - segment
+                    await asyncio.sleep(0)
+                    segment = time.perf_counter()
+                
+                # Remember the stat even if parsing fails, so a broken file is
+                # only retried once it changes again
+                self._file_stats[file_path] = stat_key
+                if cred_data is None:
+                    continue
+                
+                cred_id = cred_data.get("id", Path(file_path).stem)
+                old_id = self._file_credentials.get(file_path)
+                if old_id is not None and old_id != cred_id:
+                    self._evict_credential(old_id)
+                self._cache_credential(cred_id, cred_data)
+                self._file_credentials[file_path] = cred_id
+                changed = True
             
-            return credentials
+            for file_path in [path for path in self._file_stats if path not in seen]:
+                del self._file_stats[file_path]
+                cred_id = self._file_credentials.pop(file_path, None)
+                if cred_id is not None:
+                    self._evict_credential(cred_id)
+                    changed = True
+            
+            changed = self._sync_demo_credentials() or changed
+            if changed:
+                self.generation += 1
+            self._loaded = True
+            blocked += time.perf_counter() - segment
+            
+            self.last_loop_blocked_seconds = blocked
+            WALLET_RELOAD_FILES.inc(amount=len(changed_files))
+            WALLET_RELOAD_SECONDS.observe(time.perf_counter() - started)
+            WALLET_RELOAD_BLOCKED_SECONDS.observe(blocked)
+            return changed
+
+    def _read_credential_files(self, file_paths: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Read and parse credential files; runs on the load pool"""
+        results = []
+        for file_path in file_paths:
+            try:
+                with open(file_path, 'r') as f:
+                    results.append(json.load(f))
+            except Exception as e:
+                print(f"Error loading credential {file_path}: {e}")
+                results.append(None)
+        return results
+
+    def _scan_data_dir(self) -> List[Tuple[str, Tuple[int, int]]]:
+        """List wallet files with their (mtime, size) without reading them"""
+        if not self.data_dir.exists():
+            return []
+        
+        entries = []
+        with os.scandir(self.data_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".json") and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((entry.path, (stat.st_mtime_ns, stat.st_size)))
+        return entries
+
+    def _sync_demo_credentials(self) -> bool:
+        """Use demo credentials only while no wallet file provides credentials"""
+        if self.demo_credentials is None:
+            return False
+        
+        if self._file_credentials and self._demo_ids:
+            file_ids = set(self._file_credentials.values())
+            for cred_id in self._demo_ids:
+                if cred_id not in file_ids:
+                    self._evict_credential(cred_id)
+            self._demo_ids = []
+            return True
+        
+        # If no files exist, create demo credentials
+        if not self._file_credentials and not self._demo_ids:
+            for cred in self.demo_credentials():
+                self._cache_credential(cred["id"], cred)
+                self._demo_ids.append(cred["id"])
+            return True
+        
+        return False
+
+    def match_requested(self, requested_types: List[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Match requested types against the field index in one pass.
+
+        A credential is available when its type or one of its subject fields
+        is requested. A requested type is missing when no credential provides
+        it, since any credential that does is itself available.
+        """
+        matched_ids: Set[str] = set()
+        missing = []
+        for req_type in dict.fromkeys(requested_types):
+            ids = self.field_index.get(req_type)
+            if ids:
+                matched_ids |= ids
+            else:
+                missing.append(req_type)
+
+        available = [self.credentials_cache[cred_id] for cred_id in sorted(matched_ids, key=self._cache_order.__getitem__)]
+        return available, missing
+
+    def _cache_credential(self, cred_id: str, cred: Dict[str, Any]) -> None:
+        """Add or replace a cached credential and keep the field index in sync"""
+        if cred_id in self.credentials_cache:
+            self._evict_credential(cred_id)
+
+        self.credentials_cache[cred_id] = cred
+        self._cache_sequence += 1
+        self._cache_order[cred_id] = self._cache_sequence
+        for field in self._indexed_fields(cred):
+            self.field_index.setdefault(field, set()).add(cred_id)
+
+    def _evict_credential(self, cred_id: str) -> None:
+        """Remove a cached credential and its field index entries"""
+        cred = self.credentials_cache.pop(cred_id, None)
+        self._cache_order.pop(cred_id, None)
+        if cred is None:
+            return
+        for field in self._indexed_fields(cred):
+            ids = self.field_index.get(field)
+            if ids is not None:
+                ids.discard(cred_id)
+                if not ids:
+                    del self.field_index[field]
+
+    def _indexed_fields(self, cred: Dict[str, Any]) -> Set[str]:
+        fields = set(cred.get("credentialSubject", {}).keys())
+        # W3C credentials list their types, e.g. ["VerifiableCredential", "KvkCredential"]
+        types = cred.get("type", "")
+        fields.update(cred_type for cred_type in (types if isinstance(types, list) else [types]) if isinstance(cred_type, str))
+        return fields
+
+class WalletService:
+    def __init__(self):
+        self.data_dir = Path("data/wallet")
+        self.reload_interval = float(os.getenv("WALLET_RELOAD_INTERVAL", "5"))
+        self.cache_size = int(os.getenv("WALLET_CACHE_SIZE", "1000"))
+        self._load_pool = ThreadPoolExecutor(
+            max_workers=int(os.getenv("WALLET_LOAD_WORKERS", "4")),
+            thread_name_prefix="wallet-load"
+        )
+        # Shared wallet in data/wallet, used by entrepreneurs without their own
+        # data/wallet/<entrepreneurId> directory
+        self.default_wallet = WalletPartition(self.data_dir, self._load_pool, self._create_demo_credentials)
+        # Per-entrepreneur wallets, least recently used first
+        self.partitions: "OrderedDict[str, WalletPartition]" = OrderedDict()
+        # Entrepreneurs known to have no directory of their own, least recently
+        # used first; the watcher drops them once their directory appears
+        self._shared_ids: "OrderedDict[str, None]" = OrderedDict()
+        self._watcher: Optional[asyncio.Task] = None
+
+    async def get_wallet(self, entrepreneur_id: Optional[str] = None) -> WalletPartition:
+        """Get the wallet of an entrepreneur, loading it on first use"""
+        if entrepreneur_id is None:
+            wallet = self.default_wallet
+        else:
+            wallet = self.partitions.get(entrepreneur_id)
+            if wallet is not None:
+                WALLET_PARTITION_LOOKUPS.inc("hit")
+                self.partitions.move_to_end(entrepreneur_id)
+            elif entrepreneur_id in self._shared_ids:
+                wallet = self.default_wallet
+                WALLET_PARTITION_LOOKUPS.inc("shared")
+                self._shared_ids.move_to_end(entrepreneur_id)
+            else:
+                wallet = await self._open_partition(entrepreneur_id)
+                if wallet is self.default_wallet:
+                    WALLET_PARTITION_LOOKUPS.inc("shared")
+                    self._shared_ids[entrepreneur_id] = None
+                    while len(self._shared_ids) > self.cache_size:
+                        self._shared_ids.popitem(last=False)
+                else:
+                    WALLET_PARTITION_LOOKUPS.inc("miss")
+                    self.partitions[entrepreneur_id] = wallet
+                    while len(self.partitions) > self.cache_size:
+                        self.partitions.popitem(last=False)
+                        WALLET_PARTITION_LOOKUPS.inc("eviction")
+                    WALLET_PARTITIONS.set(len(self.partitions))
+        
+        await wallet.load()
+        return wallet
+
+    async def _open_partition(self, entrepreneur_id: str) -> WalletPartition:
+        if not ENTREPRENEUR_ID_PATTERN.match(entrepreneur_id):
+            # Not usable as a directory name (e.g. an e-mail address), so the
+            # entrepreneur cannot have a wallet of their own
+            return self.default_wallet
+        
+        partition_dir = self.data_dir / entrepreneur_id
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(self._load_pool, partition_dir.is_dir):
+            return self.default_wallet
+        return WalletPartition(partition_dir, self._load_pool)
+
+    async def get_all_credentials(self, entrepreneur_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get all available wallet credentials"""
+        try:
+            # Only the first call loads from disk; after that the watcher
+            # keeps the cache up to date
+            wallet = await self.get_wallet(entrepreneur_id)
+            return list(wallet.credentials_cache.values())
             
         except Exception as e:
             # Return demo credentials as fallback
             return self._create_demo_credentials()
 
-    async def get_available_credentials(self, requested_types: List[str]) -> List[Dict[str, Any]]:
-        """Get credentials that match the requested types"""
+    @traced("WalletService.refresh")
+    @timed(WALLET_SECONDS, "refresh")
+    async def refresh(self) -> bool:
+        """Reload the shared wallet and every cached entrepreneur wallet"""
+        if self._shared_ids:
+            # Entrepreneurs whose directory has appeared get their own wallet on their next request
+            partition_dirs = await asyncio.get_running_loop().run_in_executor(self._load_pool, self._list_partition_dirs)
+            for entrepreneur_id in partition_dirs.intersection(self._shared_ids):
+                del self._shared_ids[entrepreneur_id]
+
+        wallets = {id(wallet): wallet for wallet in [self.default_wallet, *self.partitions.values()]}
+        changed = False
+        for wallet in wallets.values():
+            changed = await wallet.refresh() or changed
+        return changed
+
+    def _list_partition_dirs(self) -> Set[str]:
+        """Names of the entrepreneur wallet directories; runs on the load pool"""
+        if not self.data_dir.exists():
+            return set()
+        with os.scandir(self.data_dir) as it:
+            return {entry.name for entry in it if entry.is_dir()}
+
+    def start_watcher(self) -> None:
+        """Start polling the wallet directories in the background"""
+        if self._watcher is None and self.reload_interval > 0:
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def stop_watcher(self) -> None:
+        """Stop the background watcher"""
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Error reloading wallet credentials: {e}")
+
+    async def warm_up(self, entrepreneur_id: Optional[str] = None) -> None:
+        """Load an entrepreneur's wallet ahead of use, e.g. while RVO is being asked"""
         try:
-            all_credentials = await self.get_all_credentials()
-            available = []
-            
-            for cred in all_credentials:
-                cred_type = cred.get("type", "")
-                if cred_type in requested_types or any(req_type in cred.get("credentialSubject", {}) for req_type in requested_types):
-                    available.append(cred)
+            await self.get_wallet(entrepreneur_id)
+        except Exception as e:
+            print(f"Error loading wallet of {entrepreneur_id}: {e}")
+
+    @traced("WalletService.resolve")
+    @timed(WALLET_SECONDS, "resolve")
+    async def resolve(self, requested_types: List[str], entrepreneur_id: Optional[str] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Get the available credentials and the missing types for requirements in one pass"""
+        try:
+            wallet = await self.get_wallet(entrepreneur_id)
+            return wallet.match_requested(requested_types)
             
+        except Exception as e:
+            return [], list(requested_types)
+
+    @traced("WalletService.get_available_credentials")
+    @timed(WALLET_SECONDS, "get_available_credentials")
+    async def get_available_credentials(self, requested_types: List[str], entrepreneur_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get credentials that match the requested types"""
+        try:
+            wallet = await self.get_wallet(entrepreneur_id)
+            available, _ = wallet.match_requested(requested_types)
             return available
             
         except Exception as e:
             return []
 
-    async def get_missing_credentials(self) -> List[str]:
+    @traced("WalletService.get_missing_credentials")
+    @timed(WALLET_SECONDS, "get_missing_credentials")
+    async def get_missing_credentials(self, entrepreneur_id: Optional[str] = None) -> List[str]:
         """Get list of missing credential types"""
         try:
-            all_credentials = await self.get_all_credentials()
-            available_types = set()
-            
-            for cred in all_credentials:
-                available_types.add(cred.get("type", ""))
-                # Also check credential subject keys
-                subject = cred.get("credentialSubject", {})
-                available_types.update(subject.keys())
+            wallet = await self.get_wallet(entrepreneur_id)
+            # Credential types and subject keys are the keys of the field index
+            available_types = wallet.field_index.keys()
             
             # Standard credential types that should be available
             required_types = {
@@ -81,19 +384,14 @@ class WalletService:
         except Exception as e:
             return ["authentication", "kvkNumber", "statutoryName"]
 
-    async def get_missing_credentials_for_requirements(self, requested_types: List[str]) -> List[str]:
+    @traced("WalletService.get_missing_credentials_for_requirements")
+    @timed(WALLET_SECONDS, "get_missing_credentials_for_requirements")
+    async def get_missing_credentials_for_requirements(self, requested_types: List[str], entrepreneur_id: Optional[str] = None) -> List[str]:
         """Get missing credentials for specific requirements"""
         try:
-            available_credentials = await self.get_available_credentials(requested_types)
-            available_types = set()
-            
-            for cred in available_credentials:
-                available_types.add(cred.get("type", ""))
-                subject = cred.get("credentialSubject", {})
-                available_types.update(subject.keys())
-            
-            missing = set(requested_types) - available_types
-            return list(missing)
+            wallet = await self.get_wallet(entrepreneur_id)
+            _, missing = wallet.match_requested(requested_types)
+            return missing
             
         except Exception as e:
             return requested_types
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Critical path analysis of exported traces
+Reads the spans written with TRACE_EXPORTER=file and shows, per endpoint,
+the latency and the spans on its critical path: the sequence of calls the
+response had to wait for
+"""
+
+import argparse
+import json
+from collections import defaultdict
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def duration_ms(span: dict) -> float:
+    return (span["endTimeUnixNano"] - span["startTimeUnixNano"]) / 1e6
+
+
+def critical_path(span: dict, children: dict) -> list:
+    """Spans below `span` that its end time waited for.
+
+    Walking back from the end of the span, the child that finished last is
+    on the path, then the last child that finished before that one started,
+    and so on; each of them contributes its own critical path.
+    """
+    path = []
+    remaining = sorted(children.get(span["spanId"], []), key=lambda child: child["endTimeUnixNano"])
+    horizon = span["endTimeUnixNano"]
+    while remaining:
+        child = remaining.pop()
+        if child["endTimeUnixNano"] > horizon:
+            continue
+        path.append(child)
+        path.extend(critical_path(child, children))
+        horizon = child["startTimeUnixNano"]
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse critical paths of exported traces")
+    parser.add_argument("--file", default="data/traces.jsonl", help="JSON lines file of the file exporter")
+    parser.add_argument("--top", type=int, default=10, help="Endpoints to show, slowest p95 first")
+    args = parser.parse_args()
+
+    spans = []
+    with open(args.file) as f:
+        for line in f:
+            if line.strip():
+                spans.append(json.loads(line))
+
+    span_ids = {span["spanId"] for span in spans}
+    children = defaultdict(list)
+    roots = []
+    for span in spans:
+        if span["parentSpanId"] and span["parentSpanId"] in span_ids:
+            children[span["parentSpanId"]].append(span)
+        else:
+            roots.append(span)
+
+    # endpoint -> durations, and per span on the critical path its total time
+    durations = defaultdict(list)
+    path_time = defaultdict(lambda: defaultdict(float))
+    errors = defaultdict(int)
+    for root in roots:
+        durations[root["name"]].append(duration_ms(root))
+        if root["status"]["code"] == "ERROR":
+            errors[root["name"]] += 1
+        for span in critical_path(root, children):
+            path_time[root["name"]][span["name"]] += duration_ms(span)
+
+    print("Trace Critical Paths")
+    print(f"{len(spans)} spans in {len(roots)} traces from {args.file}")
+    print("=" * 50)
+
+    ranked = sorted(durations, key=lambda name: percentile(durations[name], 95), reverse=True)
+    for name in ranked[:args.top]:
+        samples = durations[name]
+        print(f"\n{name}: {len(samples)} traces, {errors[name]} errors, "
+              f"p50 {percentile(samples, 50):.1f} ms, p95 {percentile(samples, 95):.1f} ms")
+        total = sum(samples)
+        for span_name, time_ms in sorted(path_time[name].items(), key=lambda item: item[1], reverse=True):
+            print(f"   {span_name:<50} {time_ms / len(samples):8.1f} ms/trace   {time_ms / total * 100:5.1f}% of endpoint time")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for AgentService chain construction
+Compares per-request CPU time and allocations of building the LLMChain and
+format instructions on every request against the pre-built chains,
+using an offline stub chat model
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# Add the backend directory to Python path
+sys.path.append('apps/backend')
+
+# The stub below replaces the OpenAI model, the key is never used
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+from langchain.chains import LLMChain
+
+from bench_draft_modes import StubChatModel
+from services.agent_service import AgentService
+from services.wallet_service import WalletService
+
+with open("data/rvo/examples/requirements.json") as f:
+    REQUIREMENTS = json.load(f)
+
+
+async def per_request_chain(agent: AgentService, summary: str):
+    """How create_draft ran before: a new chain and format instructions per call"""
+    chain = LLMChain(
+        llm=agent.llm,
+        prompt=agent.draft_prompt,
+        output_parser=agent.output_parser
+    )
+    return await chain.arun(
+        available_credentials=summary,
+        additional_requirements=REQUIREMENTS["additionalInformation"],
+        format_instructions=agent.output_parser.get_format_instructions()
+    )
+
+
+async def prebuilt_chain(agent: AgentService, summary: str):
+    return await agent.draft_chain.arun(
+        available_credentials=summary,
+        additional_requirements=REQUIREMENTS["additionalInformation"]
+    )
+
+
+async def measure(name: str, call, agent: AgentService, summary: str, requests: int):
+    # Warm up imports and lazily built objects
+    for _ in range(10):
+        await call(agent, summary)
+
+    started = time.process_time()
+    for _ in range(requests):
+        await call(agent, summary)
+    cpu_us = (time.process_time() - started) / requests * 1e6
+
+    tracemalloc.start()
+    peaks = []
+    allocated = []
+    for _ in range(min(requests, 100)):
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        await call(agent, summary)
+        after = tracemalloc.take_snapshot()
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        allocated.append(sum(stat.size_diff for stat in after.compare_to(before, "filename") if stat.size_diff > 0))
+    tracemalloc.stop()
+
+    print(f"   {name:<18} cpu {cpu_us:8.1f} us/request   "
+          f"peak {sum(peaks) / len(peaks) / 1024:8.1f} KiB   retained {sum(allocated) / len(allocated) / 1024:6.1f} KiB")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-request chain overhead")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per variant")
+    args = parser.parse_args()
+
+    agent = AgentService()
+    agent.llm = StubChatModel(median_latency=0.0)
+    summary = agent._summarize_credentials(await WalletService().get_all_credentials())
+
+    print("Agent Chain Overhead Benchmark")
+    print("=" * 50)
+    await measure("per-request chain", per_request_chain, agent, summary, args.requests)
+    await measure("pre-built chain", prebuilt_chain, agent, summary, args.requests)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
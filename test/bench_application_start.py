@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark for POST /api/application/start
+Starts the RVO stub (apps/backend/rvo_stub.py) and gives every call a new
+entrepreneur whose wallet is not loaded yet, so each start pays for both
+the RVO requirements call and a wallet load. Compares the former
+sequential steps (requirements, then available credentials, then missing
+credentials) with the concurrent ones (wallet loaded while RVO answers,
+credentials resolved in one pass), and reports the endpoint itself.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+# Add the backend directory to Python path
+sys.path.append('apps/backend')
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def write_wallets(directory: Path, entrepreneurs: int, credentials: int) -> None:
+    """Write a wallet directory per entrepreneur from the data/wallet credentials"""
+    templates = []
+    for file_path in sorted(Path("data/wallet").glob("*.json")):
+        with open(file_path) as f:
+            templates.append(json.load(f))
+    for e in range(entrepreneurs):
+        wallet_dir = directory / f"entrepreneur_{e:05d}"
+        wallet_dir.mkdir()
+        for i in range(credentials):
+            template = templates[i % len(templates)]
+            with open(wallet_dir / f"credential_{i:04d}.json", "w") as f:
+                json.dump(dict(template, id=f"{template.get('id', 'credential')}_{i:04d}"), f)
+
+
+async def run(args, wallet_dir: Path):
+    os.environ.update({
+        "LLM_PROVIDER": "fake",
+        "DRAFT_CACHE_PATH": "",
+        "TRACE_EXPORTER": "none",
+        "RVO_API_URL": f"http://127.0.0.1:{args.port}",
+        # Ask RVO on every start, as before the requirements were cached
+        "RVO_REQUIREMENTS_TTL": "0",
+        "RVO_REQUIREMENTS_STALE": "0",
+        "WALLET_RELOAD_INTERVAL": "0"
+    })
+    from main import app, rvo_service, wallet_service
+    wallet_service.data_dir = wallet_dir
+    entrepreneurs = iter(range(args.starts * 3))
+
+    async def sequential_start():
+        entrepreneur_id = f"entrepreneur_{next(entrepreneurs):05d}"
+        rvo_response = await rvo_service.get_requirements()
+        requested = rvo_response["requirements"]["requestedCredentials"]
+        await wallet_service.get_available_credentials(requested, entrepreneur_id)
+        await wallet_service.get_missing_credentials_for_requirements(requested, entrepreneur_id)
+
+    async def concurrent_start():
+        entrepreneur_id = f"entrepreneur_{next(entrepreneurs):05d}"
+        rvo_response, _ = await asyncio.gather(rvo_service.get_requirements(), wallet_service.warm_up(entrepreneur_id))
+        await wallet_service.resolve(rvo_response["requirements"]["requestedCredentials"], entrepreneur_id)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+            async def endpoint_start():
+                entrepreneur_id = f"entrepreneur_{next(entrepreneurs):05d}"
+                response = await client.post("/api/application/start", json={"entrepreneurId": entrepreneur_id})
+                response.raise_for_status()
+
+            # Open the connection to the stub before measuring
+            await rvo_service.get_requirements()
+            for name, start in (("sequential", sequential_start), ("concurrent", concurrent_start), ("endpoint", endpoint_start)):
+                semaphore = asyncio.Semaphore(args.concurrency)
+                latencies = []
+
+                async def one():
+                    async with semaphore:
+                        started = time.perf_counter()
+                        await start()
+                        latencies.append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                await asyncio.gather(*[one() for _ in range(args.starts)])
+                elapsed = time.perf_counter() - started
+                print(f"   {name:<10} {args.starts / elapsed:8.1f} starts/s   p50 {percentile(latencies, 50) * 1000:7.1f} ms   "
+                      f"p95 {percentile(latencies, 95) * 1000:7.1f} ms   p99 {percentile(latencies, 99) * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark starting applications with cold wallets against the RVO stub")
+    parser.add_argument("--starts", type=int, default=100, help="Application starts per variant")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent starts")
+    parser.add_argument("--credentials", type=int, default=500, help="Credential files per entrepreneur wallet")
+    parser.add_argument("--latency", type=float, default=0.05, help="Median stub latency in seconds")
+    parser.add_argument("--port", type=int, default=8767, help="Port for the stub")
+    args = parser.parse_args()
+
+    env = {**os.environ, "RVO_STUB_LATENCY": str(args.latency), "RVO_STUB_LATENCY_SIGMA": "0.1", "TRACE_EXPORTER": "none"}
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "rvo_stub:app", "--app-dir", "apps/backend", "--port", str(args.port), "--log-level", "warning"],
+        env=env
+    )
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            wallet_dir = Path(tmp)
+            write_wallets(wallet_dir, args.starts * 3, args.credentials)
+            for _ in range(50):
+                try:
+                    httpx.get(f"http://127.0.0.1:{args.port}/stub/stats")
+                    break
+                except httpx.HTTPError:
+                    time.sleep(0.1)
+
+            print("Application Start Benchmark")
+            print(f"{args.starts} starts, {args.concurrency} concurrent, {args.credentials} credentials per wallet, "
+                  f"stub latency {args.latency * 1000:.0f} ms")
+            print("=" * 50)
+            asyncio.run(run(args, wallet_dir))
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the application store backends
+Measures store latency at 10k, 100k and 1M applications
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Add the backend directory to Python path
+sys.path.append('apps/backend')
+
+from services.application_store import InMemoryApplicationStore, SqliteApplicationStore
+
+STATUSES = ["started", "draft_created", "ready_for_confirmation", "confirmed", "submitted"]
+
+
+def make_application(index: int, entrepreneurs: int, start: datetime) -> dict:
+    """Build an application record shaped like the ones main.py stores"""
+    return {
+        "id": f"app-{index:08d}",
+        "entrepreneurId": f"entrepreneur-{index % entrepreneurs:06d}",
+        "status": random.choice(STATUSES),
+        "requirements": {"requestedCredentials": ["authentication", "kvkNumber"], "additionalInformation": []},
+        "availableCredentials": [],
+        "missingCredentials": [],
+        "createdAt": (start + timedelta(milliseconds=index)).isoformat()
+    }
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def measure(name: str, operation, ops: int):
+    samples = []
+    for i in range(ops):
+        started = time.perf_counter()
+        await operation(i)
+        samples.append((time.perf_counter() - started) * 1e6)
+    print(f"   {name:<24} p50 {percentile(samples, 50):9.1f} us   p99 {percentile(samples, 99):9.1f} us")
+
+
+async def bench_store(store, size: int, ops: int):
+    entrepreneurs = max(1, size // 10)
+    start = datetime(2024, 1, 1)
+
+    started = time.perf_counter()
+    for i in range(size):
+        await store.create(make_application(i, entrepreneurs, start))
+    elapsed = time.perf_counter() - started
+    print(f"   {'seed':<24} {size / elapsed:9.0f} inserts/s ({elapsed:.1f}s)")
+
+    ids = [f"app-{random.randrange(size):08d}" for _ in range(ops)]
+    owners = [f"entrepreneur-{random.randrange(entrepreneurs):06d}" for _ in range(ops)]
+    window_start = (start + timedelta(milliseconds=size // 2)).isoformat()
+    window_end = (start + timedelta(milliseconds=size // 2 + 50)).isoformat()
+
+    await measure("get", lambda i: store.get(ids[i]), ops)
+    await measure("update (status)", lambda i: store.update(ids[i], {"status": STATUSES[i % len(STATUSES)]}), ops)
+    await measure("list_by_entrepreneur(5)", lambda i: store.list_by_entrepreneur(owners[i], 5), ops)
+    await measure("list_by_status(20)", lambda i: store.list_by_status(STATUSES[i % len(STATUSES)], 20), ops)
+    await measure("list_created_between", lambda i: store.list_created_between(window_start, window_end), ops)
+    await measure("list_recent(5)", lambda i: store.list_recent(5), ops)
+    await measure("list_recent(5, owner)", lambda i: store.list_recent(5, owners[i]), ops)
+    await measure("count_by_status", lambda i: store.count_by_status(), min(ops, 50))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark application store backends")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma separated store sizes")
+    parser.add_argument("--backends", default="memory,sqlite", help="Comma separated backends")
+    parser.add_argument("--ops", type=int, default=2000, help="Operations measured per query type")
+    args = parser.parse_args()
+
+    random.seed(42)
+    print("Application Store Benchmark")
+    print("=" * 50)
+
+    for size in [int(s) for s in args.sizes.split(",")]:
+        for backend in args.backends.split(","):
+            print(f"\n{backend} backend, {size:,} applications")
+            if backend == "memory":
+                await bench_store(InMemoryApplicationStore(), size, args.ops)
+            else:
+                with tempfile.TemporaryDirectory() as tmp:
+                    store = SqliteApplicationStore(os.path.join(tmp, "applications.db"))
+                    await store.open()
+                    await bench_store(store, size, args.ops)
+                    await store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark for attestation proof modes
+Compares the embedded JWT proof, which carries the credential subject in
+its payload, with the detached JWS over the subject digest:
+proof and attestation size, creation time and JSON serialisation time
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+# Add the backend directory to Python path
+sys.path.append('apps/backend')
+
+from services.attestation_service import AttestationService
+from services.wallet_service import WalletService
+
+ADDITIONAL_INFORMATION = {
+    "projectLocationDHI": "Nairobi, Kenya",
+    "applicantRole": "single entrepreneur",
+    "applicationTypeOrConsortium": "demonstration",
+    "targetSector": "water",
+    "startDate": "2025-01-01",
+    "endDate": "2025-12-31"
+}
+
+
+async def measure(mode: str, credentials: list, iterations: int):
+    os.environ["ATTESTATION_PROOF_MODE"] = mode
+    service = AttestationService()
+
+    attestation = await service.create_attestation("bench-app", credentials, ADDITIONAL_INFORMATION)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await service.create_attestation("bench-app", credentials, ADDITIONAL_INFORMATION)
+    create_us = (time.perf_counter() - started) / iterations * 1e6
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        body = json.dumps(attestation)
+    dumps_us = (time.perf_counter() - started) / iterations * 1e6
+
+    proof_bytes = len(attestation["proof"]["jws"])
+    print(f"   {mode:<9} proof {proof_bytes:7d} B   attestation {len(body):7d} B   "
+          f"create {create_us:8.1f} us   json.dumps {dumps_us:8.1f} us")
+    return len(body)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark attestation proof modes")
+    parser.add_argument("--iterations", type=int, default=2000, help="Attestations per mode")
+    parser.add_argument("--copies", type=int, default=1, help="Repeat the wallet credentials to grow the subject")
+    args = parser.parse_args()
+
+    credentials = await WalletService().get_all_credentials()
+    credentials = [
+        {**cred, "credentialSubject": {f"{key}_{copy}" if copy else key: value for key, value in cred.get("credentialSubject", {}).items()}}
+        for copy in range(args.copies)
+        for cred in credentials
+    ]
+
+    print("Attestation Proof Benchmark")
+    print(f"{len(credentials)} wallet credentials, {args.iterations} attestations per mode")
+    print("=" * 50)
+    embedded = await measure("embedded", credentials, args.iterations)
+    detached = await measure("detached", credentials, args.iterations)
+    print(f"   Detached attestations are {(embedded - detached) / embedded * 100:.1f}% smaller")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark for attestation verification
+Verifies the same unique attestations one by one on the event loop, as a
+batch on the process pool, and again as a batch answered from the
+verified-token cache
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Add the backend directory to Python path
+sys.path.append('apps/backend')
+
+from services.attestation_service import AttestationService, VerifiedTokenCache
+
+ADDITIONAL_INFORMATION = {
+    "projectLocationDHI": "Nairobi, Kenya",
+    "applicantRole": "single entrepreneur",
+    "targetSector": "water"
+}
+
+
+def report(name: str, count: int, elapsed: float, valid: int):
+    print(f"   {name:<22} {elapsed * 1000:9.1f} ms   {count / elapsed:9.0f} attestations/s   {valid}/{count} valid")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark attestation verification")
+    parser.add_argument("--attestations", type=int, default=5000, help="Unique attestations to verify")
+    parser.add_argument("--workers", type=int, default=0, help="Verification processes (0: one per CPU)")
+    parser.add_argument("--mode", default="embedded", help="ATTESTATION_PROOF_MODE of the attestations")
+    args = parser.parse_args()
+
+    os.environ["ATTESTATION_PROOF_MODE"] = args.mode
+    os.environ["ATTESTATION_VERIFY_WORKERS"] = str(args.workers)
+    key_dir = tempfile.TemporaryDirectory(prefix="bench-keys-")
+    os.environ["ATTESTATION_KEY_DIR"] = key_dir.name
+
+    issuer = AttestationService()
+    credentials = [{"type": "BusinessRegistration", "credentialSubject": {"kvkNumber": "12345678", "name": "Bench BV"}}]
+    attestations = [
+        await issuer.create_attestation(f"bench-{i}", credentials, ADDITIONAL_INFORMATION)
+        for i in range(args.attestations)
+    ]
+
+    print("Attestation Verification Benchmark")
+    print(f"{args.attestations} {args.mode} attestations, {issuer.verify_workers} worker processes")
+    print("=" * 50)
+
+    sequential = AttestationService()
+    started = time.perf_counter()
+    valid = sum([await sequential.verify_attestation(attestation) for attestation in attestations])
+    report("sequential", len(attestations), time.perf_counter() - started, valid)
+
+    batch = AttestationService()
+    # Start the worker processes outside the measurement
+    await batch.verify_attestations(attestations[:batch.verify_workers])
+    batch.verify_cache = VerifiedTokenCache(len(attestations))
+    for name in ("batch (process pool)", "batch (cached)"):
+        started = time.perf_counter()
+        results = await batch.verify_attestations(attestations)
+        report(name, len(attestations), time.perf_counter() - started, sum(1 for result in results if result["valid"]))
+    batch.shutdown()
+    key_dir.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
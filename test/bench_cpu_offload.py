@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark for offloading CPU-bound work from the event loop
+Generates large attestations in the background while probing an unrelated
+endpoint, once per CPU_EXECUTOR setting (each in its own process), and
+reports the probe latency percentiles and the attestation throughput
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+# Add the backend directory to Python path
+sys.path.append('apps/backend')
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(args) -> dict:
+    """Measure with the executor this process was started with"""
+    os.environ.setdefault("LLM_PROVIDER", "fake")
+    os.environ.setdefault("DRAFT_CACHE_PATH", "")
+    from main import app, attestation_service
+
+    credentials = [{
+        "type": "BusinessRegistration",
+        "credentialSubject": {f"field{i}": f"value {i} " * 8 for i in range(args.fields)}
+    }]
+    stop = asyncio.Event()
+    attestations = [0]
+
+    async def generate():
+        while not stop.is_set():
+            await attestation_service.create_attestation("bench-app", credentials, {"targetSector": "water"})
+            attestations[0] += 1
+            # With the inline executor nothing above yields to the event loop
+            await asyncio.sleep(0)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.get("/api/application/warmup")
+            generators = [asyncio.create_task(generate()) for _ in range(args.generators)]
+            latencies = []
+            started = time.perf_counter()
+            scheduled = started
+            while scheduled - started < args.duration:
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+                await client.get("/api/application/unknown")
+                # Latency from when the probe was due, so time the event loop
+                # was blocked before it could send the request counts too
+                finished = time.perf_counter()
+                latencies.append(finished - scheduled)
+                scheduled = max(scheduled + args.interval, finished)
+            stop.set()
+            await asyncio.gather(*generators)
+
+    return {
+        "probes": len(latencies),
+        "p50Ms": percentile(latencies, 50) * 1000,
+        "p95Ms": percentile(latencies, 95) * 1000,
+        "p99Ms": percentile(latencies, 99) * 1000,
+        "maxMs": max(latencies) * 1000,
+        "attestationsPerSecond": attestations[0] / args.duration
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark event loop latency while attestations are generated")
+    parser.add_argument("--executors", default="inline,thread,process", help="CPU_EXECUTOR settings to compare")
+    parser.add_argument("--fields", type=int, default=2000, help="Credential subject fields per attestation")
+    parser.add_argument("--generators", type=int, default=4, help="Concurrent attestation generators")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per executor")
+    parser.add_argument("--interval", type=float, default=0.005, help="Seconds between probe requests")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run(args))))
+        return
+
+    print("CPU Offload Benchmark")
+    print(f"{args.generators} generators of {args.fields}-field attestations, probing GET /api/application/{{id}}")
+    print("=" * 50)
+    print(f"   {'executor':<9} {'probes':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'attestations/s':>15}")
+    for executor in args.executors.split(","):
+        env = {**os.environ, "CPU_EXECUTOR": executor, "TRACE_EXPORTER": "none"}
+        output = subprocess.run(
+            [sys.executable, "-W", "ignore", __file__, "--child", "--fields", str(args.fields),
+             "--generators", str(args.generators), "--duration", str(args.duration), "--interval", str(args.interval)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"   {executor:<9} {result['probes']:7d} {result['p50Ms']:8.2f} {result['p95Ms']:8.2f} {result['p99Ms']:8.2f} "
+              f"{result['maxMs']:8.2f} {result['attestationsPerSecond']:15.1f}")
+
+
+if __name__ == "__main__":
+    main()
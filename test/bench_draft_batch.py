@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark for batch draft generation
+Compares drafts per second of sequential create_draft calls against
+create_drafts_batch for a cohort of applications, using an offline stub
+chat model
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import random
+import sys
+import time
+
+# Add the backend directory to Python path
+sys.path.append('apps/backend')
+
+# The stub below replaces the OpenAI model, the key is never used
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+from bench_draft_modes import StubChatModel
+from services.agent_service import AgentService
+from services.draft_cache import DraftCache
+from services.wallet_service import WalletService
+
+with open("data/rvo/examples/requirements.json") as f:
+    REQUIREMENTS = json.load(f)
+
+
+def build_cohort(credentials: list, size: int, unique: int) -> list:
+    """Applications whose credentials differ in `unique` distinct ways"""
+    items = []
+    for i in range(size):
+        creds = copy.deepcopy(credentials)
+        for cred in creds:
+            if "kvkNumber" in cred.get("credentialSubject", {}):
+                cred["credentialSubject"]["kvkNumber"] = f"{i % unique:08d}"
+        items.append({
+            "applicationId": f"bench-{i}",
+            "availableCredentials": creds,
+            "additionalRequirements": REQUIREMENTS["additionalInformation"]
+        })
+    return items
+
+
+def new_agent(mode: str, latency: float) -> AgentService:
+    agent = AgentService()
+    agent.draft_mode = mode
+    agent.llm = StubChatModel(median_latency=latency)
+    # Measure generation, not cache hits
+    agent.draft_cache = DraftCache(max_entries=0, db_path=None)
+    return agent
+
+
+async def sequential(agent: AgentService, items: list, concurrency: int) -> int:
+    for item in items:
+        await agent.create_draft(item["applicationId"], item["availableCredentials"], item["additionalRequirements"])
+    return len(items)
+
+
+async def batch(agent: AgentService, items: list, concurrency: int) -> int:
+    drafts = 0
+    async for _ in agent.create_drafts_batch(items, concurrency):
+        drafts += 1
+    return drafts
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch draft generation")
+    parser.add_argument("--drafts", type=int, default=100, help="Applications in the cohort")
+    parser.add_argument("--unique", type=int, default=50, help="Distinct prompt inputs in the cohort")
+    parser.add_argument("--concurrency", type=int, default=16, help="Batch max_concurrency")
+    parser.add_argument("--latency", type=float, default=0.1, help="Median stub LLM latency in seconds")
+    args = parser.parse_args()
+
+    random.seed(42)
+    items = build_cohort(await WalletService().get_all_credentials(), args.drafts, args.unique)
+
+    print("Batch Draft Benchmark")
+    print(f"{args.drafts} applications, {args.unique} distinct inputs, stub LLM median latency {args.latency * 1000:.0f} ms")
+    print("=" * 50)
+
+    for mode in ["hybrid", "llm"]:
+        for name, run in [("sequential", sequential), ("batch", batch)]:
+            started = time.perf_counter()
+            drafts = await run(new_agent(mode, args.latency), items, args.concurrency)
+            elapsed = time.perf_counter() - started
+            print(f"   {mode:<7} {name:<11} {drafts / elapsed:9.1f} drafts/s   ({elapsed:.2f} s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the draft modes of AgentService
+Compares p50/p99 create_draft latency for rules, hybrid and llm modes
+using an offline stub chat model
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, List, Optional
+
+# Add the backend directory to Python path
+sys.path.append('apps/backend')
+
+# The stub below replaces the OpenAI model, the key is never used
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from services.agent_service import AgentService
+from services.draft_cache import DraftCache
+from services.wallet_service import WalletService
+
+with open("data/rvo/examples/requirements.json") as f:
+    REQUIREMENTS = json.load(f)
+
+
+class StubChatModel(BaseChatModel):
+    """Answers draft and guidance prompts after a log-normal delay"""
+
+    median_latency: float = 0.3
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _respond(self, messages: List[BaseMessage]) -> ChatResult:
+        prompt = messages[0].content
+        if "free-text fields" in prompt:
+            content = json.dumps({field: f"Guidance for {field}" for field in ["demonstration", "feasibility", "exportMultiplierStatement"]})
+        else:
+            content = json.dumps({
+                "walletCredentials": [],
+                "additionalInformation": {},
+                "missingFields": REQUIREMENTS["additionalInformation"],
+                "guidance": {field: f"Guidance for {field}" for field in REQUIREMENTS["additionalInformation"]},
+                "status": "draft"
+            })
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.median_latency * random.lognormvariate(0, 0.5))
+        return self._respond(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.median_latency * random.lognormvariate(0, 0.5))
+        return self._respond(messages)
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def bench_mode(mode: str, credentials: list, drafts: int, concurrency: int, latency: float) -> list:
+    agent = AgentService()
+    agent.draft_mode = mode
+    agent.llm = StubChatModel(median_latency=latency)
+    # Measure generation, not cache hits
+    agent.draft_cache = DraftCache(max_entries=0, db_path=None)
+
+    samples = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            await agent.create_draft(f"bench-{i}", credentials, REQUIREMENTS["additionalInformation"])
+            samples.append(time.perf_counter() - started)
+
+    await asyncio.gather(*[one(i) for i in range(drafts)])
+    return samples
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark draft modes")
+    parser.add_argument("--drafts", type=int, default=200, help="Drafts per mode")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent drafts")
+    parser.add_argument("--latency", type=float, default=0.3, help="Median stub LLM latency in seconds")
+    args = parser.parse_args()
+
+    random.seed(42)
+    credentials = await WalletService().get_all_credentials()
+
+    print("Draft Mode Benchmark")
+    print(f"Stub LLM median latency: {args.latency * 1000:.0f} ms")
+    print("=" * 50)
+
+    for mode in ["rules", "hybrid", "llm"]:
+        samples = await bench_mode(mode, credentials, args.drafts, args.concurrency, args.latency)
+        print(f"   {mode:<8} p50 {percentile(samples, 50) * 1000:9.3f} ms   p99 {percentile(samples, 99) * 1000:9.3f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark for credential prompt compaction
+Compares prompt tokens and summary time of the indented JSON credential
+summary against the compact summary of the requested fields
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+# Add the backend directory to Python path
+sys.path.append('apps/backend')
+
+from services.prompt_compaction import PromptCompactor
+from services.wallet_service import WalletService
+
+with open("data/rvo/examples/requirements.json") as f:
+    REQUIREMENTS = json.load(f)
+
+
+def json_summary(credentials: list) -> str:
+    """How credentials were summarized before compaction"""
+    return "\n".join(
+        f"{cred.get('type', 'Unknown')}: {json.dumps(cred.get('credentialSubject', {}), indent=2)}"
+        for cred in credentials
+    )
+
+
+def measure(name: str, summarize, compactor: PromptCompactor, iterations: int):
+    summary = summarize()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        summarize()
+    elapsed_us = (time.perf_counter() - started) / iterations * 1e6
+    print(f"   {name:<14} {compactor.count_tokens(summary):6d} tokens   {len(summary):6d} chars   {elapsed_us:8.1f} us/summary")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark credential prompt compaction")
+    parser.add_argument("--iterations", type=int, default=2000, help="Summaries per variant")
+    parser.add_argument("--budget", type=int, default=1000, help="Token budget of the compact summary")
+    args = parser.parse_args()
+
+    credentials = await WalletService().get_all_credentials()
+    compactor = PromptCompactor(token_budget=args.budget)
+
+    print("Prompt Compaction Benchmark")
+    print("=" * 50)
+    measure("indented JSON", lambda: json_summary(credentials), compactor, args.iterations)
+    measure("compact", lambda: compactor.summarize(credentials, REQUIREMENTS["requestedCredentials"]), compactor, args.iterations)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the RVO requirements cache
+Starts the RVO stub (apps/backend/rvo_stub.py) on a copy of the example
+requirements, then calls get_requirements from concurrent workers, once
+fetching the catalog on every call and once through the requirements
+cache with a short TTL. Halfway through the cached run the requirements
+file is changed, to check that revalidation picks the change up. Reports
+throughput, latency percentiles, the cache hit rate and the requests the
+stub answered with 200 or 304.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+# Add the backend directory to Python path
+sys.path.append('apps/backend')
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def measure(name: str, call, args, base_url: str, halfway=None):
+    latencies = []
+    stop_at = time.perf_counter() + args.duration
+
+    async def worker():
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started)
+            # A cache hit never yields to the event loop
+            await asyncio.sleep(0)
+
+    async with httpx.AsyncClient(base_url=base_url) as stats_client:
+        before = (await stats_client.get("/stub/stats")).json()
+        workers = [asyncio.create_task(worker()) for _ in range(args.concurrency)]
+        if halfway is not None:
+            await asyncio.sleep(args.duration / 2)
+            halfway()
+        await asyncio.gather(*workers)
+        after = (await stats_client.get("/stub/stats")).json()
+
+    requests = after["requests"] - before["requests"]
+    not_modified = after["notModified"] - before["notModified"]
+    print(f"   {name:<9} {len(latencies) / args.duration:10.1f} calls/s   p50 {percentile(latencies, 50) * 1000:8.3f} ms   "
+          f"p99 {percentile(latencies, 99) * 1000:8.3f} ms   {requests - not_modified:5d} x 200   {not_modified:4d} x 304")
+
+
+async def run(args, requirements_path: str):
+    base_url = f"http://127.0.0.1:{args.port}"
+    os.environ.update({
+        "RVO_API_URL": base_url,
+        "RVO_REQUIREMENTS_TTL": str(args.ttl),
+        "RVO_REQUIREMENTS_STALE": str(args.stale)
+    })
+    from services.metrics import RVO_REQUIREMENTS_CACHE, RVO_REQUIREMENTS_REVALIDATIONS
+    from services.rvo_service import RvoService
+
+    rvo_service = RvoService()
+
+    async def uncached_call():
+        await rvo_service.client.request("GET", "/dhi/requirements", "get_requirements")
+
+    def change_requirements():
+        with open(requirements_path) as f:
+            requirements = json.load(f)
+        requirements["requestedCredentials"].append("benchmarkCredential")
+        with open(requirements_path, "w") as f:
+            json.dump(requirements, f)
+
+    await measure("uncached", uncached_call, args, base_url)
+    await measure("cached", rvo_service.get_requirements, args, base_url, halfway=change_requirements)
+
+    # Let a revalidation that is still running finish, then check the change arrived
+    await asyncio.sleep(args.ttl + 0.5)
+    await rvo_service.get_requirements()
+    await asyncio.sleep(0.5)
+    latest = await rvo_service.get_requirements()
+    await rvo_service.aclose()
+
+    results = {result: RVO_REQUIREMENTS_CACHE.value("requirements", result) for result in ("hit", "stale", "expired", "miss")}
+    total = sum(results.values())
+    print("=" * 50)
+    print(f"   hit rate {results['hit'] / total:.2%}   " + "   ".join(f"{result} {int(count)}" for result, count in results.items()))
+    print("   revalidations   " + "   ".join(
+        f"{outcome} {int(RVO_REQUIREMENTS_REVALIDATIONS.value('requirements', outcome))}"
+        for outcome in ("not_modified", "modified", "error")
+    ))
+    changed = "benchmarkCredential" in latest["requirements"]["requestedCredentials"]
+    print(f"   changed requirements picked up: {'yes' if changed else 'no'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the RVO requirements cache against the RVO stub")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per run")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent callers")
+    parser.add_argument("--latency", type=float, default=0.05, help="Median stub latency in seconds")
+    parser.add_argument("--ttl", type=float, default=1.0, help="RVO_REQUIREMENTS_TTL for the cached run")
+    parser.add_argument("--stale", type=float, default=60.0, help="RVO_REQUIREMENTS_STALE for the cached run")
+    parser.add_argument("--port", type=int, default=8766, help="Port for the stub")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_requirements_")
+    requirements_path = os.path.join(workdir, "requirements.json")
+    shutil.copy("data/rvo/examples/requirements.json", requirements_path)
+    env = {**os.environ, "RVO_STUB_LATENCY": str(args.latency), "RVO_STUB_REQUIREMENTS": requirements_path, "TRACE_EXPORTER": "none"}
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "rvo_stub:app", "--app-dir", "apps/backend", "--port", str(args.port), "--log-level", "warning"],
+        env=env
+    )
+    try:
+        for _ in range(50):
+            try:
+                httpx.get(f"http://127.0.0.1:{args.port}/stub/stats")
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+
+        print("RVO Requirements Cache Benchmark")
+        print(f"{args.concurrency} callers for {args.duration:.0f} s each, stub latency {args.latency * 1000:.0f} ms, TTL {args.ttl:g} s")
+        print("=" * 50)
+        os.environ["TRACE_EXPORTER"] = "none"
+        asyncio.run(run(args, requirements_path))
+    finally:
+        stub.terminate()
+        stub.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
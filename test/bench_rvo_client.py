@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the RVO client
+Starts the RVO stub (apps/backend/rvo_stub.py) with simulated latency and
+failures, then sends the same concurrent requirement and status calls with
+a new connection per call (no pooling, no retries) and with the pooled,
+retrying RvoClient. Reports throughput, latency percentiles, success rate
+and the connections the stub saw.
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+# Add the backend directory to Python path
+sys.path.append('apps/backend')
+
+from services.rvo_client import CircuitBreaker, RvoClient, RvoError
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def unpooled_call(base_url: str, path: str) -> None:
+    """How a call looks without a shared client: a new connection, one attempt"""
+    async with httpx.AsyncClient(base_url=base_url, timeout=10) as client:
+        response = await client.get(path)
+        response.raise_for_status()
+
+
+async def measure(name: str, call, requests: int, concurrency: int, base_url: str):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], [0]
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await call("/dhi/requirements")
+            except (httpx.HTTPError, RvoError):
+                failures[0] += 1
+            latencies.append(time.perf_counter() - started)
+
+    async with httpx.AsyncClient(base_url=base_url) as stats_client:
+        before = (await stats_client.get("/stub/stats")).json()
+        started = time.perf_counter()
+        await asyncio.gather(*[one(i) for i in range(requests)])
+        elapsed = time.perf_counter() - started
+        after = (await stats_client.get("/stub/stats")).json()
+
+    print(f"   {name:<10} {requests / elapsed:8.1f} req/s   p50 {percentile(latencies, 50) * 1000:7.1f} ms   "
+          f"p99 {percentile(latencies, 99) * 1000:7.1f} ms   {(requests - failures[0]) / requests * 100:5.1f}% ok   "
+          f"{after['requests'] - before['requests']:5d} attempts   {after['connections'] - before['connections']:5d} connections")
+
+
+async def run(args):
+    base_url = f"http://127.0.0.1:{args.port}"
+    # Keep failing calls retrying rather than tripping the breaker, to compare success rates
+    client = RvoClient(
+        base_url, max_retries=args.retries, backoff_base=0.05, backoff_max=1.0,
+        breaker=CircuitBreaker(threshold=10 ** 9), max_keepalive=args.concurrency
+    )
+
+    async def pooled_call(path: str) -> None:
+        await client.request("GET", path, "get_requirements")
+
+    await measure("unpooled", lambda path: unpooled_call(base_url, path), args.requests, args.concurrency, base_url)
+    await measure("pooled", pooled_call, args.requests, args.concurrency, base_url)
+    await client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the RVO client against the RVO stub")
+    parser.add_argument("--requests", type=int, default=2000, help="Calls per client")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent calls")
+    parser.add_argument("--latency", type=float, default=0.02, help="Median stub latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Share of stub responses that are 503")
+    parser.add_argument("--retries", type=int, default=3, help="Retries of the pooled client")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the stub")
+    args = parser.parse_args()
+
+    env = {**os.environ, "RVO_STUB_LATENCY": str(args.latency), "RVO_STUB_ERROR_RATE": str(args.error_rate), "TRACE_EXPORTER": "none"}
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "rvo_stub:app", "--app-dir", "apps/backend", "--port", str(args.port), "--log-level", "warning"],
+        env=env
+    )
+    try:
+        for _ in range(50):
+            try:
+                httpx.get(f"http://127.0.0.1:{args.port}/stub/stats")
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+
+        print("RVO Client Benchmark")
+        print(f"{args.requests} calls, {args.concurrency} concurrent, stub latency {args.latency * 1000:.0f} ms, {args.error_rate:.0%} errors")
+        print("=" * 50)
+        asyncio.run(run(args))
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    main()
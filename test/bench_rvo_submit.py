@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark for submitting applications to RVO
+Starts the RVO stub (apps/backend/rvo_stub.py) with simulated latency and
+failures and submits confirmed applications concurrently, once inline as
+/api/rvo/submit used to (the request waits for RVO) and once through the
+endpoint, which queues the submission in the outbox. For each worker pool
+size it reports the endpoint latency and how fast the workers drain the
+outbox.
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+
+import httpx
+
+# Add the backend directory to Python path
+sys.path.append('apps/backend')
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(name: str, latencies: list, extra: str = "") -> None:
+    print(f"   {name:<12} p50 {percentile(latencies, 50) * 1000:8.1f} ms   p95 {percentile(latencies, 95) * 1000:8.1f} ms   "
+          f"p99 {percentile(latencies, 99) * 1000:8.1f} ms{extra}")
+
+
+async def run(args):
+    os.environ.update({
+        "LLM_PROVIDER": "fake",
+        "DRAFT_CACHE_PATH": "",
+        "TRACE_EXPORTER": "none",
+        "RVO_API_URL": f"http://127.0.0.1:{args.port}",
+        "SUBMISSION_STATUS_INTERVAL": "0",
+        "SUBMISSION_BACKOFF_BASE": "0.1"
+    })
+    import main
+    from services.submission_worker import create_submission_worker_pool
+
+    attestation = await main.attestation_service.create_attestation("bench-app", [], {"targetSector": "water"})
+
+    async def create_applications() -> list:
+        application_ids = [str(uuid.uuid4()) for _ in range(args.submissions)]
+        for application_id in application_ids:
+            await main.application_store.create({
+                "id": application_id,
+                "entrepreneurId": "bench",
+                "status": "confirmed",
+                "createdAt": datetime.now().isoformat()
+            })
+        return application_ids
+
+    async def concurrently(call, application_ids: list) -> list:
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies = []
+
+        async def one(application_id: str):
+            async with semaphore:
+                started = time.perf_counter()
+                await call(application_id)
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*[one(application_id) for application_id in application_ids])
+        return latencies
+
+    async def inline_submit(application_id: str):
+        try:
+            submission = await main.rvo_service.submit_application(application_id, attestation)
+        except Exception:
+            return
+        await main.application_store.update(application_id, {"submission": submission, "status": "submitted"})
+
+    async with main.app.router.lifespan_context(main.app):
+        await main.submission_workers.stop()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+            async def queued_submit(application_id: str):
+                response = await client.post("/api/rvo/submit", json={"applicationId": application_id, "attestation": attestation})
+                response.raise_for_status()
+
+            started = time.perf_counter()
+            latencies = await concurrently(inline_submit, await create_applications())
+            elapsed = time.perf_counter() - started
+            report("inline", latencies, f"   {args.submissions / elapsed:7.1f} submissions/s")
+
+            for workers in [int(w) for w in args.workers.split(",")]:
+                os.environ["SUBMISSION_WORKERS"] = str(workers)
+                main.submission_workers = create_submission_worker_pool(main.submission_outbox, main.rvo_service, main.application_store)
+                main.submission_workers.start()
+                application_ids = await create_applications()
+
+                started = time.perf_counter()
+                latencies = await concurrently(queued_submit, application_ids)
+                while True:
+                    counts = await main.submission_outbox.count_by_state()
+                    if not counts.get("pending"):
+                        break
+                    await asyncio.sleep(0.01)
+                drained = time.perf_counter() - started
+                statuses = [(await main.application_store.get(application_id))["status"] for application_id in application_ids]
+                report(f"queued x{workers}", latencies,
+                       f"   drained {args.submissions / drained:7.1f} submissions/s   "
+                       f"{statuses.count('submitted')} submitted, {counts.get('failed', 0)} failed")
+                await main.submission_workers.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inline against queued RVO submissions with the RVO stub")
+    parser.add_argument("--submissions", type=int, default=200, help="Submissions per run")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent submit requests")
+    parser.add_argument("--workers", default="1,4,16", help="Outbox worker pool sizes to compare")
+    parser.add_argument("--latency", type=float, default=0.2, help="Median stub latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Share of stub responses that are 503")
+    parser.add_argument("--port", type=int, default=8768, help="Port for the stub")
+    args = parser.parse_args()
+
+    env = {**os.environ, "RVO_STUB_LATENCY": str(args.latency), "RVO_STUB_ERROR_RATE": str(args.error_rate), "TRACE_EXPORTER": "none"}
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "rvo_stub:app", "--app-dir", "apps/backend", "--port", str(args.port), "--log-level", "warning"],
+        env=env
+    )
+    try:
+        for _ in range(50):
+            try:
+                httpx.get(f"http://127.0.0.1:{args.port}/stub/stats")
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+
+        print("RVO Submission Benchmark")
+        print(f"{args.submissions} submissions, {args.concurrency} concurrent, stub latency {args.latency * 1000:.0f} ms, "
+              f"{args.error_rate:.0%} errors")
+        print("=" * 50)
+        asyncio.run(run(args))
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmark for push-based application status updates
+Starts the backend with one uvicorn worker, opens thousands of Server-Sent
+Events subscriptions to /api/application/{id}/events, then submits every
+application so each one goes through queued, submitted and under_review.
+Reports the connect time, server memory per subscriber, the delay from a
+status change to its arrival at every subscriber, and the traffic compared
+with polling GET /api/application/{id} once per second.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+
+# Status changes per submitted application: queued, submitted, under_review
+EVENTS_PER_APPLICATION = 3
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class Subscriber:
+    """A minimal SSE client on a raw connection, so the benchmark client stays light"""
+
+    def __init__(self, port: int, path: str):
+        self.port = port
+        self.path = path
+        self.connected = asyncio.Event()
+        self.latencies = []
+        self.bytes = 0
+
+    async def run(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(f"GET {self.path} HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n\r\n".encode())
+        await writer.drain()
+        pushed = False
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                self.bytes += len(line)
+                # Events pushed after a change carry an id; the snapshot on connect does not
+                if line.startswith(b"id: "):
+                    pushed = True
+                elif line.startswith(b"data: "):
+                    if pushed:
+                        updated_at = datetime.fromisoformat(json.loads(line[6:])["updatedAt"])
+                        self.latencies.append((datetime.now() - updated_at).total_seconds())
+                        pushed = False
+                    else:
+                        self.connected.set()
+        finally:
+            writer.close()
+
+
+async def run(args):
+    base_url = f"http://127.0.0.1:{args.port}"
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        application_ids = []
+        for i in range(args.applications):
+            response = await client.post("/api/application/start", json={"entrepreneurId": f"bench-{i}"})
+            application_ids.append(response.json()["applicationId"])
+        record_bytes = len((await client.get(f"/api/application/{application_ids[0]}")).content)
+
+        server_pid = args.server_pid
+        rss_before = rss_mb(server_pid)
+        subscribers = [Subscriber(args.port, f"/api/application/{application_ids[i % len(application_ids)]}/events")
+                       for i in range(args.subscribers)]
+        started = time.perf_counter()
+        tasks = []
+        # Connect in waves, so the listen backlog does not overflow
+        for i in range(0, len(subscribers), args.connect_batch):
+            batch = subscribers[i:i + args.connect_batch]
+            tasks += [asyncio.create_task(subscriber.run()) for subscriber in batch]
+            await asyncio.gather(*[subscriber.connected.wait() for subscriber in batch])
+        connect_seconds = time.perf_counter() - started
+        rss_after = rss_mb(server_pid)
+
+        print(f"   {args.subscribers} subscribers connected in {connect_seconds:.2f} s   "
+              f"server memory {rss_before:.0f} -> {rss_after:.0f} MB "
+              f"({(rss_after - rss_before) * 1024 / args.subscribers:.1f} KB per subscriber)")
+
+        expected = args.subscribers * EVENTS_PER_APPLICATION
+        started = time.perf_counter()
+        probes = []
+        await asyncio.gather(*[
+            client.post("/api/rvo/submit", json={"applicationId": application_id, "attestation": {}})
+            for application_id in application_ids
+        ])
+        while sum(len(subscriber.latencies) for subscriber in subscribers) < expected:
+            if time.perf_counter() - started > args.timeout:
+                break
+            probe_started = time.perf_counter()
+            await client.get(f"/api/application/{application_ids[0]}")
+            probes.append(time.perf_counter() - probe_started)
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - started
+
+        latencies = [latency for subscriber in subscribers for latency in subscriber.latencies]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        metrics = (await client.get("/metrics")).text
+
+    event_bytes = sum(subscriber.bytes for subscriber in subscribers) / max(1, len(latencies) + args.subscribers)
+    print(f"   {len(latencies)}/{expected} events delivered in {elapsed:.2f} s   "
+          f"latency p50 {percentile(latencies, 50) * 1000:.1f} ms   p95 {percentile(latencies, 95) * 1000:.1f} ms   "
+          f"p99 {percentile(latencies, 99) * 1000:.1f} ms   max {max(latencies) * 1000:.1f} ms")
+    if probes:
+        print(f"   GET /api/application/{{id}} during fan-out: p50 {percentile(probes, 50) * 1000:.1f} ms   max {max(probes) * 1000:.1f} ms")
+    print(f"   SSE: {event_bytes:.0f} bytes per event, {len(latencies) * event_bytes / 1024:.0f} KB in total")
+    print(f"   polling every 1 s instead: {args.subscribers} requests/s of {record_bytes} bytes "
+          f"({args.subscribers * record_bytes / 1024:.0f} KB/s) for as long as the subscribers wait")
+    print("   " + "   ".join(line for line in metrics.splitlines() if line.startswith("status_events_total")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SSE status subscriptions on a single uvicorn worker")
+    parser.add_argument("--subscribers", type=int, default=5000, help="Concurrent SSE subscribers")
+    parser.add_argument("--applications", type=int, default=100, help="Applications the subscribers are spread over")
+    parser.add_argument("--connect-batch", type=int, default=500, help="Subscribers connecting at once")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for all events")
+    parser.add_argument("--port", type=int, default=8770, help="Port for the backend")
+    args = parser.parse_args()
+
+    env = {
+        **os.environ,
+        "LLM_PROVIDER": "fake",
+        "DRAFT_CACHE_PATH": "",
+        "TRACE_EXPORTER": "none",
+        "RVO_API_URL": "",
+        "SUBMISSION_STATUS_INTERVAL": "1"
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", "apps/backend", "--port", str(args.port),
+         "--workers", "1", "--backlog", "4096", "--log-level", "warning"],
+        env=env
+    )
+    args.server_pid = server.pid
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"http://127.0.0.1:{args.port}/")
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+
+        print("Status Events Benchmark")
+        print(f"{args.subscribers} subscribers over {args.applications} applications, one uvicorn worker")
+        print("=" * 50)
+        asyncio.run(run(args))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark for WalletService credential matching
+Compares the field index against a linear scan for large wallets
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+# Add the backend directory to Python path
+sys.path.append('apps/backend')
+
+from services.wallet_service import WalletService, WalletPartition
+
+with open("data/rvo/examples/requirements.json") as f:
+    REQUESTED_CREDENTIALS = json.load(f)["requestedCredentials"]
+
+
+def make_wallet(size: int) -> WalletPartition:
+    """Fill a wallet with synthetic credentials, a few of them relevant to DHI"""
+    wallet = WalletService().default_wallet
+    for i in range(size):
+        # Roughly one in fifty credentials carries a requested field
+        fields = [f"field_{random.randrange(500)}" for _ in range(random.randint(2, 12))]
+        if i % 50 == 0:
+            fields.append(random.choice(REQUESTED_CREDENTIALS))
+        wallet._cache_credential(f"cred_{i:06d}", {
+            "id": f"cred_{i:06d}",
+            "type": f"Credential{random.randrange(40)}",
+            "credentialSubject": {field: "value" for field in fields}
+        })
+    return wallet
+
+
+def linear_match(credentials: list, requested_types: list):
+    """Matching as WalletService did it before the field index"""
+    available = []
+    for cred in credentials:
+        cred_type = cred.get("type", "")
+        if cred_type in requested_types or any(req_type in cred.get("credentialSubject", {}) for req_type in requested_types):
+            available.append(cred)
+
+    available_types = set()
+    for cred in available:
+        available_types.add(cred.get("type", ""))
+        available_types.update(cred.get("credentialSubject", {}).keys())
+    missing = set(requested_types) - available_types
+    return available, list(missing)
+
+
+def time_call(func, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - started) / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark wallet credential matching")
+    parser.add_argument("--sizes", default="1000,5000,20000", help="Comma separated wallet sizes")
+    parser.add_argument("--rounds", type=int, default=200, help="Matches per measurement")
+    args = parser.parse_args()
+
+    random.seed(42)
+    print("Wallet Credential Matching Benchmark")
+    print(f"Requested credentials: {len(REQUESTED_CREDENTIALS)} DHI fields")
+    print("=" * 50)
+
+    for size in [int(s) for s in args.sizes.split(",")]:
+        wallet = make_wallet(size)
+        credentials = list(wallet.credentials_cache.values())
+
+        indexed_available, indexed_missing = wallet.match_requested(REQUESTED_CREDENTIALS)
+        linear_available, linear_missing = linear_match(credentials, REQUESTED_CREDENTIALS)
+        assert {c["id"] for c in indexed_available} == {c["id"] for c in linear_available}
+        assert set(indexed_missing) == set(linear_missing)
+
+        linear_us = time_call(lambda: linear_match(credentials, REQUESTED_CREDENTIALS), args.rounds)
+        indexed_us = time_call(lambda: wallet.match_requested(REQUESTED_CREDENTIALS), args.rounds)
+
+        print(f"\n{size:,} credentials ({len(indexed_available)} available, {len(indexed_missing)} missing)")
+        print(f"   linear scan   {linear_us:10.1f} us")
+        print(f"   field index   {indexed_us:10.1f} us   ({linear_us / indexed_us:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark for wallet credential reloading
+Measures how long a full wallet reload blocks the event loop
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the backend directory to Python path
+sys.path.append('apps/backend')
+
+from services.wallet_service import WalletService
+
+
+def write_wallet(directory: Path, size: int):
+    """Write `size` credential files shaped like data/wallet/business.json"""
+    with open("data/wallet/business.json") as f:
+        template = json.load(f)
+    for i in range(size):
+        credential = dict(template, id=f"business_{i:06d}")
+        with open(directory / f"business_{i:06d}.json", "w") as f:
+            json.dump(credential, f)
+
+
+def blocking_load(directory: Path) -> list:
+    """Loading as WalletService did it before, inline on the event loop"""
+    credentials = []
+    for file_path in directory.glob("*.json"):
+        with open(file_path, 'r') as f:
+            credentials.append(json.load(f))
+    return credentials
+
+
+async def heartbeat(stop: asyncio.Event, lags: list, interval: float = 0.001):
+    """Record how late the loop wakes up while a reload is running"""
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def run_with_heartbeat(coro):
+    stop = asyncio.Event()
+    lags = []
+    probe = asyncio.create_task(heartbeat(stop, lags))
+    await asyncio.sleep(0.01)
+    started = time.perf_counter()
+    await coro
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    return elapsed, max(lags) if lags else 0.0
+
+
+async def blocking_reload(directory: Path):
+    blocking_load(directory)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark wallet reloading")
+    parser.add_argument("--sizes", default="500,2000,10000", help="Comma separated numbers of wallet files")
+    args = parser.parse_args()
+
+    print("Wallet Reload Benchmark")
+    print("=" * 50)
+
+    for size in [int(s) for s in args.sizes.split(",")]:
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp)
+            write_wallet(directory, size)
+
+            elapsed, max_lag = await run_with_heartbeat(blocking_reload(directory))
+            print(f"\n{size:,} files")
+            print(f"   blocking load    {elapsed * 1000:8.1f} ms total   max loop lag {max_lag * 1000:8.1f} ms")
+
+            wallet = WalletService().default_wallet
+            wallet.data_dir = directory
+            elapsed, max_lag = await run_with_heartbeat(wallet.refresh())
+            blocked = wallet.last_loop_blocked_seconds
+            print(f"   pooled refresh   {elapsed * 1000:8.1f} ms total   max loop lag {max_lag * 1000:8.1f} ms   loop blocked {blocked * 1000:.1f} ms")
+
+            elapsed, max_lag = await run_with_heartbeat(wallet.refresh())
+            blocked = wallet.last_loop_blocked_seconds
+            print(f"   no-op refresh    {elapsed * 1000:8.1f} ms total   max loop lag {max_lag * 1000:8.1f} ms   loop blocked {blocked * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Load test for the application workflow
+Drives concurrent virtual entrepreneurs through dashboard -> start -> draft
+-> complete -> confirm -> submit, in-process over ASGI with the fake LLM or
+against a running backend, and reports per-endpoint throughput and
+p50/p95/p99 latency. Results are saved as JSON and can be compared with an
+earlier run.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import httpx
+
+# Add the backend directory to Python path
+sys.path.append('apps/backend')
+
+STEPS = ["dashboard", "start", "draft", "complete", "confirm", "submit"]
+
+ADDITIONAL_INFORMATION = {
+    "projectLocationDHI": "Nairobi, Kenya",
+    "applicantRole": "single entrepreneur",
+    "applicationTypeOrConsortium": "demonstration",
+    "targetSector": "water",
+    "startDate": "2025-01-01",
+    "endDate": "2025-12-31"
+}
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+@asynccontextmanager
+async def open_client(url: str, timeout: float):
+    """HTTP client for a running backend, or for the app in this process"""
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=timeout) as client:
+            yield client
+        return
+
+    # Run the backend offline: fake LLM, no draft cache on disk
+    os.environ.setdefault("LLM_PROVIDER", "fake")
+    os.environ.setdefault("DRAFT_CACHE_PATH", "")
+    from main import app
+
+    # ASGITransport does not send lifespan events, so run them here
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+            yield client
+
+
+async def call(client: httpx.AsyncClient, results: dict, step: str, method: str, path: str, **kwargs) -> dict:
+    """Send one request and record its latency under the step name"""
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, path, **kwargs)
+        ok = response.status_code < 400
+        body = response.json() if ok else None
+    except (httpx.HTTPError, ValueError):
+        ok, body = False, None
+    results[step]["latencies"].append(time.perf_counter() - started)
+    if not ok:
+        results[step]["errors"] += 1
+    return body
+
+
+async def entrepreneur(client: httpx.AsyncClient, results: dict, index: int, iterations: int) -> int:
+    """One virtual entrepreneur running the workflow `iterations` times"""
+    entrepreneur_id = f"loadtest-{index}"
+    completed = 0
+    for _ in range(iterations):
+        await call(client, results, "dashboard", "GET", "/api/dashboard", params={"entrepreneurId": entrepreneur_id})
+
+        started = await call(client, results, "start", "POST", "/api/application/start", json={"entrepreneurId": entrepreneur_id})
+        if started is None:
+            continue
+        application_id = started["applicationId"]
+
+        if await call(client, results, "draft", "POST", "/api/agent/draft", json={"applicationId": application_id}) is None:
+            continue
+        if await call(client, results, "complete", "POST", "/api/entrepreneur/complete",
+                      json={"applicationId": application_id, "additionalInformation": ADDITIONAL_INFORMATION}) is None:
+            continue
+
+        confirmed = await call(client, results, "confirm", "POST", "/api/attestation/confirm",
+                               json={"applicationId": application_id, "pin": "1234"})
+        if confirmed is None:
+            continue
+        if await call(client, results, "submit", "POST", "/api/rvo/submit",
+                      json={"applicationId": application_id, "attestation": confirmed["attestation"]}) is None:
+            continue
+        completed += 1
+    return completed
+
+
+def summarize(results: dict, duration: float) -> dict:
+    endpoints = {}
+    for step in STEPS:
+        latencies = results[step]["latencies"]
+        if not latencies:
+            continue
+        endpoints[step] = {
+            "requests": len(latencies),
+            "errors": results[step]["errors"],
+            "throughput": len(latencies) / duration,
+            "meanMs": sum(latencies) / len(latencies) * 1000,
+            "p50Ms": percentile(latencies, 50) * 1000,
+            "p95Ms": percentile(latencies, 95) * 1000,
+            "p99Ms": percentile(latencies, 99) * 1000
+        }
+    return endpoints
+
+
+def print_report(report: dict, baseline: dict = None):
+    print(f"   {'endpoint':<10} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for step, stats in report["endpoints"].items():
+        line = (f"   {step:<10} {stats['requests']:8d} {stats['errors']:6d} {stats['throughput']:8.1f} "
+                f"{stats['p50Ms']:9.1f} {stats['p95Ms']:9.1f} {stats['p99Ms']:9.1f}")
+        previous = (baseline or {}).get("endpoints", {}).get(step)
+        if previous:
+            line += f"   p95 {(stats['p95Ms'] - previous['p95Ms']) / previous['p95Ms'] * 100:+6.1f}% vs baseline"
+        print(line)
+    print(f"   Completed workflows: {report['workflows']} ({report['workflowsPerSecond']:.1f}/s in {report['durationSeconds']:.1f} s)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load test the application workflow")
+    parser.add_argument("--users", type=int, default=50, help="Concurrent virtual entrepreneurs")
+    parser.add_argument("--iterations", type=int, default=4, help="Workflows per entrepreneur")
+    parser.add_argument("--url", default="", help="Backend URL; runs the app in-process when empty")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Request timeout in seconds")
+    parser.add_argument("--output", default="", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", default="", help="Compare with the JSON results of an earlier run")
+    args = parser.parse_args()
+
+    results = {step: {"latencies": [], "errors": 0} for step in STEPS}
+
+    print("Workflow Load Test")
+    print(f"{args.users} entrepreneurs x {args.iterations} workflows against {args.url or 'in-process app'}")
+    print("=" * 50)
+
+    async with open_client(args.url, args.timeout) as client:
+        started = time.perf_counter()
+        completed = await asyncio.gather(*[entrepreneur(client, results, i, args.iterations) for i in range(args.users)])
+        duration = time.perf_counter() - started
+
+    report = {
+        "startedAt": datetime.now().isoformat(),
+        "target": args.url or "in-process",
+        "config": {
+            "users": args.users,
+            "iterations": args.iterations,
+            "llmProvider": os.getenv("LLM_PROVIDER", "openai"),
+            "draftMode": os.getenv("DRAFT_MODE", "hybrid")
+        },
+        "durationSeconds": duration,
+        "workflows": sum(completed),
+        "workflowsPerSecond": sum(completed) / duration,
+        "endpoints": summarize(results, duration)
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"   Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -134,7 +134,7 @@ def test_complete_workflow():
         return False
     
     print(f"   Submission success: {submit_response.get('success', False)}")
-    print(f"   RVO Reference: {submit_response.get('submission', {}).get('rvoReference', 'N/A')}")
+    print(f"   Submission status: {submit_response.get('submission', {}).get('status', 'N/A')}")
     
     # Final status check
     print("\nFinal Status Check...")
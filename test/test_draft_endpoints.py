@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test the draft endpoints in-process, without an OpenAI API key
+Imports the backend the way uvicorn does, with the default LLM provider and
+no OPENAI_API_KEY, and checks that the draft endpoints are wired to the
+agent service and answer in rules mode.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+
+# Add the backend directory to Python path
+sys.path.append('apps/backend')
+
+# No key and the default provider: importing main must not need OpenAI
+os.environ.pop("OPENAI_API_KEY", None)
+os.environ.pop("LLM_PROVIDER", None)
+os.environ.update({"DRAFT_MODE": "rules", "DRAFT_CACHE_PATH": "", "TRACE_EXPORTER": "none"})
+
+
+async def with_backend(check) -> bool:
+    """Run check(client, application_id) against the app with its lifespan"""
+    import main
+
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/application/start", json={"entrepreneurId": "demo-001"})
+            response.raise_for_status()
+            return await check(client, response.json()["applicationId"])
+
+
+async def check_stream(client: httpx.AsyncClient, application_id: str) -> bool:
+    response = await client.post("/api/agent/draft/stream", json={"applicationId": application_id})
+    events = [line[len("event: "):] for line in response.text.splitlines() if line.startswith("event: ")]
+    if response.status_code != 200 or not events or events[-1] != "draft":
+        print(f"✗ Draft stream: status {response.status_code}, events {events[-3:]}")
+        return False
+    print(f"✓ Draft stream: {len(events)} events, ending with the draft")
+    return True
+
+
+def test_draft_stream():
+    """Test POST /api/agent/draft/stream"""
+    return asyncio.run(with_backend(check_stream))
+
+
+async def check_batch(client: httpx.AsyncClient, application_id: str) -> bool:
+    response = await client.post("/api/agent/draft/batch", json={"applicationIds": [application_id]})
+    lines = [json.loads(line) for line in response.text.splitlines() if line.strip()]
+    drafts = [line for line in lines if line.get("applicationId") == application_id and "draft" in line]
+    if response.status_code != 200 or not drafts or "summary" not in lines[-1]:
+        print(f"✗ Draft batch: status {response.status_code}, {response.text[:200]}")
+        return False
+    print(f"✓ Draft batch: {len(drafts)} draft and a summary line")
+    return True
+
+
+def test_draft_batch():
+    """Test POST /api/agent/draft/batch"""
+    return asyncio.run(with_backend(check_batch))
+
+
+def main():
+    print("Draft Endpoint Test (no OpenAI key, rules mode)")
+    print("=" * 50)
+    results = [test_draft_stream(), test_draft_batch()]
+    print("=" * 50)
+    print("All draft endpoint checks passed" if all(results) else "Some draft endpoint checks failed")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test the RVO client circuit breaker
+Runs RvoClient against an in-process mock transport and checks that a
+half-open trial always ends: a 4xx answer closes the circuit, a failure
+opens it again and a cancelled trial lets the next call try.
+"""
+
+import asyncio
+import sys
+
+import httpx
+
+# Add the backend directory to Python path
+sys.path.append('apps/backend')
+
+from services.rvo_client import CircuitBreaker, RvoClient, RvoError
+
+
+def half_open_client(handler) -> RvoClient:
+    """A client whose breaker has tripped and is ready for its trial call"""
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    client = RvoClient("http://rvo.test", max_retries=0, breaker=breaker)
+    client._client = httpx.AsyncClient(base_url=client.base_url, transport=httpx.MockTransport(handler))
+    return client
+
+
+async def check_trial_answered_with_4xx() -> bool:
+    client = half_open_client(lambda request: httpx.Response(404, json={"error": "not found"}))
+    try:
+        await client.send("GET", "/status/unknown", "status")
+    except RvoError as e:
+        status_code = e.status_code
+    finally:
+        await client.aclose()
+    if status_code != 404 or client.breaker.state != "closed" or client.breaker._trial_running:
+        print(f"✗ Half open → 404: status {status_code}, breaker {client.breaker.state}, trial running {client.breaker._trial_running}")
+        return False
+    print("✓ Half open → 404: the error is raised and the circuit closes")
+    return True
+
+
+def test_trial_answered_with_4xx():
+    """Test a half-open trial that RVO answers with a non-retryable 4xx"""
+    return asyncio.run(check_trial_answered_with_4xx())
+
+
+async def check_trial_failed() -> bool:
+    client = half_open_client(lambda request: httpx.Response(503))
+    try:
+        await client.send("GET", "/requirements", "requirements")
+    except RvoError:
+        pass
+    finally:
+        await client.aclose()
+    # The reset timeout is 0, so an opened circuit reads as half open again
+    if client.breaker.opened_at is None or client.breaker.failures != 2 or client.breaker._trial_running:
+        print(f"✗ Half open → 503: failures {client.breaker.failures}, trial running {client.breaker._trial_running}")
+        return False
+    print("✓ Half open → 503: the circuit opens again")
+    return True
+
+
+def test_trial_failed():
+    """Test a half-open trial that fails"""
+    return asyncio.run(check_trial_failed())
+
+
+async def check_trial_cancelled() -> bool:
+    started = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        started.set()
+        await asyncio.sleep(60)
+        return httpx.Response(200, json={})
+
+    client = half_open_client(handler)
+    trial = asyncio.create_task(client.send("GET", "/requirements", "requirements"))
+    await started.wait()
+    blocked = not client.breaker.allow()
+    trial.cancel()
+    await asyncio.gather(trial, return_exceptions=True)
+    released = client.breaker.allow()
+    await client.aclose()
+    if not blocked or not released:
+        print(f"✗ Cancelled trial: second call blocked {blocked}, released afterwards {released}")
+        return False
+    print("✓ Cancelled trial: other calls wait for it, and it is released when cancelled")
+    return True
+
+
+def test_trial_cancelled():
+    """Test a half-open trial that is cancelled before RVO answers"""
+    return asyncio.run(check_trial_cancelled())
+
+
+def main():
+    print("RVO Client Circuit Breaker Test")
+    print("=" * 50)
+    results = [test_trial_answered_with_4xx(), test_trial_failed(), test_trial_cancelled()]
+    print("=" * 50)
+    print("All circuit breaker checks passed" if all(results) else "Some circuit breaker checks failed")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
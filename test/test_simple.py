@@ -18,7 +18,8 @@ sys.path.append('apps/backend')
 from dotenv import load_dotenv
 load_dotenv()
 
-if not os.getenv('OPENAI_API_KEY'):
+# LLM_PROVIDER=fake runs the agent offline without an API key
+if not os.getenv('OPENAI_API_KEY') and os.getenv('LLM_PROVIDER', 'openai') != 'fake':
     raise ValueError("OPENAI_API_KEY not found in environment variables. Please set it in .env file")
 
 async def test_basic_functionality():